@@ -0,0 +1,632 @@
+//pragma solidity ^0.4.0;
+
+
+import {TokenInterface} from "contracts/TokenInterface.sol";
+import {Trapdoor} from "contracts/Trapdoor.sol";
+
+
+/*
+ *  Variant of `MultiSignature` which holds many agreements in a single
+ *  contract, keyed by agreement id, so that one transaction can act on
+ *  dozens of agreements at once.
+ *
+ *  All agreements share custody of a single token, so each agreement's
+ *  token balance is tracked internally rather than read from
+ *  `token.balanceOf`.  Tokens must therefore be deposited through
+ *  `depositToken` after an `approve`.  Tokens transferred directly to this
+ *  contract cannot be attributed to an agreement and can only be recovered
+ *  through the trapdoor.
+ *
+ *  Ether is never sent by the batch functions.  It is credited to the
+ *  `creditA` or `creditB` of the agreement and collected by the party with
+ *  `withdraw` or `withdrawMany`, so a party that cannot receive ether only
+ *  holds up its own payout.
+ */
+contract BatchedMultiSignature is Trapdoor {
+    enum State {
+        Genesis,
+        WaitingForEther,
+        WaitingForTokens,
+        WaitingForArbiterLock,
+        Locked,
+        Unlocked,
+        NeverLocked
+    }
+
+    enum Vote {
+        NoVote,
+        PartyA,
+        PartyB
+    }
+
+    struct Agreement {
+        // The party who is depositing ether, the three votes as to who
+        // should receive the tokens and the running tally of those votes.
+        address partyA;
+        Vote partyAChoice;
+        Vote partyBChoice;
+        Vote arbiterChoice;
+        uint8 numPartyAVotes;
+        uint8 numPartyBVotes;
+        // The party who is depositing tokens
+        address partyB;
+        // The 3rd party who will arbitrate the terms of the agreement, and
+        // the UTC times that it was locked and will become *unlocked*.
+        address arbiter;
+        uint48 lockedAt;
+        uint48 unlockAt;
+        // The minimum deposit amounts.
+        uint128 ethDepositMinimum;
+        uint128 tokenDepositMinimum;
+        // The deposits currently held for this agreement.
+        uint128 etherBalance;
+        uint128 tokenBalance;
+        // Ether owed to partyA and partyB, paid out by `withdraw`.
+        uint128 creditA;
+        uint128 creditB;
+    }
+
+    mapping (uint => Agreement) public agreements;
+    uint public numAgreements;
+
+    TokenInterface public token;
+
+    function BatchedMultiSignature(address[3] rescuers, address _tokenAddress) {
+        setTrapdoorSigners(rescuers);
+
+        token = TokenInterface(_tokenAddress);
+    }
+
+    /*
+     *  ----------
+     *  | Events |
+     *  ----------
+     */
+    event AgreementCreated(uint indexed id, address partyA, address partyB, address arbiter);
+    event AgreementLocked(uint indexed id);
+
+    event EtherDeposit(uint indexed id, address indexed who, uint amount);
+    event EtherWithdrawal(uint indexed id, address indexed who, uint amount);
+
+    event TokenDeposit(uint indexed id, address indexed who, uint amount);
+    event TokenWithdrawal(uint indexed id, address indexed who, uint amount);
+
+    /*
+     *  -----------------------------
+     *  | Agreement State Management |
+     *  -----------------------------
+     */
+
+    /*
+     *  The current "state" of the given agreement.
+     */
+    function currentState(uint id) constant returns (State) {
+        Agreement storage agreement = agreements[id];
+
+        if (agreement.lockedAt != 0) {
+            if (now < agreement.unlockAt) {
+                return State.Locked;
+            } else {
+                return State.Unlocked;
+            }
+        } else if (now >= agreement.unlockAt) {
+            return State.NeverLocked;
+        }
+
+        bool etherMet = (agreement.etherBalance >= agreement.ethDepositMinimum);
+        bool tokensMet = (agreement.tokenBalance >= agreement.tokenDepositMinimum);
+
+        if (etherMet && tokensMet) {
+            return State.WaitingForArbiterLock;
+        } else if (etherMet) {
+            return State.WaitingForTokens;
+        } else if (tokensMet) {
+            return State.WaitingForEther;
+        } else {
+            return State.Genesis;
+        }
+    }
+
+    /*
+     *  The opinion of each of partyA, partyB and the arbiter as to who should
+     *  receive the tokens of the given agreement.
+     */
+    function votes(uint id) constant returns (address partyAVote,
+                                              address partyBVote,
+                                              address arbiterVote) {
+        Agreement storage agreement = agreements[id];
+
+        partyAVote = voteRecipient(agreement, agreement.partyAChoice);
+        partyBVote = voteRecipient(agreement, agreement.partyBChoice);
+        arbiterVote = voteRecipient(agreement, agreement.arbiterChoice);
+    }
+
+    function voteRecipient(Agreement storage agreement, Vote vote) internal constant returns (address) {
+        if (vote == Vote.PartyA) {
+            return agreement.partyA;
+        } else if (vote == Vote.PartyB) {
+            return agreement.partyB;
+        } else {
+            return 0x0;
+        }
+    }
+
+    /*
+     *  The party of the agreement which has received 2 votes, or 0x0 if
+     *  neither has yet.
+     */
+    function voteWinner(Agreement storage agreement) internal constant returns (address) {
+        if (agreement.numPartyAVotes >= 2) {
+            return agreement.partyA;
+        } else if (agreement.numPartyBVotes >= 2) {
+            return agreement.partyB;
+        }
+        return 0x0;
+    }
+
+    /*
+     *  -------------
+     *  | Modifiers |
+     *  -------------
+     */
+
+    /*
+     *  Only allow execution against an agreement which has been created.
+     */
+    modifier agreementExists(uint id) {
+        if (id < numAgreements) {
+            _
+            // _;  // if solc 0.4.x
+        } else {
+            throw;
+        }
+    }
+
+    /*
+     *  Do not allow sending of ether to this function.
+     */
+    modifier noEther {
+        if (msg.value == 0) {
+            _
+            // _;  // if solc 0.4.x
+        } else {
+            throw;
+        }
+    }
+
+    /*
+     *  -----------
+     *  | Actions |
+     *  -----------
+     */
+
+    /*
+     *  Register a new agreement.  Returns its id.
+     */
+    function createAgreement(address[3] participants,
+                             uint _ethDepositMinimum,
+                             uint _tokenDepositMinimum,
+                             uint _unlockAt) public
+                                             noEther
+                                             returns (uint) {
+        if (_ethDepositMinimum >= 2 ** 128 || _tokenDepositMinimum >= 2 ** 128) {
+            throw;
+        }
+        if (_unlockAt >= 2 ** 48) {
+            throw;
+        }
+
+        uint id = numAgreements;
+        numAgreements += 1;
+
+        Agreement storage agreement = agreements[id];
+
+        agreement.partyA = participants[0];
+        agreement.partyB = participants[1];
+        agreement.arbiter = participants[2];
+
+        agreement.ethDepositMinimum = uint128(_ethDepositMinimum);
+        agreement.tokenDepositMinimum = uint128(_tokenDepositMinimum);
+        agreement.unlockAt = uint48(_unlockAt);
+
+        AgreementCreated(id, agreement.partyA, agreement.partyB, agreement.arbiter);
+        return id;
+    }
+
+    /*
+     *  Function for partyA to deposit ether.  Deposits below the minimum are
+     *  credited back to partyA.
+     */
+    function depositEther(uint id) public
+                                   agreementExists(id)
+                                   returns (bool) {
+        Agreement storage agreement = agreements[id];
+        var _currentState = currentState(id);
+
+        if (msg.sender != agreement.partyA) {
+            throw;
+        }
+        if (_currentState != State.Genesis && _currentState != State.WaitingForEther) {
+            throw;
+        }
+
+        if (msg.value >= agreement.ethDepositMinimum && msg.value < 2 ** 128) {
+            agreement.etherBalance = uint128(msg.value);
+            EtherDeposit(id, msg.sender, msg.value);
+            return true;
+        } else {
+            agreement.creditA += uint128(msg.value);
+            return false;
+        }
+    }
+
+    /*
+     *  Function for partyB to deposit tokens using the `transferFrom` and
+     *  `approve` API.
+     */
+    function depositToken(uint id) public
+                                   noEther
+                                   agreementExists(id)
+                                   returns (bool) {
+        Agreement storage agreement = agreements[id];
+        var _currentState = currentState(id);
+
+        if (msg.sender != agreement.partyB) {
+            throw;
+        }
+        if (_currentState != State.Genesis && _currentState != State.WaitingForTokens) {
+            throw;
+        }
+
+        uint neededTokens = agreement.tokenDepositMinimum - agreement.tokenBalance;
+        if (token.allowance(msg.sender, this) >= neededTokens) {
+            if (token.transferFrom(msg.sender, this, neededTokens)) {
+                agreement.tokenBalance += uint128(neededTokens);
+                TokenDeposit(id, msg.sender, neededTokens);
+                return true;
+            }
+        }
+        return false;
+    }
+
+    /*
+     *  Function for partyA to recover their ether, which is credited to them
+     *  and collected with `withdraw`.
+     */
+    function refundEther(uint id) public
+                                  noEther
+                                  agreementExists(id)
+                                  returns (bool) {
+        Agreement storage agreement = agreements[id];
+        var _currentState = currentState(id);
+
+        if (msg.sender != agreement.partyA) {
+            throw;
+        }
+        if (_currentState != State.WaitingForTokens &&
+            _currentState != State.WaitingForArbiterLock &&
+            _currentState != State.NeverLocked) {
+            throw;
+        }
+
+        uint etherBalance = agreement.etherBalance;
+        if (etherBalance == 0) {
+            return false;
+        }
+
+        agreement.etherBalance = 0;
+        agreement.creditA += uint128(etherBalance);
+        return true;
+    }
+
+    /*
+     *  Function for partyB to recover their tokens.
+     */
+    function refundTokens(uint id) public
+                                   noEther
+                                   agreementExists(id)
+                                   returns (bool) {
+        Agreement storage agreement = agreements[id];
+        var _currentState = currentState(id);
+
+        if (msg.sender != agreement.partyB) {
+            throw;
+        }
+        if (_currentState != State.WaitingForEther &&
+            _currentState != State.WaitingForArbiterLock &&
+            _currentState != State.NeverLocked) {
+            throw;
+        }
+
+        uint tokenBalance = agreement.tokenBalance;
+        if (tokenBalance == 0) {
+            return false;
+        }
+
+        agreement.tokenBalance = 0;
+        if (!token.transfer(agreement.partyB, tokenBalance)) {
+            throw;
+        }
+        TokenWithdrawal(id, agreement.partyB, tokenBalance);
+        return true;
+    }
+
+    /*
+     *  Function for the arbiter to lock an agreement.
+     */
+    function lock(uint id) public
+                           noEther
+                           agreementExists(id)
+                           returns (bool) {
+        if (!lockAgreement(id)) {
+            throw;
+        }
+        return true;
+    }
+
+    /*
+     *  Lock every agreement in `ids` which the sender is the arbiter of and
+     *  which is waiting to be locked.  Others are skipped.  Returns the number
+     *  of agreements locked.
+     */
+    function lockMany(uint[] ids) public
+                                  noEther
+                                  returns (uint numLocked) {
+        for (uint i = 0; i < ids.length; i++) {
+            if (ids[i] < numAgreements && lockAgreement(ids[i])) {
+                numLocked += 1;
+            }
+        }
+    }
+
+    function lockAgreement(uint id) internal returns (bool) {
+        Agreement storage agreement = agreements[id];
+
+        if (msg.sender != agreement.arbiter) {
+            return false;
+        }
+        if (currentState(id) != State.WaitingForArbiterLock) {
+            return false;
+        }
+
+        agreement.lockedAt = uint48(now);
+        AgreementLocked(id);
+        return true;
+    }
+
+    /*
+     *  Function for crediting the ether deposit of a locked agreement to
+     *  partyB.
+     */
+    function withdrawEther(uint id) public
+                                    noEther
+                                    agreementExists(id)
+                                    returns (bool) {
+        return withdrawAgreementEther(id);
+    }
+
+    /*
+     *  Credit the ether deposit of every locked or unlocked agreement in
+     *  `ids` to its partyB.  Others are skipped.  Returns the number of
+     *  agreements credited.
+     */
+    function withdrawEtherMany(uint[] ids) public
+                                           noEther
+                                           returns (uint numWithdrawn) {
+        for (uint i = 0; i < ids.length; i++) {
+            if (ids[i] < numAgreements && withdrawAgreementEther(ids[i])) {
+                numWithdrawn += 1;
+            }
+        }
+    }
+
+    function withdrawAgreementEther(uint id) internal returns (bool) {
+        Agreement storage agreement = agreements[id];
+        var _currentState = currentState(id);
+
+        if (_currentState != State.Locked && _currentState != State.Unlocked) {
+            return false;
+        }
+
+        uint etherBalance = agreement.etherBalance;
+        if (etherBalance == 0) {
+            return false;
+        }
+
+        agreement.etherBalance = 0;
+        agreement.creditB += uint128(etherBalance);
+        return true;
+    }
+
+    /*
+     *  Function for partyA or partyB of an agreement to collect the ether
+     *  credited to them by it.  The ether is sent with `send`, and a failed
+     *  send leaves the credit in place.
+     */
+    function withdraw(uint id) public
+                               noEther
+                               agreementExists(id)
+                               returns (bool) {
+        Agreement storage agreement = agreements[id];
+
+        uint amount = takeCredit(agreement);
+        if (amount == 0) {
+            return false;
+        }
+
+        if (msg.sender.send(amount)) {
+            EtherWithdrawal(id, msg.sender, amount);
+            return true;
+        }
+
+        if (msg.sender == agreement.partyA) {
+            agreement.creditA = uint128(amount);
+        } else {
+            agreement.creditB = uint128(amount);
+        }
+        return false;
+    }
+
+    /*
+     *  Collect the ether credited to the sender by every agreement in `ids`
+     *  with a single `send`.  Agreements the sender is not owed anything by
+     *  are skipped.  If the send fails this throws, leaving every credit in
+     *  place.  Returns the amount sent.
+     */
+    function withdrawMany(uint[] ids) public
+                                      noEther
+                                      returns (uint total) {
+        for (uint i = 0; i < ids.length; i++) {
+            if (ids[i] >= numAgreements) {
+                continue;
+            }
+            uint amount = takeCredit(agreements[ids[i]]);
+            if (amount > 0) {
+                total += amount;
+                EtherWithdrawal(ids[i], msg.sender, amount);
+            }
+        }
+
+        if (total > 0 && !msg.sender.send(total)) {
+            throw;
+        }
+    }
+
+    /*
+     *  Clear the credit the sender is owed by `agreement` and return it.
+     */
+    function takeCredit(Agreement storage agreement) internal returns (uint amount) {
+        if (msg.sender == agreement.partyA) {
+            amount = agreement.creditA;
+            agreement.creditA = 0;
+        } else if (msg.sender == agreement.partyB) {
+            amount = agreement.creditB;
+            agreement.creditB = 0;
+        }
+    }
+
+    /*
+     *  Function for sending the tokens of an agreement once it has been
+     *  resolved through voting.
+     */
+    function withdrawTokens(uint id) public
+                                     noEther
+                                     agreementExists(id)
+                                     returns (bool) {
+        return withdrawAgreementTokens(id);
+    }
+
+    /*
+     *  Send the tokens of every resolved agreement in `ids` to the party
+     *  with at least 2 votes.  Others are skipped.  Returns the number of
+     *  agreements paid out.
+     */
+    function withdrawTokensMany(uint[] ids) public
+                                            noEther
+                                            returns (uint numWithdrawn) {
+        for (uint i = 0; i < ids.length; i++) {
+            if (ids[i] < numAgreements && withdrawAgreementTokens(ids[i])) {
+                numWithdrawn += 1;
+            }
+        }
+    }
+
+    function withdrawAgreementTokens(uint id) internal returns (bool) {
+        Agreement storage agreement = agreements[id];
+
+        if (currentState(id) != State.Unlocked) {
+            return false;
+        }
+
+        uint tokenBalance = agreement.tokenBalance;
+        if (tokenBalance == 0) {
+            return false;
+        }
+
+        address recipient = voteWinner(agreement);
+        if (recipient == 0x0) {
+            return false;
+        }
+
+        agreement.tokenBalance = 0;
+        if (!token.transfer(recipient, tokenBalance)) {
+            throw;
+        }
+        TokenWithdrawal(id, recipient, tokenBalance);
+        return true;
+    }
+
+    /*
+     *  Function for partyA, partyB or the arbiter of an unlocked agreement to
+     *  vote on the recipient of its tokens.
+     */
+    function submitVote(uint id, address _who) public
+                                               noEther
+                                               agreementExists(id)
+                                               returns (bool) {
+        if (currentState(id) != State.Unlocked) {
+            throw;
+        }
+        return submitAgreementVote(id, _who);
+    }
+
+    /*
+     *  Vote on the recipient of the tokens of many agreements.  `whos[i]` is
+     *  the vote for `ids[i]`.  Agreements which are not unlocked, which the
+     *  sender is not a voter in or which the sender has already voted on are
+     *  skipped.  Returns the number of votes recorded.
+     */
+    function submitVotes(uint[] ids, address[] whos) public
+                                                     noEther
+                                                     returns (uint numVotes) {
+        if (ids.length != whos.length) {
+            throw;
+        }
+        for (uint i = 0; i < ids.length; i++) {
+            if (ids[i] < numAgreements &&
+                currentState(ids[i]) == State.Unlocked &&
+                submitAgreementVote(ids[i], whos[i])) {
+                numVotes += 1;
+            }
+        }
+    }
+
+    function submitAgreementVote(uint id, address _who) internal returns (bool) {
+        Agreement storage agreement = agreements[id];
+
+        Vote vote;
+        if (_who == agreement.partyA) {
+            vote = Vote.PartyA;
+        } else if (_who == agreement.partyB) {
+            vote = Vote.PartyB;
+        } else {
+            return false;
+        }
+
+        if (msg.sender == agreement.partyA) {
+            if (agreement.partyAChoice != Vote.NoVote) {
+                return false;
+            }
+            agreement.partyAChoice = vote;
+        } else if (msg.sender == agreement.partyB) {
+            if (agreement.partyBChoice != Vote.NoVote) {
+                return false;
+            }
+            agreement.partyBChoice = vote;
+        } else if (msg.sender == agreement.arbiter) {
+            if (agreement.arbiterChoice != Vote.NoVote) {
+                return false;
+            }
+            agreement.arbiterChoice = vote;
+        } else {
+            return false;
+        }
+
+        if (vote == Vote.PartyA) {
+            agreement.numPartyAVotes += 1;
+        } else {
+            agreement.numPartyBVotes += 1;
+        }
+        return true;
+    }
+}
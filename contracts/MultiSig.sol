@@ -2,44 +2,77 @@
 
 
 import {TokenInterface} from "contracts/TokenInterface.sol";
+import {Trapdoor} from "contracts/Trapdoor.sol";
 
 
-contract MultiSignature {
+contract MultiSignature is Trapdoor {
+    /*
+     *  Storage is laid out so that the values read together share a slot.
+     *  Slots 0-5 hold the `Trapdoor` signers and their approvals.
+     *
+     *  slot 6: token, lockedAt, unlockAt
+     *  slot 7: ethDepositMinimum, tokenDepositMinimum
+     *  slot 8: partyA, partyAChoice, partyBChoice, arbiterChoice,
+     *          numPartyAVotes, numPartyBVotes
+     *  slot 9: partyB
+     *  slot 10: arbiter, initialized
+     *  slot 11: creditA, creditB
+     *  slot 12: tokenBalance
+     *  slot 13-14: contractTerms, contractTermsHash
+     */
+    TokenInterface public token;
+    // The UTC time that the arbiter locked this contract.
+    uint48 public lockedAt;
+    // The UTC time that this contract will become *unlocked*.
+    uint48 public unlockAt;
+
+    // The minimum ether deposit amount (in wei)
+    uint128 public ethDepositMinimum;
+    // The minimum token deposit amount.
+    uint128 public tokenDepositMinimum;
+
     // The party who is depositing ether
     address public partyA;
-    // The party who is depositing tokens
-    address public partyB;
-    // The 3rd party who will arbitrate the terms of the contract.
-    address public arbiter;
+
+    enum Vote {
+        NoVote,
+        PartyA,
+        PartyB
+    }
 
     // The opinion of partyA as to who should receive the tokens.
-    address public partyAVote;
+    Vote partyAChoice;
     // The opinion of partyB as to who should receive the tokens.
-    address public partyBVote;
+    Vote partyBChoice;
     // The opinion of aribiter as to who should receive the tokens.
-    address public arbiterVote;
-
-    // The minimum ether deposit amount (in wei)
-    uint public ethDepositMinimum;
-    // The minimum token deposit amount.
-    uint public tokenDepositMinimum;
-
-    // The UTC time that the arbiter locked this contract.
-    uint public lockedAt;
-    // The UTC time that this contract will become *unlocked*.
-    uint public unlockAt;
+    Vote arbiterChoice;
+    // Running tally of the votes for each party, kept alongside the choices
+    // so that settling never has to recount them.
+    uint8 public numPartyAVotes;
+    uint8 public numPartyBVotes;
 
-    // Three address multisig that can execute the trapdoor function.
-    address public trapdoorA;
-    address public trapdoorB;
-    address public trapdoorC;
+    // The party who is depositing tokens
+    address public partyB;
+    // The 3rd party who will arbitrate the terms of the contract.
+    address public arbiter;
+    // Whether the constructor or `initialize` has set up this contract.
+    bool public initialized;
 
-    // Storage for the desired execution to be sent from the trapdoor.
-    mapping (address => bytes32) public trapdoorData;
+    // Ether owed to partyA and partyB, paid out by `withdraw`.  Credited
+    // ether stays in the contract balance but no longer counts as deposited.
+    uint128 public creditA;
+    uint128 public creditB;
 
-    TokenInterface public token;
+    // The tokens held in escrow, updated by deposits and withdrawals so that
+    // state checks do not need to call the token contract.  Tokens
+    // transferred to the contract directly are added by `syncTokenBalance`.
+    uint128 public tokenBalance;
 
     string public contractTerms;
+    // The `sha3` of the terms document when only its hash is kept in
+    // storage.  The document itself, or a URI for it, is published in the
+    // `ContractTermsPublished` event.
+    bytes32 public contractTermsHash;
 
     function MultiSignature(address[3] participants,
                             address[3] rescuers,
@@ -48,20 +81,141 @@ contract MultiSignature {
                             address _tokenAddress,
                             uint _unlockAt,
                             string _contractTerms) {
+        setup(
+            participants,
+            rescuers,
+            _ethDepositMinimum,
+            _tokenDepositMinimum,
+            _tokenAddress,
+            _unlockAt
+        );
+        contractTerms = _contractTerms;
+    }
+
+    /*
+     *  Stands in for the constructor when this contract's code is run from
+     *  behind a `MultiSignatureProxy`.  May only be called once, and never
+     *  on a contract which was deployed through the constructor.
+     */
+    function initialize(address[3] participants,
+                        address[3] rescuers,
+                        uint _ethDepositMinimum,
+                        uint _tokenDepositMinimum,
+                        address _tokenAddress,
+                        uint _unlockAt,
+                        string _contractTerms) public noEther {
+        setup(
+            participants,
+            rescuers,
+            _ethDepositMinimum,
+            _tokenDepositMinimum,
+            _tokenAddress,
+            _unlockAt
+        );
+        contractTerms = _contractTerms;
+    }
+
+    /*
+     *  Same as `initialize` except that only the hash of the terms is
+     *  stored.  `_contractTermsOrURI` is only emitted in the
+     *  `ContractTermsPublished` event, so its length has next to no effect on
+     *  the cost of deployment.
+     */
+    function initializeWithTermsHash(address[3] participants,
+                                     address[3] rescuers,
+                                     uint _ethDepositMinimum,
+                                     uint _tokenDepositMinimum,
+                                     address _tokenAddress,
+                                     uint _unlockAt,
+                                     bytes32 _contractTermsHash,
+                                     string _contractTermsOrURI) public noEther {
+        setup(
+            participants,
+            rescuers,
+            _ethDepositMinimum,
+            _tokenDepositMinimum,
+            _tokenAddress,
+            _unlockAt
+        );
+        contractTermsHash = _contractTermsHash;
+        ContractTermsPublished(_contractTermsHash, _contractTermsOrURI);
+    }
+
+    function setup(address[3] participants,
+                   address[3] rescuers,
+                   uint _ethDepositMinimum,
+                   uint _tokenDepositMinimum,
+                   address _tokenAddress,
+                   uint _unlockAt) internal {
+        if (initialized) {
+            throw;
+        }
+        if (_ethDepositMinimum >= 2 ** 128 || _tokenDepositMinimum >= 2 ** 128) {
+            throw;
+        }
+        if (_unlockAt >= 2 ** 48) {
+            throw;
+        }
+        initialized = true;
+
         partyA = participants[0];
         partyB = participants[1];
         arbiter = participants[2];
 
-        trapdoorA = rescuers[0];
-        trapdoorB = rescuers[1];
-        trapdoorC = rescuers[2];
+        setTrapdoorSigners(rescuers);
 
-        ethDepositMinimum = _ethDepositMinimum;
-        tokenDepositMinimum = _tokenDepositMinimum;
+        ethDepositMinimum = uint128(_ethDepositMinimum);
+        tokenDepositMinimum = uint128(_tokenDepositMinimum);
         token = TokenInterface(_tokenAddress);
 
-        unlockAt = _unlockAt;
-        contractTerms = _contractTerms;
+        unlockAt = uint48(_unlockAt);
+    }
+
+    /*
+     *  The opinion of partyA as to who should receive the tokens.
+     */
+    function partyAVote() constant returns (address) {
+        return voteRecipient(partyAChoice);
+    }
+
+    /*
+     *  The opinion of partyB as to who should receive the tokens.
+     */
+    function partyBVote() constant returns (address) {
+        return voteRecipient(partyBChoice);
+    }
+
+    /*
+     *  The opinion of the arbiter as to who should receive the tokens.
+     */
+    function arbiterVote() constant returns (address) {
+        return voteRecipient(arbiterChoice);
+    }
+
+    /*
+     *  The address that a vote is cast in favor of.
+     */
+    function voteRecipient(Vote vote) internal constant returns (address) {
+        if (vote == Vote.PartyA) {
+            return partyA;
+        } else if (vote == Vote.PartyB) {
+            return partyB;
+        } else {
+            return 0x0;
+        }
+    }
+
+    /*
+     *  The vote for `_who`, who must be one of partyA or partyB.
+     */
+    function voteFor(address _who) internal constant returns (Vote) {
+        if (_who == partyA) {
+            return Vote.PartyA;
+        } else if (_who == partyB) {
+            return Vote.PartyB;
+        } else {
+            return Vote.NoVote;
+        }
     }
 
     /*
@@ -75,6 +229,8 @@ contract MultiSignature {
     event TokenDeposit(address indexed who, uint amount);
     event TokenWithdrawal(address indexed who, uint amount);
 
+    event ContractTermsPublished(bytes32 indexed termsHash, string termsOrURI);
+
     /*
      *  -----------------------------
      *  | Contract State Management |
@@ -94,17 +250,39 @@ contract MultiSignature {
      *  The current "state" that the contract is in.
      */
     function currentState() constant returns (State) {
+        if (wasLocked() || now >= unlockAt) {
+            return timedState();
+        }
+        return depositState(tokenBalance);
+    }
+
+    /*
+     *  The state once the arbiter has locked the contract or `unlockAt` has
+     *  passed, neither of which depend on the deposits.
+     */
+    function timedState() internal constant returns (State) {
         if (isLocked()) {
             return State.Locked;
         } else if (wasLocked()) {
             return State.Unlocked;
-        } else if (now >= unlockAt) {
+        } else {
             return State.NeverLocked;
-        } else if (depositsMet()) {
+        }
+    }
+
+    /*
+     *  The state prior to locking, given the contract's token balance.  Each
+     *  deposit minimum is only evaluated once.
+     */
+    function depositState(uint _tokenBalance) internal constant returns (State) {
+        bool etherMet = ethDepositMet();
+        bool tokensMet = (_tokenBalance >= tokenDepositMinimum);
+
+        if (etherMet && tokensMet) {
             return State.WaitingForArbiterLock;
-        } else if (ethDepositMet()) {
+        } else if (etherMet) {
             return State.WaitingForTokens;
-        } else if (tokenDepositMet()) {
+        } else if (tokensMet) {
             return State.WaitingForEther;
         } else {
             return State.Genesis;
@@ -122,14 +300,33 @@ contract MultiSignature {
             // happen here anyways.
             throw;
         }
-        return (this.balance - msg.value >= ethDepositMinimum);
+        var etherBalance = escrowedEther();
+        if (msg.value > etherBalance) {
+            // Only possible once the trapdoor has sent credited ether
+            // elsewhere.
+            return false;
+        }
+        return (etherBalance - msg.value >= ethDepositMinimum);
+    }
+
+    /*
+     *  The contract's ether balance less the credits waiting to be collected
+     *  through `withdraw`.  The trapdoor may send credited ether elsewhere,
+     *  in which case nothing is left in escrow.
+     */
+    function escrowedEther() internal constant returns (uint) {
+        uint credits = uint(creditA) + uint(creditB);
+        if (credits >= this.balance) {
+            return 0;
+        }
+        return this.balance - credits;
     }
 
     /*
      *  Has the minimum token deposit been met.
      */
     function tokenDepositMet() constant returns (bool) {
-        return (token.balanceOf(this) >= tokenDepositMinimum);
+        return (tokenBalance >= tokenDepositMinimum);
     }
 
     /*
@@ -157,6 +354,35 @@ contract MultiSignature {
         return (lockedAt != 0);
     }
 
+    /*
+     *  Everything needed to tell which actions are currently allowed, read
+     *  in a single call.
+     *
+     *  addresses: partyA, partyB, arbiter, token
+     *  votes: partyAVote, partyBVote, arbiterVote
+     *  values: lockedAt, unlockAt, currentState, escrowed ether balance,
+     *          tracked token balance, now
+     */
+    function getSnapshot() constant returns (address[4] addresses,
+                                             address[3] votes,
+                                             uint[6] values) {
+        addresses[0] = partyA;
+        addresses[1] = partyB;
+        addresses[2] = arbiter;
+        addresses[3] = token;
+
+        votes[0] = voteRecipient(partyAChoice);
+        votes[1] = voteRecipient(partyBChoice);
+        votes[2] = voteRecipient(arbiterChoice);
+
+        values[0] = lockedAt;
+        values[1] = unlockAt;
+        values[2] = uint(currentState());
+        values[3] = escrowedEther();
+        values[4] = tokenBalance;
+        values[5] = now;
+    }
+
     /*
      *  -------------
      *  | Modifiers |
@@ -261,18 +487,6 @@ contract MultiSignature {
         }
     }
 
-    /*
-     *  Only allow one of the trapdoor multisig accounts to execute this
-     *  function.
-     */
-    modifier onlyTrapdoorMultiSig {
-        if (msg.sender == trapdoorA || msg.sender == trapdoorB || msg.sender == trapdoorC) {
-            _
-        } else {
-            throw;
-        }
-    }
-
     /*
      *  -----------
      *  | Actions |
@@ -291,11 +505,9 @@ contract MultiSignature {
             EtherDeposit(msg.sender, msg.value);
             return true;
         } else {
-            if (msg.sender.call.value(msg.value)()) {
-                return false;
-            } else {
-                throw;
-            }
+            // Underpayments are credited back to partyA.
+            creditA += uint128(msg.value);
+            return false;
         }
     }
 
@@ -303,19 +515,21 @@ contract MultiSignature {
      *  Function for partyB to deposit tokens.  This handles both a direct
      *  transfer out of band, or using the `transferFrom` and `approve` API.
      */
-    function depositToken() public 
+    function depositToken() public
                             noEther
                             beforeUnlock
                             onlyPartyB
                             inState2(State.Genesis, State.WaitingForTokens)
                             returns (bool) {
-        uint currentTokenBalance = token.balanceOf(this);
+        // Count any tokens transferred directly before pulling the rest.
+        uint currentTokenBalance = reconcileTokenBalance();
         if (currentTokenBalance >= tokenDepositMinimum) {
             return true;
         }
         uint neededTokens = tokenDepositMinimum - currentTokenBalance;
         if (token.allowance(msg.sender, this) >= neededTokens) {
             if (token.transferFrom(msg.sender, this, neededTokens)) {
+                tokenBalance += uint128(neededTokens);
                 TokenDeposit(msg.sender, neededTokens);
                 return true;
             }
@@ -323,6 +537,73 @@ contract MultiSignature {
         return false;
     }
 
+    /*
+     *  Set the tracked `tokenBalance` to the contract's actual balance, which
+     *  counts tokens transferred to the contract directly.  Anyone may call
+     *  this at any time since it only records what the token contract
+     *  reports.  Returns the new balance.
+     */
+    function syncTokenBalance() public
+                                noEther
+                                returns (uint) {
+        return reconcileTokenBalance();
+    }
+
+    /*
+     *  Anyone can transfer tokens to the contract, so a balance too large for
+     *  `tokenBalance` is clamped rather than rejected.  The excess stays in
+     *  the contract and is picked up by a later reconcile once the tracked
+     *  balance has been sent.
+     */
+    function reconcileTokenBalance() internal returns (uint) {
+        uint actualBalance = token.balanceOf(this);
+        if (actualBalance >= 2 ** 128) {
+            actualBalance = 2 ** 128 - 1;
+        }
+        tokenBalance = uint128(actualBalance);
+        return actualBalance;
+    }
+
+    /*
+     *  Send the tracked token balance to `recipient`.  A failed transfer,
+     *  including one where the token contract throws, leaves the balance in
+     *  place so that it can be sent later with `withdrawTokens`.
+     */
+    function transferTrackedTokens(address recipient) internal returns (bool) {
+        uint amount = tokenBalance;
+        if (amount == 0) {
+            return false;
+        }
+
+        tokenBalance = 0;
+        if (tryTokenTransfer(recipient, amount)) {
+            TokenWithdrawal(recipient, amount);
+            return true;
+        }
+        tokenBalance = uint128(amount);
+        return false;
+    }
+
+    /*
+     *  Call `transfer` on `token` without throwing if the token contract
+     *  throws, which a plain call to it would.  Returns whether the call
+     *  succeeded and returned `true`.
+     */
+    function tryTokenTransfer(address recipient, uint amount) internal returns (bool result) {
+        address tokenAddress = address(token);
+        bytes4 signature = bytes4(sha3("transfer(address,uint256)"));
+        assembly {
+            let input := mload(0x40)
+            mstore(input, signature)
+            mstore(add(input, 4), recipient)
+            mstore(add(input, 36), amount)
+            let output := add(input, 68)
+            mstore(output, 0)
+            let success := call(sub(gas, 10000), tokenAddress, 0, input, 68, output, 32)
+            result := and(success, iszero(iszero(mload(output))))
+        }
+    }
+
     /*
      *  Function for the arbiter to enable the lock.
      */
@@ -332,7 +613,7 @@ contract MultiSignature {
                     onlyArbiter
                     inState(State.WaitingForArbiterLock)
                     returns (bool) {
-        lockedAt = now;
+        lockedAt = uint48(now);
     }
 
     /*
@@ -347,13 +628,12 @@ contract MultiSignature {
                                State.NeverLocked
                            )
                            returns (bool) {
-        var etherBalance = this.balance;
-        if (this.balance > 0 && partyA.call.value(this.balance)()) {
-            EtherWithdrawal(partyA, etherBalance);
-            return true;
-        } else {
+        var etherBalance = escrowedEther();
+        if (etherBalance == 0) {
             return false;
         }
+        creditA += uint128(etherBalance);
+        return true;
     }
 
     /*
@@ -368,12 +648,7 @@ contract MultiSignature {
                                 State.NeverLocked
                             )
                             returns (bool) {
-        var tokenBalance = token.balanceOf(this);
-        if (tokenBalance > 0 && token.transfer(partyB, tokenBalance)) {
-            TokenWithdrawal(partyB, tokenBalance);
-            return true;
-        }
-        return false;
+        return transferTrackedTokens(partyB);
     }
 
     /*
@@ -384,62 +659,136 @@ contract MultiSignature {
                              noEther
                              inState2(State.Locked, State.Unlocked)
                              returns (bool) {
-        var etherBalance = this.balance;
-        if (etherBalance > 0 && partyB.call.value(this.balance)()) {
-            EtherWithdrawal(partyB, etherBalance);
-            return true;
+        var etherBalance = escrowedEther();
+        if (etherBalance == 0) {
+            return false;
+        }
+        creditB += uint128(etherBalance);
+        return true;
+    }
+
+    /*
+     *  Function for partyA or partyB to collect the ether credited to them by
+     *  `depositEther`, `refundEther` or `withdrawEther`.  The ether is sent
+     *  with `send`, so the recipient only gets the call stipend and the gas
+     *  used is the same whatever the recipient does.  A failed send leaves
+     *  the credit in place.
+     */
+    function withdraw() public
+                        noEther
+                        returns (bool) {
+        uint amount;
+        if (msg.sender == partyA) {
+            amount = creditA;
+            creditA = 0;
+        } else if (msg.sender == partyB) {
+            amount = creditB;
+            creditB = 0;
         } else {
             return false;
         }
+
+        if (amount == 0) {
+            return false;
+        }
+
+        if (msg.sender.send(amount)) {
+            EtherWithdrawal(msg.sender, amount);
+            return true;
+        }
+
+        if (msg.sender == partyA) {
+            creditA = uint128(amount);
+        } else {
+            creditB = uint128(amount);
+        }
+        return false;
     }
 
     /*
      *  Function for sending the tokens once the contract has been resolved
-     *  through voting.
+     *  through voting.  The balance is reconciled first, so this also sends
+     *  tokens which arrived after the settling vote.
      */
     function withdrawTokens() public
                               noEther
                               inState(State.Unlocked)
                               returns (bool) {
-        uint tokenBalance = token.balanceOf(this);
-
-        if (tokenBalance == 0) {
+        if (voteWinner() == 0x0) {
             return false;
         }
+        reconcileTokenBalance();
+        return transferTokensToWinner();
+    }
 
-        uint numAVotes;
-        uint numBVotes;
-
-        if (partyAVote == partyA) {
-            numAVotes += 1;
-        } else if (partyAVote == partyB) {
-            numBVotes += 1;
+    /*
+     *  The party which has received 2 votes, or 0x0 if neither has yet.
+     */
+    function voteWinner() internal constant returns (address) {
+        if (numPartyAVotes >= 2) {
+            return partyA;
+        } else if (numPartyBVotes >= 2) {
+            return partyB;
         }
+        return 0x0;
+    }
 
-        if (partyBVote == partyA) {
-            numAVotes += 1;
-        } else if (partyBVote == partyB) {
-            numBVotes += 1;
+    /*
+     *  Send the tracked token balance to the winner of the vote.  Called
+     *  automatically by the vote which settles the contract, after which
+     *  `withdrawTokens` only matters for tokens which arrive later or a
+     *  transfer which failed.
+     */
+    function transferTokensToWinner() internal returns (bool) {
+        var winner = voteWinner();
+        if (winner == 0x0) {
+            return false;
         }
 
-        if (arbiterVote == partyA) {
-            numAVotes += 1;
-        } else if (arbiterVote == partyB) {
-            numBVotes += 1;
+        return transferTrackedTokens(winner);
+    }
+
+    /*
+     *  Record the vote of `voter`, who must be one of partyA, partyB or the
+     *  arbiter, for `_who`.  Each of them may only vote once.  The vote which
+     *  gives a party its second vote also transfers the tokens to it.  The
+     *  vote is recorded even if that transfer fails.
+     */
+    function recordVote(address voter, address _who) internal returns (bool) {
+        var vote = voteFor(_who);
+        if (vote == Vote.NoVote) {
+            return false;
+        } else if (voter == partyA) {
+            if (partyAChoice != Vote.NoVote) {
+                return false;
+            }
+            partyAChoice = vote;
+        } else if (voter == partyB) {
+            if (partyBChoice != Vote.NoVote) {
+                return false;
+            }
+            partyBChoice = vote;
+        } else if (voter == arbiter) {
+            if (arbiterChoice != Vote.NoVote) {
+                return false;
+            }
+            arbiterChoice = vote;
+        } else {
+            return false;
         }
 
-        if (numAVotes >= 2) {
-            if (token.transfer(partyA, token.balanceOf(this))) {
-                TokenWithdrawal(partyA, tokenBalance);
-                return true;
+        if (vote == Vote.PartyA) {
+            numPartyAVotes += 1;
+            if (numPartyAVotes == 2) {
+                transferTokensToWinner();
             }
-        } else if (numBVotes >= 2) {
-            if (token.transfer(partyB, token.balanceOf(this))) {
-                TokenWithdrawal(partyB, tokenBalance);
-                return true;
+        } else {
+            numPartyBVotes += 1;
+            if (numPartyBVotes == 2) {
+                transferTokensToWinner();
             }
         }
-        return false;
+        return true;
     }
 
     /*
@@ -450,14 +799,7 @@ contract MultiSignature {
                                             inState(State.Unlocked)
                                             onlyPartyA
                                             returns (bool) {
-        if (_who != partyA && _who != partyB) {
-            return false;
-        } else if (partyAVote != 0x0) {
-            return false;
-        } else {
-            partyAVote = _who;
-            return true;
-        }
+        return recordVote(msg.sender, _who);
     }
 
     /*
@@ -468,14 +810,7 @@ contract MultiSignature {
                                             inState(State.Unlocked)
                                             onlyPartyB
                                             returns (bool) {
-        if (_who != partyA && _who != partyB) {
-            return false;
-        } else if (partyBVote != 0x0) {
-            return false;
-        } else {
-            partyBVote = _who;
-            return true;
-        }
+        return recordVote(msg.sender, _who);
     }
 
     /*
@@ -486,56 +821,40 @@ contract MultiSignature {
                                             inState(State.Unlocked)
                                             onlyArbiter
                                             returns (bool) {
-        if (_who != partyA && _who != partyB) {
-            return false;
-        } else if (arbiterVote != 0x0) {
-            return false;
-        } else {
-            arbiterVote = _who;
-            return true;
-        }
+        return recordVote(msg.sender, _who);
     }
 
-    event TrapdoorInitiated(address _from, bytes32 _hash);
-    event TrapdoorExecuted(bytes32 _hash);
-
     /*
-     *  Safety hatch style function that allows anything in the contract to be
-     *  recovered in the event that something unforseen happens.  Requires
-     *  multisignature action from 2 of 3 of the trapdoor addresses.
+     *  The hash that partyA, partyB or the arbiter sign to vote for `_who`
+     *  through `submitSignedVotes`.  Since each of them can only vote once,
+     *  replaying a signature has no effect.
      */
-    function trapdoor(address to,
-                      uint callValue,
-                      bytes callData) public
-                                      onlyTrapdoorMultiSig
-                                      returns (bool)
-    {
-        bytes32 executionHash = sha3(to, callValue, callData);
-        trapdoorData[msg.sender] = executionHash;
-
-        TrapdoorInitiated(msg.sender, executionHash);
-
-        uint numSigs;
-
-        if (trapdoorData[trapdoorA] == executionHash) {
-            numSigs += 1;
-        }
-
-        if (trapdoorData[trapdoorB] == executionHash) {
-            numSigs += 1;
-        }
+    function voteMessageHash(address _who) constant returns (bytes32) {
+        return sha3(address(this), "submitVote", _who);
+    }
 
-        if (trapdoorData[trapdoorC] == executionHash) {
-            numSigs += 1;
+    /*
+     *  Record a vote for `_who` from each of the signers of
+     *  `voteMessageHash(_who)`, so that a single transaction from anyone
+     *  can submit the votes of several parties.  Returns the number of
+     *  votes recorded.
+     */
+    function submitSignedVotes(address _who,
+                               uint8[] v,
+                               bytes32[] r,
+                               bytes32[] s) public
+                                            noEther
+                                            inState(State.Unlocked)
+                                            returns (uint numVotes) {
+        if (r.length != v.length || s.length != v.length) {
+            throw;
         }
+        bytes32 messageHash = voteMessageHash(_who);
 
-        if (numSigs >= 2) {
-            trapdoorData[trapdoorA] = 0x0;
-            trapdoorData[trapdoorB] = 0x0;
-            trapdoorData[trapdoorC] = 0x0;
-
-            bool result = to.call.value(callValue)(callData);
-            TrapdoorExecuted(executionHash);
+        for (uint i = 0; i < v.length; i++) {
+            if (recordVote(ecrecover(messageHash, v[i], r[i], s[i]), _who)) {
+                numVotes += 1;
+            }
         }
     }
 }
@@ -0,0 +1,136 @@
+//pragma solidity ^0.4.0;
+
+
+import {MultiSignature} from "contracts/MultiSig.sol";
+
+
+/*
+ *  Minimal contract which forwards every call to a `MultiSignature`
+ *  implementation using `delegatecall`, so that it runs the implementation's
+ *  code against its own storage and balance.
+ */
+contract MultiSignatureProxy {
+    /*
+     *  The implementation address is kept at
+     *  `sha3("MultiSignatureProxy.implementation")` rather than in slot 0 so
+     *  that it cannot collide with the `MultiSignature` storage layout.
+     */
+    function MultiSignatureProxy(address implementation) {
+        assembly {
+            sstore(0x3105f5bec6509b34dbd9aabb611ae6f8c8bb8c3d7a0bbfda3533d406b9db343c, implementation)
+        }
+    }
+
+    /*
+     *  Return data cannot be sized ahead of time so every call returns a
+     *  fixed 4096 bytes.  That is more than any `MultiSignature` function
+     *  returns except `contractTerms`, which is why
+     *  `MultiSignatureFactory` limits the terms to
+     *  `MAX_CONTRACT_TERMS_LENGTH` bytes.  Anything past 4096 bytes would
+     *  be cut off.  Expanding memory to 4096 bytes costs every call through
+     *  the proxy about 420 gas.
+     */
+    function() {
+        assembly {
+            calldatacopy(0x0, 0x0, calldatasize)
+            let success := delegatecall(
+                sub(gas, 10000),
+                sload(0x3105f5bec6509b34dbd9aabb611ae6f8c8bb8c3d7a0bbfda3533d406b9db343c),
+                0x0,
+                calldatasize,
+                0x0,
+                4096
+            )
+            jumpi(0x02, iszero(success))
+            return(0x0, 4096)
+        }
+    }
+}
+
+
+contract MultiSignatureFactory {
+    // The longest `contractTerms` whose ABI encoding, a 32 byte offset and a
+    // 32 byte length followed by the padded string, fits in the 4096 bytes
+    // returned by `MultiSignatureProxy`.
+    uint constant MAX_CONTRACT_TERMS_LENGTH = 4032;
+
+    // The `MultiSignature` contract whose code every instance runs.
+    address public implementation;
+
+    event MultiSignatureCreated(address indexed instance, address indexed creator);
+
+    function MultiSignatureFactory(address _implementation) {
+        implementation = _implementation;
+    }
+
+    /*
+     *  Deploy a new `MultiSignatureProxy` in front of the implementation and
+     *  initialize it with the same arguments that the `MultiSignature`
+     *  constructor takes.  Throws if `_contractTerms` is longer than
+     *  `MAX_CONTRACT_TERMS_LENGTH` bytes, since the proxy could not return
+     *  them in full.
+     */
+    function createMultiSignature(address[3] participants,
+                                  address[3] rescuers,
+                                  uint _ethDepositMinimum,
+                                  uint _tokenDepositMinimum,
+                                  address _tokenAddress,
+                                  uint _unlockAt,
+                                  string _contractTerms) public returns (address) {
+        if (msg.value > 0) {
+            throw;
+        }
+        if (bytes(_contractTerms).length > MAX_CONTRACT_TERMS_LENGTH) {
+            throw;
+        }
+
+        address instance = address(new MultiSignatureProxy(implementation));
+
+        MultiSignature(instance).initialize(
+            participants,
+            rescuers,
+            _ethDepositMinimum,
+            _tokenDepositMinimum,
+            _tokenAddress,
+            _unlockAt,
+            _contractTerms
+        );
+
+        MultiSignatureCreated(instance, msg.sender);
+        return instance;
+    }
+
+    /*
+     *  Same as `createMultiSignature` except that only `_contractTermsHash`
+     *  is stored by the instance, with `_contractTermsOrURI` published in its
+     *  `ContractTermsPublished` event.
+     */
+    function createMultiSignatureWithTermsHash(address[3] participants,
+                                               address[3] rescuers,
+                                               uint _ethDepositMinimum,
+                                               uint _tokenDepositMinimum,
+                                               address _tokenAddress,
+                                               uint _unlockAt,
+                                               bytes32 _contractTermsHash,
+                                               string _contractTermsOrURI) public returns (address) {
+        if (msg.value > 0) {
+            throw;
+        }
+
+        address instance = address(new MultiSignatureProxy(implementation));
+
+        MultiSignature(instance).initializeWithTermsHash(
+            participants,
+            rescuers,
+            _ethDepositMinimum,
+            _tokenDepositMinimum,
+            _tokenAddress,
+            _unlockAt,
+            _contractTermsHash,
+            _contractTermsOrURI
+        );
+
+        MultiSignatureCreated(instance, msg.sender);
+        return instance;
+    }
+}
@@ -0,0 +1,44 @@
+//pragma solidity ^0.4.0;
+
+
+import {MultiSignature} from "contracts/MultiSig.sol";
+
+
+/*
+ *  Reads the `getSnapshot()` of many `MultiSignature` contracts in a single
+ *  call.
+ */
+contract MultiSignatureReader {
+    /*
+     *  The number of values returned for each contract by `getSnapshots`.
+     */
+    uint constant public SNAPSHOT_STRIDE = 13;
+
+    /*
+     *  The snapshots of `multisigs`, flattened into one array with
+     *  `SNAPSHOT_STRIDE` values per contract, in the same order as the
+     *  values returned by `MultiSignature.getSnapshot()`:
+     *
+     *  partyA, partyB, arbiter, token, partyAVote, partyBVote, arbiterVote,
+     *  lockedAt, unlockAt, currentState, escrowed ether balance, token balance,
+     *  now
+     */
+    function getSnapshots(address[] multisigs) constant returns (uint[] snapshots) {
+        snapshots = new uint[](multisigs.length * SNAPSHOT_STRIDE);
+
+        for (uint i = 0; i < multisigs.length; i++) {
+            var (addresses, votes, values) = MultiSignature(multisigs[i]).getSnapshot();
+            uint offset = i * SNAPSHOT_STRIDE;
+
+            for (uint j = 0; j < 4; j++) {
+                snapshots[offset + j] = uint(addresses[j]);
+            }
+            for (j = 0; j < 3; j++) {
+                snapshots[offset + 4 + j] = uint(votes[j]);
+            }
+            for (j = 0; j < 6; j++) {
+                snapshots[offset + 7 + j] = values[j];
+            }
+        }
+    }
+}
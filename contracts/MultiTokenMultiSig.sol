@@ -0,0 +1,753 @@
+//pragma solidity ^0.4.0;
+
+
+import {TokenInterface} from "contracts/TokenInterface.sol";
+import {Trapdoor} from "contracts/Trapdoor.sol";
+
+
+/*
+ *  Variant of `MultiSignature` which escrows the ether deposit of partyA
+ *  against deposits of several tokens from partyB, each with its own
+ *  minimum.  The contract only waits for the arbiter's lock once every
+ *  token minimum has been met, and once resolved every token is sent to the
+ *  winner of the vote in the same transaction.
+ *
+ *  Ether leaves the contract the same way as for `MultiSignature`: it is
+ *  credited to `creditA` or `creditB` and collected with `withdraw`.
+ *
+ *  The balance of each token is tracked in `tokenBalances`, and each token
+ *  is sent on its own, so a token whose `transfer` fails or throws only
+ *  holds up itself.  It stays tracked and can be sent later with
+ *  `refundToken` or `withdrawToken`.
+ */
+contract MultiTokenMultiSignature is Trapdoor {
+    enum State {
+        Genesis,
+        WaitingForEther,
+        WaitingForTokens,
+        WaitingForArbiterLock,
+        Locked,
+        Unlocked,
+        NeverLocked
+    }
+
+    enum Vote {
+        NoVote,
+        PartyA,
+        PartyB
+    }
+
+    // The party who is depositing ether, the three votes as to who should
+    // receive the tokens and the running tally of those votes.
+    address public partyA;
+    Vote partyAChoice;
+    Vote partyBChoice;
+    Vote arbiterChoice;
+    uint8 public numPartyAVotes;
+    uint8 public numPartyBVotes;
+
+    // The party who is depositing tokens
+    address public partyB;
+    // The 3rd party who will arbitrate the terms of the contract, and the
+    // UTC times that it was locked and will become *unlocked*.
+    address public arbiter;
+    uint48 public lockedAt;
+    uint48 public unlockAt;
+
+    // The minimum ether deposit amount (in wei), and ether owed to partyA.
+    uint128 public ethDepositMinimum;
+    uint128 public creditA;
+    // Ether owed to partyB.
+    uint128 public creditB;
+
+    // The tokens deposited by partyB and the minimum deposit of each.
+    address[] public tokens;
+    uint[] public tokenDepositMinimums;
+    // The escrowed balance of each token, updated by deposits and transfers
+    // so that state checks do not need to call the token contracts.  Tokens
+    // transferred to the contract directly are added by `syncTokenBalance`.
+    uint[] public tokenBalances;
+
+    function MultiTokenMultiSignature(address[3] participants,
+                                      address[3] rescuers,
+                                      uint _ethDepositMinimum,
+                                      address[] _tokens,
+                                      uint[] _tokenDepositMinimums,
+                                      uint _unlockAt) {
+        if (_tokens.length == 0 || _tokens.length != _tokenDepositMinimums.length) {
+            throw;
+        }
+        // Each token's balance is tracked at a single index, so a token
+        // listed twice would have its balance counted towards both.
+        for (uint i = 0; i < _tokens.length; i++) {
+            for (uint j = 0; j < i; j++) {
+                if (_tokens[i] == _tokens[j]) {
+                    throw;
+                }
+            }
+        }
+        if (_ethDepositMinimum >= 2 ** 128) {
+            throw;
+        }
+        if (_unlockAt >= 2 ** 48) {
+            throw;
+        }
+
+        partyA = participants[0];
+        partyB = participants[1];
+        arbiter = participants[2];
+
+        setTrapdoorSigners(rescuers);
+
+        ethDepositMinimum = uint128(_ethDepositMinimum);
+        tokens = _tokens;
+        tokenDepositMinimums = _tokenDepositMinimums;
+        tokenBalances.length = _tokens.length;
+
+        unlockAt = uint48(_unlockAt);
+    }
+
+    /*
+     *  The number of tokens held in escrow.
+     */
+    function numTokens() constant returns (uint) {
+        return tokens.length;
+    }
+
+    /*
+     *  The opinion of partyA as to who should receive the tokens.
+     */
+    function partyAVote() constant returns (address) {
+        return voteRecipient(partyAChoice);
+    }
+
+    /*
+     *  The opinion of partyB as to who should receive the tokens.
+     */
+    function partyBVote() constant returns (address) {
+        return voteRecipient(partyBChoice);
+    }
+
+    /*
+     *  The opinion of the arbiter as to who should receive the tokens.
+     */
+    function arbiterVote() constant returns (address) {
+        return voteRecipient(arbiterChoice);
+    }
+
+    function voteRecipient(Vote vote) internal constant returns (address) {
+        if (vote == Vote.PartyA) {
+            return partyA;
+        } else if (vote == Vote.PartyB) {
+            return partyB;
+        } else {
+            return 0x0;
+        }
+    }
+
+    /*
+     *  ----------
+     *  | Events |
+     *  ----------
+     */
+    event EtherDeposit(address indexed who, uint amount);
+    event EtherWithdrawal(address indexed who, uint amount);
+
+    event TokenDeposit(address indexed token, address indexed who, uint amount);
+    event TokenWithdrawal(address indexed token, address indexed who, uint amount);
+
+    /*
+     *  -----------------------------
+     *  | Contract State Management |
+     *  -----------------------------
+     */
+
+    /*
+     *  The current "state" that the contract is in.
+     */
+    function currentState() constant returns (State) {
+        if (lockedAt != 0) {
+            if (now < unlockAt) {
+                return State.Locked;
+            } else {
+                return State.Unlocked;
+            }
+        } else if (now >= unlockAt) {
+            return State.NeverLocked;
+        }
+
+        bool etherMet = ethDepositMet();
+        bool tokensMet = tokenDepositsMet();
+
+        if (etherMet && tokensMet) {
+            return State.WaitingForArbiterLock;
+        } else if (etherMet) {
+            return State.WaitingForTokens;
+        } else if (tokensMet) {
+            return State.WaitingForEther;
+        } else {
+            return State.Genesis;
+        }
+    }
+
+    /*
+     *  Has the minimum ether deposit been met.  Ether sent with the current
+     *  call does not count towards it.
+     */
+    function ethDepositMet() constant returns (bool) {
+        var etherBalance = escrowedEther();
+        if (msg.value > etherBalance) {
+            return false;
+        }
+        return (etherBalance - msg.value >= ethDepositMinimum);
+    }
+
+    /*
+     *  Has the minimum deposit of every token been met.
+     */
+    function tokenDepositsMet() constant returns (bool) {
+        for (uint i = 0; i < tokens.length; i++) {
+            if (tokenBalances[i] < tokenDepositMinimums[i]) {
+                return false;
+            }
+        }
+        return true;
+    }
+
+    /*
+     *  The contract's ether balance less the credits waiting to be collected
+     *  through `withdraw`.
+     */
+    function escrowedEther() internal constant returns (uint) {
+        uint credits = uint(creditA) + uint(creditB);
+        if (credits >= this.balance) {
+            return 0;
+        }
+        return this.balance - credits;
+    }
+
+    /*
+     *  Everything needed to evaluate the contract across all of its tokens,
+     *  read in a single call.
+     *
+     *  parties: partyA, partyB, arbiter
+     *  votes: partyAVote, partyBVote, arbiterVote
+     *  values: lockedAt, unlockAt, currentState, ethDepositMinimum, escrowed
+     *          ether balance, now
+     *  _tokens, minimums, balances: each token with its minimum deposit and
+     *          its tracked balance
+     */
+    function getSnapshot() constant returns (address[3] parties,
+                                             address[3] votes,
+                                             uint[6] values,
+                                             address[] _tokens,
+                                             uint[] minimums,
+                                             uint[] balances) {
+        parties[0] = partyA;
+        parties[1] = partyB;
+        parties[2] = arbiter;
+
+        votes[0] = voteRecipient(partyAChoice);
+        votes[1] = voteRecipient(partyBChoice);
+        votes[2] = voteRecipient(arbiterChoice);
+
+        values[0] = lockedAt;
+        values[1] = unlockAt;
+        values[2] = uint(currentState());
+        values[3] = ethDepositMinimum;
+        values[4] = escrowedEther();
+        values[5] = now;
+
+        _tokens = tokens;
+        minimums = tokenDepositMinimums;
+        balances = tokenBalances;
+    }
+
+    /*
+     *  -------------
+     *  | Modifiers |
+     *  -------------
+     */
+
+    /*
+     *  Only allow execution if the contract is in the specified state.
+     */
+    modifier inState(State state) {
+        if (currentState() == state) {
+            _
+            // _;  // if solc 0.4.x
+        } else {
+            throw;
+        }
+    }
+
+    /*
+     *  Only allow execution if the contract is in one of the two provided
+     *  states.
+     */
+    modifier inState2(State stateA, State stateB) {
+        var _currentState = currentState();
+        if (_currentState == stateA || _currentState == stateB) {
+            _
+            // _;  // if solc 0.4.x
+        } else {
+            throw;
+        }
+    }
+
+    /*
+     *  Only allow execution if the contract is in one of the three provided
+     *  states.
+     */
+    modifier inState3(State stateA, State stateB, State stateC) {
+        var _currentState = currentState();
+        if (_currentState == stateA || _currentState == stateB || _currentState == stateC) {
+            _
+            // _;  // if solc 0.4.x
+        } else {
+            throw;
+        }
+    }
+
+    /*
+     *  Only allow the designated arbiter to execute this function.
+     */
+    modifier onlyArbiter {
+        if (msg.sender == arbiter) {
+            _
+            // _;  // if solc 0.4.x
+        } else {
+            throw;
+        }
+    }
+
+    /*
+     *  Only allow partyA to execute this function.
+     */
+    modifier onlyPartyA {
+        if (msg.sender == partyA) {
+            _
+            // _;  // if solc 0.4.x
+        } else {
+            throw;
+        }
+    }
+
+    /*
+     *  Only allow partyB to execute this function.
+     */
+    modifier onlyPartyB {
+        if (msg.sender == partyB) {
+            _
+            // _;  // if solc 0.4.x
+        } else {
+            throw;
+        }
+    }
+
+    /*
+     *  Only allow execution prior to the `unlockAt` time.
+     */
+    modifier beforeUnlock {
+        if (now < unlockAt) {
+            _
+            // _;  // if solc 0.4.x
+        } else {
+            throw;
+        }
+    }
+
+    /*
+     *  Do not allow sending of ether to this function.
+     */
+    modifier noEther {
+        if (msg.value == 0) {
+            _
+            // _;  // if solc 0.4.x
+        } else {
+            throw;
+        }
+    }
+
+    /*
+     *  -----------
+     *  | Actions |
+     *  -----------
+     */
+
+    /*
+     *  Function for partyA to deposit ether.  Deposits below the minimum are
+     *  credited back to partyA.
+     */
+    function depositEther() public
+                            beforeUnlock
+                            onlyPartyA
+                            inState2(State.Genesis, State.WaitingForEther)
+                            returns (bool) {
+        if (msg.value >= ethDepositMinimum) {
+            EtherDeposit(msg.sender, msg.value);
+            return true;
+        } else {
+            creditA += uint128(msg.value);
+            return false;
+        }
+    }
+
+    /*
+     *  Function for partyB to deposit every token using the `transferFrom`
+     *  and `approve` API.  Only the amount still needed to meet each
+     *  minimum is transferred, so direct transfers count towards it.
+     *  Returns whether every minimum is met.
+     */
+    function depositTokens() public
+                             noEther
+                             beforeUnlock
+                             onlyPartyB
+                             inState2(State.Genesis, State.WaitingForTokens)
+                             returns (bool) {
+        bool allMet = true;
+
+        for (uint i = 0; i < tokens.length; i++) {
+            // Count any tokens transferred directly before pulling the rest.
+            uint tokenBalance = reconcileTokenBalance(i);
+            if (tokenBalance >= tokenDepositMinimums[i]) {
+                continue;
+            }
+
+            var token = TokenInterface(tokens[i]);
+            uint neededTokens = tokenDepositMinimums[i] - tokenBalance;
+            if (token.allowance(msg.sender, this) >= neededTokens &&
+                token.transferFrom(msg.sender, this, neededTokens)) {
+                tokenBalances[i] += neededTokens;
+                TokenDeposit(token, msg.sender, neededTokens);
+            } else {
+                allMet = false;
+            }
+        }
+        return allMet;
+    }
+
+    /*
+     *  Set the tracked balance of the token at `index` to the contract's
+     *  actual balance, which counts tokens transferred to the contract
+     *  directly.  Anyone may call this at any time since it only records
+     *  what the token contract reports.  Returns the new balance.
+     */
+    function syncTokenBalance(uint index) public
+                                          noEther
+                                          returns (uint) {
+        return reconcileTokenBalance(index);
+    }
+
+    function reconcileTokenBalance(uint index) internal returns (uint) {
+        uint actualBalance = TokenInterface(tokens[index]).balanceOf(this);
+        tokenBalances[index] = actualBalance;
+        return actualBalance;
+    }
+
+    /*
+     *  Function for the arbiter to enable the lock.
+     */
+    function lock() public
+                    noEther
+                    beforeUnlock
+                    onlyArbiter
+                    inState(State.WaitingForArbiterLock)
+                    returns (bool) {
+        lockedAt = uint48(now);
+        return true;
+    }
+
+    /*
+     *  Function for partyA to recover their ether.
+     */
+    function refundEther() public
+                           noEther
+                           onlyPartyA
+                           inState3(
+                               State.WaitingForTokens,
+                               State.WaitingForArbiterLock,
+                               State.NeverLocked
+                           )
+                           returns (bool) {
+        var etherBalance = escrowedEther();
+        if (etherBalance == 0) {
+            return false;
+        }
+        creditA += uint128(etherBalance);
+        return true;
+    }
+
+    /*
+     *  Function for partyB to recover every token.  A token which fails to
+     *  transfer stays tracked and can be retried with `refundToken`.
+     */
+    function refundTokens() public
+                            noEther
+                            onlyPartyB
+                            inState3(
+                                State.WaitingForEther,
+                                State.WaitingForArbiterLock,
+                                State.NeverLocked
+                            )
+                            returns (bool) {
+        return transferTokens(partyB);
+    }
+
+    /*
+     *  Function for partyB to recover the token at `index` on its own.
+     */
+    function refundToken(uint index) public
+                                     noEther
+                                     onlyPartyB
+                                     inState3(
+                                         State.WaitingForEther,
+                                         State.WaitingForArbiterLock,
+                                         State.NeverLocked
+                                     )
+                                     returns (bool) {
+        return transferTrackedToken(index, partyB);
+    }
+
+    /*
+     *  Function for crediting the ether deposit to partyB once the contract
+     *  has been locked.
+     */
+    function withdrawEther() public
+                             noEther
+                             inState2(State.Locked, State.Unlocked)
+                             returns (bool) {
+        return creditEtherToPartyB();
+    }
+
+    /*
+     *  Settle every asset of a resolved contract in one transaction: the
+     *  ether deposit is credited to partyB and every token is sent to the
+     *  winner of the vote.
+     */
+    function settle() public
+                      noEther
+                      inState(State.Unlocked)
+                      returns (bool) {
+        bool etherSettled = creditEtherToPartyB();
+        bool tokensSettled = transferTokensToWinner();
+        return (etherSettled || tokensSettled);
+    }
+
+    /*
+     *  Function for partyA or partyB to collect the ether credited to them.
+     *  The ether is sent with `send`, and a failed send leaves the credit in
+     *  place.
+     */
+    function withdraw() public
+                        noEther
+                        returns (bool) {
+        uint amount;
+        if (msg.sender == partyA) {
+            amount = creditA;
+            creditA = 0;
+        } else if (msg.sender == partyB) {
+            amount = creditB;
+            creditB = 0;
+        } else {
+            return false;
+        }
+
+        if (amount == 0) {
+            return false;
+        }
+
+        if (msg.sender.send(amount)) {
+            EtherWithdrawal(msg.sender, amount);
+            return true;
+        }
+
+        if (msg.sender == partyA) {
+            creditA = uint128(amount);
+        } else {
+            creditB = uint128(amount);
+        }
+        return false;
+    }
+
+    function creditEtherToPartyB() internal returns (bool) {
+        var etherBalance = escrowedEther();
+        if (etherBalance == 0) {
+            return false;
+        }
+        creditB += uint128(etherBalance);
+        return true;
+    }
+
+    /*
+     *  Send the tracked balance of every token to `recipient`.  Returns
+     *  whether anything was sent.
+     */
+    function transferTokens(address recipient) internal returns (bool) {
+        bool transferred;
+
+        for (uint i = 0; i < tokens.length; i++) {
+            if (transferTrackedToken(i, recipient)) {
+                transferred = true;
+            }
+        }
+        return transferred;
+    }
+
+    /*
+     *  Send the tracked balance of the token at `index` to `recipient`.  A
+     *  failed transfer leaves the balance in place.
+     */
+    function transferTrackedToken(uint index, address recipient) internal returns (bool) {
+        uint amount = tokenBalances[index];
+        if (amount == 0) {
+            return false;
+        }
+
+        tokenBalances[index] = 0;
+        if (tryTokenTransfer(tokens[index], recipient, amount)) {
+            TokenWithdrawal(tokens[index], recipient, amount);
+            return true;
+        }
+        tokenBalances[index] = amount;
+        return false;
+    }
+
+    /*
+     *  Call `transfer` on `token` without throwing if the token contract
+     *  throws, which a plain call to it would.  Returns whether the call
+     *  succeeded and returned `true`.
+     */
+    function tryTokenTransfer(address token,
+                              address recipient,
+                              uint amount) internal returns (bool result) {
+        bytes4 signature = bytes4(sha3("transfer(address,uint256)"));
+        assembly {
+            let input := mload(0x40)
+            mstore(input, signature)
+            mstore(add(input, 4), recipient)
+            mstore(add(input, 36), amount)
+            let output := add(input, 68)
+            mstore(output, 0)
+            let success := call(sub(gas, 10000), token, 0, input, 68, output, 32)
+            result := and(success, iszero(iszero(mload(output))))
+        }
+    }
+
+    /*
+     *  The party which has received 2 votes, or 0x0 if neither has yet.
+     */
+    function voteWinner() internal constant returns (address) {
+        if (numPartyAVotes >= 2) {
+            return partyA;
+        } else if (numPartyBVotes >= 2) {
+            return partyB;
+        }
+        return 0x0;
+    }
+
+    function transferTokensToWinner() internal returns (bool) {
+        var winner = voteWinner();
+        if (winner == 0x0) {
+            return false;
+        }
+        return transferTokens(winner);
+    }
+
+    /*
+     *  Send the token at `index` to the winner of the vote on its own,
+     *  including any of it transferred to the contract after the vote.
+     */
+    function withdrawToken(uint index) public
+                                       noEther
+                                       inState(State.Unlocked)
+                                       returns (bool) {
+        var winner = voteWinner();
+        if (winner == 0x0) {
+            return false;
+        }
+        reconcileTokenBalance(index);
+        return transferTrackedToken(index, winner);
+    }
+
+    /*
+     *  Record the vote of the sender, who must be one of partyA, partyB or
+     *  the arbiter, for `_who`.  The vote which gives a party its second
+     *  vote also sends every token to it.
+     */
+    function recordVote(address _who) internal returns (bool) {
+        Vote vote;
+        if (_who == partyA) {
+            vote = Vote.PartyA;
+        } else if (_who == partyB) {
+            vote = Vote.PartyB;
+        } else {
+            return false;
+        }
+
+        if (msg.sender == partyA) {
+            if (partyAChoice != Vote.NoVote) {
+                return false;
+            }
+            partyAChoice = vote;
+        } else if (msg.sender == partyB) {
+            if (partyBChoice != Vote.NoVote) {
+                return false;
+            }
+            partyBChoice = vote;
+        } else if (msg.sender == arbiter) {
+            if (arbiterChoice != Vote.NoVote) {
+                return false;
+            }
+            arbiterChoice = vote;
+        } else {
+            return false;
+        }
+
+        if (vote == Vote.PartyA) {
+            numPartyAVotes += 1;
+            if (numPartyAVotes == 2) {
+                transferTokensToWinner();
+            }
+        } else {
+            numPartyBVotes += 1;
+            if (numPartyBVotes == 2) {
+                transferTokensToWinner();
+            }
+        }
+        return true;
+    }
+
+    /*
+     *  Function for partyA to vote on the recipient of the tokens.
+     */
+    function submitPartyAVote(address _who) public
+                                            noEther
+                                            onlyPartyA
+                                            inState(State.Unlocked)
+                                            returns (bool) {
+        return recordVote(_who);
+    }
+
+    /*
+     *  Function for partyB to vote on the recipient of the tokens.
+     */
+    function submitPartyBVote(address _who) public
+                                            noEther
+                                            onlyPartyB
+                                            inState(State.Unlocked)
+                                            returns (bool) {
+        return recordVote(_who);
+    }
+
+    /*
+     *  Function for the arbiter to vote on the recipient of the tokens.
+     */
+    function submitArbiterVote(address _who) public
+                                             noEther
+                                             onlyArbiter
+                                             inState(State.Unlocked)
+                                             returns (bool) {
+        return recordVote(_who);
+    }
+}
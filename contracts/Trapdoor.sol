@@ -0,0 +1,310 @@
+//pragma solidity ^0.4.0;
+
+
+/*
+ *  The 2 of 3 trapdoor shared by `MultiSignature`,
+ *  `MultiTokenMultiSignature` and `BatchedMultiSignature`.  Any call can be
+ *  sent from the contract once two of the three trapdoor addresses approve
+ *  it, either with a transaction each or with signatures submitted by
+ *  anyone.
+ *
+ *  Being a base contract its storage comes first in every contract that
+ *  uses it:
+ *
+ *  slot 0: trapdoorA, trapdoorNonce
+ *  slot 1: trapdoorB
+ *  slot 2: trapdoorC
+ *  slot 3-5: the call approved by each of trapdoorA, trapdoorB, trapdoorC
+ */
+contract Trapdoor {
+    // Three address multisig that can execute the trapdoor function.
+    address public trapdoorA;
+    // The number of calls sent through `trapdoorWithSignatures`.
+    uint32 public trapdoorNonce;
+    address public trapdoorB;
+    address public trapdoorC;
+
+    // The `sha3` of the call each trapdoor address currently approves, in
+    // the order trapdoorA, trapdoorB, trapdoorC.
+    bytes32[3] trapdoorApprovedHashes;
+
+    event TrapdoorInitiated(address _from, bytes32 _hash);
+    event TrapdoorExecuted(bytes32 _hash);
+    event TrapdoorCallFailed(bytes32 _hash);
+
+    function setTrapdoorSigners(address[3] rescuers) internal {
+        trapdoorA = rescuers[0];
+        trapdoorB = rescuers[1];
+        trapdoorC = rescuers[2];
+    }
+
+    /*
+     *  Only allow one of the trapdoor multisig accounts to execute this
+     *  function.
+     */
+    modifier onlyTrapdoorMultiSig {
+        if (msg.sender == trapdoorA || msg.sender == trapdoorB || msg.sender == trapdoorC) {
+            _
+            // _;  // if solc 0.4.x
+        } else {
+            throw;
+        }
+    }
+
+    /*
+     *  The position of `signer` in `trapdoorApprovedHashes`, or 3 for any
+     *  other address.
+     */
+    function trapdoorSignerIndex(address signer) internal constant returns (uint) {
+        if (signer == trapdoorA) {
+            return 0;
+        } else if (signer == trapdoorB) {
+            return 1;
+        } else if (signer == trapdoorC) {
+            return 2;
+        } else {
+            return 3;
+        }
+    }
+
+    /*
+     *  The bit representing `signer` when counting distinct signers: 1 for
+     *  trapdoorA, 2 for trapdoorB and 4 for trapdoorC.
+     */
+    function trapdoorSignerBit(address signer) internal constant returns (uint8) {
+        if (signer == trapdoorA) {
+            return 1;
+        } else if (signer == trapdoorB) {
+            return 2;
+        } else if (signer == trapdoorC) {
+            return 4;
+        } else {
+            return 0;
+        }
+    }
+
+    /*
+     *  The hash of the trapdoor call that `signer` currently approves, if
+     *  any.
+     */
+    function trapdoorData(address signer) constant returns (bytes32) {
+        var signerIndex = trapdoorSignerIndex(signer);
+        if (signerIndex == 3) {
+            return 0x0;
+        }
+        return trapdoorApprovedHashes[signerIndex];
+    }
+
+    /*
+     *  Record the sender's approval of the trapdoor call `executionHash`,
+     *  returning `true` once another signer approves the same call.
+     *
+     *  Each signer approves one call at a time and may replace it whenever
+     *  they like, so no signer can hold up the other two.  Only the other
+     *  two signers' approvals are read, and once a call executes only the
+     *  approvals which are set are cleared.
+     */
+    function approveTrapdoorCall(bytes32 executionHash) internal returns (bool) {
+        TrapdoorInitiated(msg.sender, executionHash);
+
+        uint signerIndex = trapdoorSignerIndex(msg.sender);
+        uint nextIndex = (signerIndex + 1) % 3;
+        uint previousIndex = (signerIndex + 2) % 3;
+        bytes32 nextHash = trapdoorApprovedHashes[nextIndex];
+        bytes32 previousHash = trapdoorApprovedHashes[previousIndex];
+
+        if (nextHash != executionHash && previousHash != executionHash) {
+            trapdoorApprovedHashes[signerIndex] = executionHash;
+            return false;
+        }
+
+        // Every approval is reset once a call executes, the same as when
+        // each signer had their own mapping entry.
+        if (trapdoorApprovedHashes[signerIndex] != 0x0) {
+            trapdoorApprovedHashes[signerIndex] = 0x0;
+        }
+        if (nextHash != 0x0) {
+            trapdoorApprovedHashes[nextIndex] = 0x0;
+        }
+        if (previousHash != 0x0) {
+            trapdoorApprovedHashes[previousIndex] = 0x0;
+        }
+        return true;
+    }
+
+    /*
+     *  Clear every approval which is set, so that no approval left over from
+     *  before an execution can count towards the next one.
+     */
+    function clearTrapdoorApprovals() internal {
+        for (uint i = 0; i < 3; i++) {
+            if (trapdoorApprovedHashes[i] != 0x0) {
+                trapdoorApprovedHashes[i] = 0x0;
+            }
+        }
+    }
+
+    /*
+     *  Send an approved trapdoor call.  A call which fails is reported with
+     *  `TrapdoorCallFailed` rather than throwing, so that the approvals are
+     *  still used up.
+     */
+    function sendTrapdoorCall(address to,
+                              uint callValue,
+                              bytes callData,
+                              bytes32 executionHash) internal returns (bool) {
+        bool result = to.call.value(callValue)(callData);
+        if (!result) {
+            TrapdoorCallFailed(executionHash);
+        }
+        TrapdoorExecuted(executionHash);
+        return result;
+    }
+
+    /*
+     *  Safety hatch style function that allows anything in the contract to be
+     *  recovered in the event that something unforseen happens.  Requires
+     *  multisignature action from 2 of 3 of the trapdoor addresses.
+     */
+    function trapdoor(address to,
+                      uint callValue,
+                      bytes callData) public
+                                      onlyTrapdoorMultiSig
+                                      returns (bool)
+    {
+        bytes32 executionHash = sha3(to, callValue, callData);
+        if (!approveTrapdoorCall(executionHash)) {
+            return false;
+        }
+
+        sendTrapdoorCall(to, callValue, callData, executionHash);
+        return true;
+    }
+
+    /*
+     *  The hash that signers approve for a `trapdoorBatch`.  It is prefixed
+     *  with the function name so that it can never equal the hash of a
+     *  single `trapdoor` call.
+     */
+    function trapdoorBatchHash(address[] targets,
+                               uint[] values,
+                               bytes data,
+                               uint[] dataLengths) constant returns (bytes32 batchHash) {
+        batchHash = sha3("MultiSignature.trapdoorBatch");
+        for (uint i = 0; i < targets.length; i++) {
+            batchHash = sha3(batchHash, targets[i], values[i], dataLengths[i]);
+        }
+        batchHash = sha3(batchHash, data);
+    }
+
+    /*
+     *  Same as `trapdoor` for a list of calls, which are approved together
+     *  and sent in order once two signers approve them.  The call data of
+     *  every call is concatenated into `data`, with the length of each
+     *  call's portion in `dataLengths`.  If any call fails the whole
+     *  transaction throws, so either every call is made or none are.
+     */
+    function trapdoorBatch(address[] targets,
+                           uint[] values,
+                           bytes data,
+                           uint[] dataLengths) public
+                                               onlyTrapdoorMultiSig
+                                               returns (bool)
+    {
+        if (values.length != targets.length || dataLengths.length != targets.length) {
+            throw;
+        }
+        // The call data portions must exactly cover `data`.
+        uint offset = 0;
+        for (uint i = 0; i < targets.length; i++) {
+            if (dataLengths[i] > data.length - offset) {
+                throw;
+            }
+            offset += dataLengths[i];
+        }
+        if (offset != data.length) {
+            throw;
+        }
+
+        bytes32 executionHash = trapdoorBatchHash(targets, values, data, dataLengths);
+        if (!approveTrapdoorCall(executionHash)) {
+            return false;
+        }
+
+        offset = 0;
+        for (i = 0; i < targets.length; i++) {
+            address target = targets[i];
+            uint callValue = values[i];
+            uint callDataLength = dataLengths[i];
+            assembly {
+                let success := call(
+                    sub(gas, 10000),
+                    target,
+                    callValue,
+                    add(add(data, 0x20), offset),
+                    callDataLength,
+                    0x0,
+                    0x0
+                )
+                jumpi(0x02, iszero(success))
+            }
+            offset += callDataLength;
+        }
+
+        TrapdoorExecuted(executionHash);
+        return true;
+    }
+
+    /*
+     *  The hash that trapdoor signers sign to approve a call through
+     *  `trapdoorWithSignatures`.  It includes `trapdoorNonce`, which is
+     *  incremented with every signed execution, so that each set of
+     *  signatures can only be used once.
+     */
+    function trapdoorMessageHash(address to,
+                                 uint callValue,
+                                 bytes callData) constant returns (bytes32) {
+        return sha3(
+            address(this),
+            "trapdoor",
+            uint(trapdoorNonce),
+            sha3(to, callValue, callData)
+        );
+    }
+
+    /*
+     *  Send a trapdoor call approved off chain by at least two trapdoor
+     *  signers, each of whom signed `trapdoorMessageHash`.  Anyone may
+     *  submit the signatures.  Throws unless two distinct signers are
+     *  recovered.  Approvals made with `trapdoor` are cleared, the same as
+     *  when a call executes through `trapdoor`.
+     */
+    function trapdoorWithSignatures(address to,
+                                    uint callValue,
+                                    bytes callData,
+                                    uint8[] v,
+                                    bytes32[] r,
+                                    bytes32[] s) public
+                                                 returns (bool)
+    {
+        if (r.length != v.length || s.length != v.length) {
+            throw;
+        }
+        bytes32 messageHash = trapdoorMessageHash(to, callValue, callData);
+
+        uint8 approvals;
+        for (uint i = 0; i < v.length; i++) {
+            approvals = approvals | trapdoorSignerBit(ecrecover(messageHash, v[i], r[i], s[i]));
+        }
+        // Two distinct signers means more than one bit is set.
+        if ((approvals & (approvals - 1)) == 0) {
+            throw;
+        }
+
+        trapdoorNonce += 1;
+        clearTrapdoorApprovals();
+
+        sendTrapdoorCall(to, callValue, callData, sha3(to, callValue, callData));
+        return true;
+    }
+}
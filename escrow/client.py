@@ -0,0 +1,270 @@
+"""
+A wrapper around a deployed `MultiSignature` which checks the contract's
+modifiers locally before sending a transaction.
+
+A transaction which hits a `throw` consumes all of the gas it was sent with.
+`MultiSignatureClient` reads everything the modifiers depend on with a single
+`getSnapshot()` call and refuses to send transactions that would throw,
+explaining why.
+
+    client = MultiSignatureClient(multisig)
+    client.check({'from': party_b}).lock()  # ['only the arbiter may call lock']
+    client.transact({'from': arbiter}).lock()
+"""
+import collections
+
+from escrow.state import (
+    State,
+    STATE_NAMES,
+)
+
+
+NULL_ADDRESS = '0x0000000000000000000000000000000000000000'
+
+
+Snapshot = collections.namedtuple('Snapshot', (
+    'partyA',
+    'partyB',
+    'arbiter',
+    'token',
+    'partyAVote',
+    'partyBVote',
+    'arbiterVote',
+    'lockedAt',
+    'unlockAt',
+    'state',
+    'etherBalance',
+    'tokenBalance',
+    'now',
+))
+
+
+def parse_snapshot(raw_snapshot):
+    """
+    Convert the return value of `getSnapshot()` into a `Snapshot`.
+    """
+    addresses, votes, values = raw_snapshot
+    return Snapshot(*(tuple(addresses) + tuple(votes) + tuple(values)))
+
+
+class TransactionRefused(Exception):
+    """
+    Raised instead of sending a transaction that the contract would reject.
+    """
+    def __init__(self, function_name, reasons):
+        self.function_name = function_name
+        self.reasons = reasons
+        super(TransactionRefused, self).__init__(
+            "{0} would throw: {1}".format(function_name, '; '.join(reasons))
+        )
+
+
+def is_same_address(left, right):
+    return left.lower() == right.lower()
+
+
+#
+# Each check mirrors one of the contract's modifiers.  It is given the
+# function name, the client, the snapshot and the transaction, and returns an
+# explanation if the modifier would throw.
+#
+def no_ether(function_name, client, snapshot, transaction):
+    if transaction.get('value', 0):
+        return "{0} does not accept ether".format(function_name)
+
+
+def before_unlock(function_name, client, snapshot, transaction):
+    if snapshot.now >= snapshot.unlockAt:
+        return "{0} may only be called before unlockAt ({1})".format(
+            function_name,
+            snapshot.unlockAt,
+        )
+
+
+def only(role):
+    def check_sender(function_name, client, snapshot, transaction):
+        if not is_same_address(transaction['from'], getattr(snapshot, role)):
+            return "only {0} may call {1}".format(role, function_name)
+    return check_sender
+
+
+def only_trapdoor_multisig(function_name, client, snapshot, transaction):
+    if not any(
+        is_same_address(transaction['from'], signer)
+        for signer in client.trapdoor_signers
+    ):
+        return "only a trapdoor signer may call {0}".format(function_name)
+
+
+def in_state(*states):
+    def check_state(function_name, client, snapshot, transaction):
+        if snapshot.state not in states:
+            return "{0} requires the state to be {1} but it is {2}".format(
+                function_name,
+                ' or '.join(STATE_NAMES[state] for state in states),
+                STATE_NAMES[snapshot.state],
+            )
+    return check_state
+
+
+PRECONDITIONS = {
+    'depositEther': (
+        before_unlock,
+        only('partyA'),
+        in_state(State.Genesis, State.WaitingForEther),
+    ),
+    'depositToken': (
+        no_ether,
+        before_unlock,
+        only('partyB'),
+        in_state(State.Genesis, State.WaitingForTokens),
+    ),
+    'lock': (
+        no_ether,
+        before_unlock,
+        only('arbiter'),
+        in_state(State.WaitingForArbiterLock),
+    ),
+    'refundEther': (
+        no_ether,
+        only('partyA'),
+        in_state(State.WaitingForTokens, State.WaitingForArbiterLock, State.NeverLocked),
+    ),
+    'refundTokens': (
+        no_ether,
+        only('partyB'),
+        in_state(State.WaitingForEther, State.WaitingForArbiterLock, State.NeverLocked),
+    ),
+    'withdrawEther': (
+        no_ether,
+        in_state(State.Locked, State.Unlocked),
+    ),
+    'withdrawTokens': (
+        no_ether,
+        in_state(State.Unlocked),
+    ),
+    'withdraw': (
+        no_ether,
+    ),
+    'syncTokenBalance': (
+        no_ether,
+    ),
+    'submitPartyAVote': (
+        no_ether,
+        in_state(State.Unlocked),
+        only('partyA'),
+    ),
+    'submitPartyBVote': (
+        no_ether,
+        in_state(State.Unlocked),
+        only('partyB'),
+    ),
+    'submitArbiterVote': (
+        no_ether,
+        in_state(State.Unlocked),
+        only('arbiter'),
+    ),
+    'submitSignedVotes': (
+        no_ether,
+        in_state(State.Unlocked),
+    ),
+    'trapdoor': (
+        only_trapdoor_multisig,
+    ),
+    'trapdoorBatch': (
+        only_trapdoor_multisig,
+    ),
+    # The signatures are only checked on chain.
+    'trapdoorWithSignatures': (),
+}
+
+
+class MultiSignatureClient(object):
+    def __init__(self, multisig):
+        self.multisig = multisig
+        self._trapdoor_signers = None
+
+    @property
+    def web3(self):
+        return self.multisig.web3
+
+    @property
+    def trapdoor_signers(self):
+        # The trapdoor addresses never change so they are only read once.
+        if self._trapdoor_signers is None:
+            self._trapdoor_signers = (
+                self.multisig.call().trapdoorA(),
+                self.multisig.call().trapdoorB(),
+                self.multisig.call().trapdoorC(),
+            )
+        return self._trapdoor_signers
+
+    def get_snapshot(self):
+        return parse_snapshot(self.multisig.call().getSnapshot())
+
+    def normalize_transaction(self, transaction):
+        transaction = dict(transaction or {})
+        if 'from' not in transaction:
+            transaction['from'] = self.web3.eth.defaultAccount or self.web3.eth.coinbase
+        return transaction
+
+    def refusal_reasons(self, function_name, transaction=None, snapshot=None):
+        """
+        The reasons that calling `function_name` with `transaction` would
+        throw.  An empty list means that every modifier would pass.
+
+        The snapshot is read with `eth_call`, so time based checks use the
+        timestamp of the block the call is evaluated against, which may be
+        earlier than that of the block the transaction is included in.
+        """
+        if function_name not in PRECONDITIONS:
+            raise ValueError("Unknown function: {0}".format(function_name))
+        transaction = self.normalize_transaction(transaction)
+        if snapshot is None:
+            snapshot = self.get_snapshot()
+
+        reasons = []
+        for check in PRECONDITIONS[function_name]:
+            reason = check(function_name, self, snapshot, transaction)
+            if reason is not None:
+                reasons.append(reason)
+        return reasons
+
+    def check(self, transaction=None):
+        """
+        `client.check(transaction).lock()` returns the list of reasons that
+        the transaction would throw.
+        """
+        return FunctionDispatcher(self, transaction, self._check)
+
+    def transact(self, transaction=None):
+        """
+        `client.transact(transaction).lock()` sends the transaction, or
+        raises `TransactionRefused` without sending anything.
+        """
+        return FunctionDispatcher(self, transaction, self._transact)
+
+    def _check(self, function_name, transaction, args):
+        return self.refusal_reasons(function_name, transaction)
+
+    def _transact(self, function_name, transaction, args):
+        transaction = self.normalize_transaction(transaction)
+        reasons = self.refusal_reasons(function_name, transaction)
+        if reasons:
+            raise TransactionRefused(function_name, reasons)
+        return getattr(self.multisig.transact(transaction), function_name)(*args)
+
+
+class FunctionDispatcher(object):
+    def __init__(self, client, transaction, handler):
+        self._client = client
+        self._transaction = transaction
+        self._handler = handler
+
+    def __getattr__(self, function_name):
+        if function_name not in PRECONDITIONS:
+            raise AttributeError(function_name)
+
+        def dispatch(*args):
+            return self._handler(function_name, self._transaction, args)
+        return dispatch
@@ -0,0 +1,270 @@
+"""
+An incremental indexer for the events emitted by `MultiSignature` contracts.
+
+Logs are fetched in block-range batches, decoded against the contract ABI and
+appended to a sqlite database with indexes on the columns that queries
+filter by.  Progress is recorded per contract in the same transaction as the
+events, so an interrupted run resumes where it stopped.
+
+The events are stored one row each rather than in a columnar layout.  Every
+query here looks up a handful of events by `who`, `hash` or `address`, which
+the indexes answer without reading the rest of the table, and appending a
+batch is a single sqlite transaction.
+
+    indexer = EventIndexer(web3, MultiSignature.abi, 'events.sqlite3')
+    indexer.track(multisig.address)
+    indexer.update()
+    indexer.deposits_for(party_a)
+"""
+import json
+import sqlite3
+
+from ethereum.utils import (
+    encode_hex,
+    sha3,
+)
+from web3.utils.events import get_event_data
+
+from escrow.terms import to_bytes32
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+DEPOSIT_EVENTS = ('EtherDeposit', 'TokenDeposit')
+
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS contracts (
+        address TEXT PRIMARY KEY,
+        last_indexed_block INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS events (
+        address TEXT NOT NULL,
+        block_number INTEGER NOT NULL,
+        log_index INTEGER NOT NULL,
+        transaction_hash TEXT NOT NULL,
+        event TEXT NOT NULL,
+        who TEXT,
+        amount TEXT,
+        hash TEXT,
+        args TEXT NOT NULL,
+        PRIMARY KEY (address, block_number, log_index)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS events_by_who ON events (who, event)",
+    "CREATE INDEX IF NOT EXISTS events_by_hash ON events (hash, event)",
+    "CREATE INDEX IF NOT EXISTS events_by_address ON events (address, event)",
+)
+
+
+def event_abi_signature(event_abi):
+    return '{0}({1})'.format(
+        event_abi['name'],
+        ','.join(arg['type'] for arg in event_abi['inputs']),
+    )
+
+
+def event_abis_by_topic(contract_abi):
+    """
+    A mapping from the first log topic of each event in `contract_abi` to
+    the ABI of that event.
+    """
+    return {
+        '0x' + encode_hex(sha3(event_abi_signature(event_abi))): event_abi
+        for event_abi in contract_abi
+        if event_abi['type'] == 'event'
+    }
+
+
+def to_hex_bytes32(value):
+    return '0x' + encode_hex(to_bytes32(value))
+
+
+def normalize_arg(arg_type, value):
+    if arg_type == 'bytes32':
+        return to_hex_bytes32(value)
+    elif arg_type == 'address':
+        return value.lower()
+    else:
+        return value
+
+
+class EventIndexer(object):
+    def __init__(self, web3, contract_abi, database_path, batch_size=DEFAULT_BATCH_SIZE):
+        self.web3 = web3
+        self.event_abis = event_abis_by_topic(contract_abi)
+        self.batch_size = batch_size
+        self.db = sqlite3.connect(database_path)
+        with self.db:
+            for statement in SCHEMA:
+                self.db.execute(statement)
+
+    def close(self):
+        self.db.close()
+
+    #
+    # Indexing
+    #
+    def track(self, address, from_block=0):
+        """
+        Start indexing the contract at `address` from `from_block`, which
+        should be the block the contract was created in.  Tracking an
+        address a second time has no effect.
+        """
+        with self.db:
+            self.db.execute(
+                "INSERT OR IGNORE INTO contracts (address, last_indexed_block) VALUES (?, ?)",
+                (address.lower(), from_block - 1),
+            )
+
+    @property
+    def tracked_addresses(self):
+        return [
+            address
+            for address, in self.db.execute("SELECT address FROM contracts ORDER BY address")
+        ]
+
+    def last_indexed_block(self, address):
+        row = self.db.execute(
+            "SELECT last_indexed_block FROM contracts WHERE address = ?",
+            (address.lower(),),
+        ).fetchone()
+        if row is None:
+            raise KeyError("Address is not tracked: {0}".format(address))
+        return row[0]
+
+    def update(self, to_block=None, confirmations=0):
+        """
+        Index every tracked contract up to `to_block`, which defaults to the
+        latest block less `confirmations`.  Returns the number of events
+        that were stored.
+        """
+        if to_block is None:
+            to_block = self.web3.eth.blockNumber - confirmations
+
+        num_events = 0
+        for address in self.tracked_addresses:
+            from_block = self.last_indexed_block(address) + 1
+            while from_block <= to_block:
+                batch_to_block = min(from_block + self.batch_size - 1, to_block)
+                num_events += self.index_range(address, from_block, batch_to_block)
+                from_block = batch_to_block + 1
+        return num_events
+
+    def fetch_logs(self, address, from_block, to_block):
+        log_filter = self.web3.eth.filter({
+            'fromBlock': from_block,
+            'toBlock': to_block,
+            'address': address,
+        })
+        try:
+            return self.web3.eth.getFilterLogs(log_filter.filter_id)
+        finally:
+            self.web3.eth.uninstallFilter(log_filter.filter_id)
+
+    def index_range(self, address, from_block, to_block):
+        rows = [
+            self.decode_log(log_entry)
+            for log_entry in self.fetch_logs(address, from_block, to_block)
+            if log_entry['topics'] and log_entry['topics'][0] in self.event_abis
+        ]
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self.db.execute(
+                "UPDATE contracts SET last_indexed_block = ? WHERE address = ?",
+                (to_block, address.lower()),
+            )
+        return len(rows)
+
+    def decode_log(self, log_entry):
+        event_abi = self.event_abis[log_entry['topics'][0]]
+        event_data = get_event_data(event_abi, log_entry)
+        args = {
+            arg['name']: normalize_arg(arg['type'], event_data['args'][arg['name']])
+            for arg in event_abi['inputs']
+        }
+        amount = args.get('amount')
+        return (
+            log_entry['address'].lower(),
+            log_entry['blockNumber'],
+            log_entry['logIndex'],
+            log_entry['transactionHash'],
+            event_abi['name'],
+            args.get('who', args.get('_from')),
+            None if amount is None else str(amount),
+            args.get('_hash', args.get('termsHash')),
+            json.dumps(args, sort_keys=True),
+        )
+
+    #
+    # Queries
+    #
+    def events(self, event=None, address=None, who=None):
+        """
+        Stored events, oldest first, optionally filtered by event name,
+        contract address and the `who` (or trapdoor signer) argument.
+        """
+        clauses = []
+        params = []
+        for column, value in (('event', event), ('address', address), ('who', who)):
+            if value is not None:
+                clauses.append('{0} = ?'.format(column))
+                params.append(value if column == 'event' else value.lower())
+        query = (
+            "SELECT address, block_number, log_index, transaction_hash, event, args "
+            "FROM events"
+        )
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY block_number, log_index"
+        return [
+            {
+                'address': row_address,
+                'blockNumber': block_number,
+                'logIndex': log_index,
+                'transactionHash': transaction_hash,
+                'event': row_event,
+                'args': json.loads(args),
+            }
+            for row_address, block_number, log_index, transaction_hash, row_event, args
+            in self.db.execute(query, params)
+        ]
+
+    def deposits_for(self, who):
+        """
+        Every `EtherDeposit` and `TokenDeposit` made by `who`, oldest first.
+        """
+        return [
+            event
+            for event_name in DEPOSIT_EVENTS
+            for event in self.events(event=event_name, who=who)
+        ]
+
+    def pending_trapdoor_hashes(self, address):
+        """
+        The execution hash each trapdoor signer of the contract at `address`
+        has most recently initiated since the last `TrapdoorExecuted`.
+        """
+        last_executed = self.db.execute(
+            "SELECT block_number, log_index FROM events "
+            "WHERE address = ? AND event = 'TrapdoorExecuted' "
+            "ORDER BY block_number DESC, log_index DESC LIMIT 1",
+            (address.lower(),),
+        ).fetchone() or (-1, -1)
+
+        pending = {}
+        for who, execution_hash in self.db.execute(
+            "SELECT who, hash FROM events "
+            "WHERE address = ? AND event = 'TrapdoorInitiated' "
+            "AND (block_number > ? OR (block_number = ? AND log_index > ?)) "
+            "ORDER BY block_number, log_index",
+            (address.lower(), last_executed[0], last_executed[0], last_executed[1]),
+        ):
+            pending[who] = execution_hash
+        return pending
@@ -0,0 +1,293 @@
+"""
+An asyncio service which watches any number of `MultiSignature` agreements
+for their `unlockAt` deadline.
+
+Every tracked agreement sits in a heap keyed on the next time it needs to be
+looked at, which starts out as its `unlockAt`.  The service sleeps until the
+earliest of these and only then reads the snapshot of the agreements that
+are due, so the cost of waiting does not grow with the number of agreements.
+
+At `unlockAt` an agreement is either *Unlocked* or, if the arbiter never
+called `lock()`, *NeverLocked*, and a `Notification` is emitted for it.  If
+`withdraw_from` is given, unlocked agreements are checked again every
+`settlement_interval` seconds until the vote has a winner, and any tokens
+left in the contract are sent to it with `withdrawTokens`.
+
+    monitor = UnlockMonitor(MultiSignature, on_notification=print)
+    monitor.track(multisig.address)
+    loop.run_until_complete(monitor.run())
+"""
+import asyncio
+import collections
+import functools
+import heapq
+import itertools
+import logging
+import time
+
+from escrow.client import (
+    is_same_address,
+    parse_snapshot,
+)
+from escrow.state import State
+
+
+logger = logging.getLogger(__name__)
+
+
+# Agreements whose deadline has passed on the local clock but not yet on the
+# chain are looked at again after this many seconds.
+DEFAULT_RETRY_INTERVAL = 15
+
+DEFAULT_SETTLEMENT_INTERVAL = 3600
+
+UNLOCKED = 'Unlocked'
+NEVER_LOCKED = 'NeverLocked'
+TOKENS_WITHDRAWN = 'TokensWithdrawn'
+
+
+Notification = collections.namedtuple('Notification', (
+    'address',
+    'event',
+    'snapshot',
+    'transactionHash',
+))
+
+
+def vote_winner(snapshot):
+    """
+    The party which has received two votes, or `None` if neither has yet.
+    """
+    votes = (snapshot.partyAVote, snapshot.partyBVote, snapshot.arbiterVote)
+    for party in (snapshot.partyA, snapshot.partyB):
+        if sum(is_same_address(vote, party) for vote in votes) >= 2:
+            return party
+    return None
+
+
+class SystemClock(object):
+    def time(self):
+        return time.time()
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(seconds)
+
+
+class SimulatedClock(object):
+    """
+    A clock which only moves when told to.  Sleepers wake once the clock has
+    been moved past the time they are waiting for.
+    """
+    def __init__(self, now):
+        self.now = now
+        self.sleepers = []
+
+    def time(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        if seconds <= 0:
+            await asyncio.sleep(0)
+            return
+        wake_at = self.now + seconds
+        future = asyncio.Future()
+        self.sleepers.append((wake_at, future))
+        try:
+            await future
+        finally:
+            self.sleepers = [
+                sleeper for sleeper in self.sleepers if sleeper[1] is not future
+            ]
+
+    @property
+    def next_wake_at(self):
+        return min(
+            (wake_at for wake_at, future in self.sleepers if not future.done()),
+            default=None,
+        )
+
+    def set(self, timestamp):
+        self.now = timestamp
+        for wake_at, future in self.sleepers:
+            if wake_at <= timestamp and not future.done():
+                future.set_result(None)
+        return timestamp
+
+    def advance(self, seconds):
+        return self.set(self.now + seconds)
+
+
+class UnlockMonitor(object):
+    def __init__(self,
+                 MultiSignature,
+                 on_notification=None,
+                 withdraw_from=None,
+                 clock=None,
+                 retry_interval=DEFAULT_RETRY_INTERVAL,
+                 settlement_interval=DEFAULT_SETTLEMENT_INTERVAL,
+                 executor=None):
+        self.MultiSignature = MultiSignature
+        self.on_notification = on_notification
+        self.withdraw_from = withdraw_from
+        self.clock = clock or SystemClock()
+        self.retry_interval = retry_interval
+        self.settlement_interval = settlement_interval
+        # web3 calls block, so they are run in this executor, by default the
+        # loop's, to keep them off the loop.
+        self.executor = executor
+
+        self.queue = []
+        # The sequence number of the live heap entry of each agreement.
+        self.entries = {}
+        self.notified = collections.defaultdict(set)
+        self.counter = itertools.count()
+        self.wakeup = asyncio.Event()
+        self.stopped = False
+
+    #
+    # Tracking
+    #
+    def track(self, address, unlock_at=None):
+        """
+        Start watching the agreement at `address`.  Its `unlockAt` is read
+        from the contract unless given.  Tracking an address again moves its
+        deadline to `unlock_at`.
+        """
+        if unlock_at is None:
+            unlock_at = self.MultiSignature(address=address).call().unlockAt()
+        self.schedule(address, unlock_at)
+        return unlock_at
+
+    def untrack(self, address):
+        # The heap entry is skipped when it comes up rather than removed.
+        self.entries.pop(address.lower(), None)
+        self.notified.pop(address.lower(), None)
+
+    @property
+    def tracked_addresses(self):
+        return sorted(self.entries)
+
+    def schedule(self, address, due_at):
+        address = address.lower()
+        sequence = next(self.counter)
+        self.entries[address] = sequence
+        heapq.heappush(self.queue, (due_at, sequence, address))
+        self.wakeup.set()
+
+    @property
+    def next_deadline(self):
+        """
+        The earliest time any tracked agreement needs to be looked at.
+        """
+        self.discard_stale()
+        if not self.queue:
+            return None
+        return self.queue[0][0]
+
+    def discard_stale(self):
+        while self.queue:
+            _, sequence, address = self.queue[0]
+            if self.entries.get(address) == sequence:
+                break
+            heapq.heappop(self.queue)
+
+    #
+    # Processing
+    #
+    async def process_due(self):
+        """
+        Look at every agreement whose deadline has passed.  Returns the
+        notifications emitted.  An agreement which cannot be checked, for
+        example because the node is unreachable, is logged and looked at
+        again after `retry_interval` so that one failure never stops the
+        service.
+        """
+        notifications = []
+        while self.next_deadline is not None and self.next_deadline <= self.clock.time():
+            _, _, address = heapq.heappop(self.queue)
+            del self.entries[address]
+            try:
+                notifications.extend(await self.check(address))
+            except Exception:
+                logger.exception(
+                    "Checking %s failed, retrying in %s seconds",
+                    address,
+                    self.retry_interval,
+                )
+                self.schedule(address, self.clock.time() + self.retry_interval)
+        return notifications
+
+    async def run(self):
+        """
+        Process agreements as their deadlines come up until `stop()` is
+        called, sleeping in between.
+        """
+        self.stopped = False
+        while not self.stopped:
+            await self.process_due()
+            if self.stopped:
+                break
+
+            self.wakeup.clear()
+            waiters = [asyncio.ensure_future(self.wakeup.wait())]
+            if self.next_deadline is not None:
+                waiters.append(asyncio.ensure_future(
+                    self.clock.sleep(self.next_deadline - self.clock.time())
+                ))
+            try:
+                await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for waiter in waiters:
+                    waiter.cancel()
+
+    def stop(self):
+        self.stopped = True
+        self.wakeup.set()
+
+    async def call_web3(self, fn, *args):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args))
+
+    async def check(self, address):
+        multisig = self.MultiSignature(address=address)
+        snapshot = parse_snapshot(await self.call_web3(multisig.call().getSnapshot))
+        notifications = []
+
+        if snapshot.state == State.NeverLocked:
+            notifications.append(await self.notify(address, NEVER_LOCKED, snapshot))
+            self.untrack(address)
+        elif snapshot.state == State.Unlocked:
+            if UNLOCKED not in self.notified[address]:
+                notifications.append(await self.notify(address, UNLOCKED, snapshot))
+            if self.withdraw_from is None:
+                self.untrack(address)
+            elif vote_winner(snapshot) is None:
+                self.schedule(address, self.clock.time() + self.settlement_interval)
+            else:
+                notifications.extend(await self.withdraw_tokens(address, multisig, snapshot))
+                self.untrack(address)
+        else:
+            # The latest block is still from before `unlockAt`.
+            self.schedule(address, self.clock.time() + self.retry_interval)
+
+        return notifications
+
+    async def withdraw_tokens(self, address, multisig, snapshot):
+        """
+        Send any tokens left in the settled agreement to the winner of the
+        vote, if calling `withdrawTokens` would move any.
+        """
+        transaction = {'from': self.withdraw_from}
+        if not await self.call_web3(multisig.call(transaction).withdrawTokens):
+            return []
+        txn_hash = await self.call_web3(multisig.transact(transaction).withdrawTokens)
+        return [await self.notify(address, TOKENS_WITHDRAWN, snapshot, txn_hash)]
+
+    async def notify(self, address, event, snapshot, txn_hash=None):
+        notification = Notification(address, event, snapshot, txn_hash)
+        self.notified[address.lower()].add(event)
+        if self.on_notification is not None:
+            result = self.on_notification(notification)
+            if asyncio.iscoroutine(result):
+                await result
+        return notification
@@ -0,0 +1,109 @@
+"""
+Reads the state of a `MultiTokenMultiSignature` across all of its tokens
+with a single `getSnapshot()` call.
+
+    snapshot = read_multi_token_snapshot(multisig)
+    snapshot.state
+    token_shortfalls(snapshot)  # {token: tokens still needed}
+"""
+import collections
+
+from escrow.state import evaluate_state
+
+
+MultiTokenSnapshot = collections.namedtuple('MultiTokenSnapshot', (
+    'partyA',
+    'partyB',
+    'arbiter',
+    'partyAVote',
+    'partyBVote',
+    'arbiterVote',
+    'lockedAt',
+    'unlockAt',
+    'state',
+    'ethDepositMinimum',
+    'etherBalance',
+    'now',
+    'tokens',
+    'tokenDepositMinimums',
+    'tokenBalances',
+))
+
+
+def parse_multi_token_snapshot(raw_snapshot):
+    """
+    Convert the return value of `MultiTokenMultiSignature.getSnapshot()` into
+    a `MultiTokenSnapshot`.
+    """
+    parties, votes, values, tokens, minimums, balances = raw_snapshot
+    return MultiTokenSnapshot(*(
+        tuple(parties) + tuple(votes) + tuple(values) +
+        (tuple(tokens), tuple(minimums), tuple(balances))
+    ))
+
+
+def read_multi_token_snapshot(multisig):
+    return parse_multi_token_snapshot(multisig.call().getSnapshot())
+
+
+def token_shortfalls(snapshot):
+    """
+    A mapping from each token whose minimum has not been met to the number
+    of tokens still needed.
+    """
+    return {
+        token: minimum - balance
+        for token, minimum, balance in zip(
+            snapshot.tokens,
+            snapshot.tokenDepositMinimums,
+            snapshot.tokenBalances,
+        )
+        if balance < minimum
+    }
+
+
+def evaluate_multi_token_state(locked_at,
+                               unlock_at,
+                               eth_deposit_minimum,
+                               ether_balance,
+                               token_deposit_minimums,
+                               token_balances,
+                               timestamp):
+    """
+    The value `currentState()` returns for a `MultiTokenMultiSignature` with
+    the given storage values and balances in a block with the given
+    timestamp.  The token deposits are met once every token's minimum is.
+    """
+    if len(token_deposit_minimums) != len(token_balances):
+        raise ValueError("Every token needs both a minimum and a balance")
+    tokens_met = all(
+        balance >= minimum
+        for minimum, balance in zip(token_deposit_minimums, token_balances)
+    )
+    # A single token with a minimum of 1 has met it exactly when every token
+    # here has.
+    return evaluate_state(
+        locked_at,
+        unlock_at,
+        eth_deposit_minimum,
+        1,
+        ether_balance,
+        1 if tokens_met else 0,
+        timestamp,
+    )
+
+
+def evaluate_snapshot(snapshot, timestamp=None):
+    """
+    The state of the agreement described by `snapshot` at `timestamp`,
+    which defaults to the time the snapshot was read at.
+    """
+    return evaluate_multi_token_state(
+        snapshot.lockedAt,
+        snapshot.unlockAt,
+        snapshot.ethDepositMinimum,
+        snapshot.etherBalance,
+        snapshot.tokenDepositMinimums,
+        snapshot.tokenBalances,
+        snapshot.now if timestamp is None else timestamp,
+    )
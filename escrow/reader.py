@@ -0,0 +1,53 @@
+"""
+Reads the snapshots of many `MultiSignature` contracts through a deployed
+`MultiSignatureReader` with one `eth_call` per batch.
+
+    snapshots = read_snapshots(reader, addresses)
+    snapshots[multisig.address].state
+"""
+from escrow.client import Snapshot
+
+
+SNAPSHOT_STRIDE = len(Snapshot._fields)
+
+NUM_ADDRESS_FIELDS = 7
+
+# Keeps each call well within the gas limit that nodes apply to `eth_call`.
+DEFAULT_BATCH_SIZE = 200
+
+
+def to_address(value):
+    return '0x{0:040x}'.format(value)
+
+
+def unflatten_snapshots(values):
+    """
+    Split the flat array returned by `getSnapshots` into `Snapshot`s.
+    """
+    if len(values) % SNAPSHOT_STRIDE:
+        raise ValueError(
+            "Expected a multiple of {0} values, got {1}".format(SNAPSHOT_STRIDE, len(values))
+        )
+    return [
+        Snapshot(*(
+            tuple(to_address(value) for value in values[offset:offset + NUM_ADDRESS_FIELDS]) +
+            tuple(values[offset + NUM_ADDRESS_FIELDS:offset + SNAPSHOT_STRIDE])
+        ))
+        for offset in range(0, len(values), SNAPSHOT_STRIDE)
+    ]
+
+
+def read_snapshots(reader, addresses, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    A mapping from each of `addresses` to its `Snapshot`, read with one call
+    to `reader.getSnapshots` for every `batch_size` addresses.
+    """
+    addresses = list(addresses)
+    snapshots = {}
+    for start in range(0, len(addresses), batch_size):
+        batch = addresses[start:start + batch_size]
+        snapshots.update(zip(
+            batch,
+            unflatten_snapshots(reader.call().getSnapshots(batch)),
+        ))
+    return snapshots
@@ -0,0 +1,74 @@
+"""
+Off chain signatures for `submitSignedVotes` and `trapdoorWithSignatures`.
+
+Each party signs locally, and a single relayer submits the aggregated
+signatures in one transaction.
+
+    signatures = [
+        sign_message(vote_message_hash(multisig.address, party_a), party_a_key),
+        sign_message(vote_message_hash(multisig.address, party_a), arbiter_key),
+    ]
+    multisig.transact().submitSignedVotes(party_a, *aggregate_signatures(signatures))
+
+The message hashes match `voteMessageHash` and `trapdoorMessageHash` on the
+contract, which use the tightly packed encoding of `sha3`.
+"""
+from ethereum.utils import (
+    ecsign,
+    encode_int32,
+    sha3,
+)
+
+from escrow.terms import force_bytes
+from escrow.trapdoor import address_to_bytes
+
+
+def vote_message_hash(multisig_address, who):
+    """
+    The hash signed to vote for `who`.
+    """
+    return sha3(
+        address_to_bytes(multisig_address) +
+        b'submitVote' +
+        address_to_bytes(who)
+    )
+
+
+def trapdoor_message_hash(multisig_address, trapdoor_nonce, to, call_value, call_data):
+    """
+    The hash signed to approve sending `call_value` and `call_data` to `to`
+    while the contract's `trapdoorNonce` is `trapdoor_nonce`.  Binary
+    `call_data` should be given as bytes, since text is utf8 encoded.
+    """
+    execution_hash = sha3(
+        address_to_bytes(to) +
+        encode_int32(call_value) +
+        force_bytes(call_data)
+    )
+    return sha3(
+        address_to_bytes(multisig_address) +
+        b'trapdoor' +
+        encode_int32(trapdoor_nonce) +
+        execution_hash
+    )
+
+
+def sign_message(message_hash, private_key):
+    """
+    A `(v, r, s)` signature of `message_hash`, with `r` and `s` as the 32
+    byte values the contract takes.
+    """
+    v, r, s = ecsign(message_hash, private_key)
+    return (v, encode_int32(r), encode_int32(s))
+
+
+def aggregate_signatures(signatures):
+    """
+    Turn a list of `(v, r, s)` signatures into the `v`, `r` and `s` arrays
+    that the contract takes.
+    """
+    return (
+        [v for v, _, _ in signatures],
+        [r for _, r, _ in signatures],
+        [s for _, _, s in signatures],
+    )
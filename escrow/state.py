@@ -0,0 +1,292 @@
+"""
+The states of a `MultiSignature` agreement, as returned by `currentState()`.
+"""
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class State(object):
+    Genesis = 0
+    WaitingForEther = 1
+    WaitingForTokens = 2
+    WaitingForArbiterLock = 3
+    Locked = 4
+    Unlocked = 5
+    NeverLocked = 6
+
+
+STATE_NAMES = (
+    'Genesis',
+    'WaitingForEther',
+    'WaitingForTokens',
+    'WaitingForArbiterLock',
+    'Locked',
+    'Unlocked',
+    'NeverLocked',
+)
+
+
+UINT48_MASK = 2 ** 48 - 1
+UINT64_MASK = 2 ** 64 - 1
+UINT128_MASK = 2 ** 128 - 1
+ADDRESS_MASK = 2 ** 160 - 1
+
+
+# The storage slots below follow the layout documented at the top of
+# `contracts/MultiSig.sol`, and must be updated along with it.
+# `test_slot_constants_match_contract` checks them against a deployed
+# contract.
+
+# `token`, `lockedAt` and `unlockAt` are packed into this slot, after the
+# six slots used by the `Trapdoor` base contract.
+TIMESTAMPS_SLOT = 6
+
+
+def unpack_timestamps(timestamps_slot):
+    """
+    `(lockedAt, unlockAt)` from the raw value of `TIMESTAMPS_SLOT`, which
+    packs `token`, `lockedAt` and `unlockAt` from the low order bytes up.
+    """
+    return (
+        (timestamps_slot >> 160) & UINT48_MASK,
+        (timestamps_slot >> 208) & UINT48_MASK,
+    )
+
+
+# `ethDepositMinimum` and `tokenDepositMinimum` are packed into this slot.
+MINIMUMS_SLOT = 7
+
+
+def unpack_minimums(minimums_slot):
+    """
+    `(ethDepositMinimum, tokenDepositMinimum)` from the raw value of
+    `MINIMUMS_SLOT`.
+    """
+    return (
+        minimums_slot & UINT128_MASK,
+        minimums_slot >> 128,
+    )
+
+
+# `creditA` and `creditB`, the ether waiting to be collected through
+# `withdraw`, are packed into this slot.
+CREDITS_SLOT = 11
+
+
+def unpack_credits(credits_slot):
+    """
+    `(creditA, creditB)` from the raw value of `CREDITS_SLOT`.
+    """
+    return (
+        credits_slot & UINT128_MASK,
+        credits_slot >> 128,
+    )
+
+
+# The tracked `tokenBalance` is the only field in this slot.
+TOKEN_BALANCE_SLOT = 12
+
+
+def escrowed_ether(ether_balance, credits_slot):
+    """
+    The part of the contract's ether balance which counts towards the
+    deposit, excluding the credits waiting to be collected.
+    """
+    return max(ether_balance - sum(unpack_credits(credits_slot)), 0)
+
+
+def evaluate_state(locked_at,
+                   unlock_at,
+                   eth_deposit_minimum,
+                   token_deposit_minimum,
+                   ether_balance,
+                   token_balance,
+                   timestamp):
+    """
+    The value `currentState()` returns for an agreement with the given
+    storage values and balances in a block with the given timestamp.
+    `ether_balance` is the escrowed balance, see `escrowed_ether`, and
+    `token_balance` is the tracked `tokenBalance` in `TOKEN_BALANCE_SLOT`.
+    """
+    if locked_at != 0:
+        if timestamp < unlock_at:
+            return State.Locked
+        return State.Unlocked
+    elif timestamp >= unlock_at:
+        return State.NeverLocked
+
+    ether_met = ether_balance >= eth_deposit_minimum
+    tokens_met = token_balance >= token_deposit_minimum
+
+    if ether_met and tokens_met:
+        return State.WaitingForArbiterLock
+    elif ether_met:
+        return State.WaitingForTokens
+    elif tokens_met:
+        return State.WaitingForEther
+    else:
+        return State.Genesis
+
+
+def evaluate_state_from_storage(timestamps_slot,
+                                minimums_slot,
+                                ether_balance,
+                                token_balance,
+                                timestamp):
+    """
+    Same as `evaluate_state` but given the raw values of `TIMESTAMPS_SLOT`
+    and `MINIMUMS_SLOT`.
+    """
+    locked_at, unlock_at = unpack_timestamps(timestamps_slot)
+    eth_deposit_minimum, token_deposit_minimum = unpack_minimums(minimums_slot)
+    return evaluate_state(
+        locked_at,
+        unlock_at,
+        eth_deposit_minimum,
+        token_deposit_minimum,
+        ether_balance,
+        token_balance,
+        timestamp,
+    )
+
+
+def column_size(*columns):
+    """
+    The shared length of the sequences among `columns`, or 1 if they are all
+    scalar values.
+    """
+    lengths = set(len(column) for column in columns if is_sequence(column))
+    if len(lengths) > 1:
+        raise ValueError("All columns must have the same length")
+    return lengths.pop() if lengths else 1
+
+
+def broadcast(*columns):
+    """
+    Zip together equal length sequences, repeating any scalar values.
+    """
+    size = column_size(*columns)
+    return zip(*(
+        column if is_sequence(column) else [column] * size
+        for column in columns
+    ))
+
+
+def is_sequence(value):
+    return hasattr(value, '__len__') and hasattr(value, '__getitem__')
+
+
+def split_uint128(column, size):
+    """
+    `(high, low)` uint64 arrays of length `size` holding the high and low 64
+    bits of each value in `column`.  Values of 2**128 or more are clamped to
+    `UINT128_MASK`, which compares the same way against any uint128.
+    """
+    values = numpy.asarray(column)
+    if values.dtype.kind in 'ui':
+        # Already fits in the low 64 bits.
+        low = numpy.broadcast_to(values.astype(numpy.uint64), (size,))
+        return numpy.zeros(size, dtype=numpy.uint64), low
+
+    values = numpy.broadcast_to(
+        numpy.minimum(values.astype(object), UINT128_MASK),
+        (size,),
+    )
+    return (
+        (values >> 64).astype(numpy.uint64),
+        (values & UINT64_MASK).astype(numpy.uint64),
+    )
+
+
+def greater_or_equal_uint128(left, right):
+    """
+    Elementwise `left >= right` for two `split_uint128` pairs.
+    """
+    left_high, left_low = left
+    right_high, right_low = right
+    return (left_high > right_high) | (
+        (left_high == right_high) & (left_low >= right_low)
+    )
+
+
+def evaluate_states(locked_at,
+                    unlock_at,
+                    eth_deposit_minimum,
+                    token_deposit_minimum,
+                    ether_balance,
+                    token_balance,
+                    timestamp):
+    """
+    `evaluate_state` over many agreements at once.  Each argument is either
+    a sequence with one value per agreement (a list, tuple or numpy array)
+    or a single value shared by all of them, such as the block timestamp.
+    Returns a list of states.
+
+    With numpy installed the states are computed with array operations.  The
+    minimums and balances are up to 128 bits wide, more than a numpy integer
+    holds, so they are compared as pairs of uint64 halves.  Without numpy
+    `evaluate_state` is called once per agreement.
+    """
+    if numpy is None:
+        return [
+            evaluate_state(*row)
+            for row in broadcast(
+                locked_at,
+                unlock_at,
+                eth_deposit_minimum,
+                token_deposit_minimum,
+                ether_balance,
+                token_balance,
+                timestamp,
+            )
+        ]
+
+    size = column_size(
+        locked_at,
+        unlock_at,
+        eth_deposit_minimum,
+        token_deposit_minimum,
+        ether_balance,
+        token_balance,
+        timestamp,
+    )
+
+    # `lockedAt`, `unlockAt` and block timestamps are 48 bit values.
+    locked_at = numpy.asarray(locked_at, dtype=numpy.int64)
+    unlock_at = numpy.asarray(unlock_at, dtype=numpy.int64)
+    timestamp = numpy.asarray(timestamp, dtype=numpy.int64)
+    locked = numpy.broadcast_to(locked_at != 0, (size,))
+    before_unlock = numpy.broadcast_to(timestamp < unlock_at, (size,))
+
+    ether_met = greater_or_equal_uint128(
+        split_uint128(ether_balance, size),
+        split_uint128(eth_deposit_minimum, size),
+    )
+    tokens_met = greater_or_equal_uint128(
+        split_uint128(token_balance, size),
+        split_uint128(token_deposit_minimum, size),
+    )
+
+    # The first matching condition wins, in the same order as the branches
+    # of `evaluate_state`.
+    return numpy.select(
+        [
+            locked & before_unlock,
+            locked,
+            ~before_unlock,
+            ether_met & tokens_met,
+            ether_met,
+            tokens_met,
+        ],
+        [
+            State.Locked,
+            State.Unlocked,
+            State.NeverLocked,
+            State.WaitingForArbiterLock,
+            State.WaitingForTokens,
+            State.WaitingForEther,
+        ],
+        default=State.Genesis,
+    ).tolist()
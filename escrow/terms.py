@@ -0,0 +1,51 @@
+"""
+Helpers for agreements which only keep the hash of their terms on chain.
+"""
+from ethereum.utils import sha3
+
+
+EMPTY_TERMS_HASH = b'\x00' * 32
+
+
+def force_bytes(value):
+    """
+    `value` as bytes, with text encoded as utf8.
+    """
+    if isinstance(value, bytes):
+        return value
+    return value.encode('utf8')
+
+
+def to_bytes32(value):
+    """
+    Normalize a `bytes32` value returned by a contract call, which depending
+    on the web3 version may be raw bytes, a latin-1 string or `0x` prefixed
+    hex.
+    """
+    if isinstance(value, bytes):
+        return value
+    elif value.startswith('0x') and len(value) == 66:
+        return bytes(bytearray.fromhex(value[2:]))
+    else:
+        return value.encode('latin-1')
+
+
+def hash_contract_terms(document):
+    """
+    The `sha3` of a terms document, as passed to `initializeWithTermsHash`.
+    """
+    return sha3(force_bytes(document))
+
+
+def verify_contract_terms(multisig, document):
+    """
+    Whether `document` matches the terms of the given `MultiSignature`.
+    Agreements which store only a terms hash are compared against the hash
+    of the document, all others against the stored `contractTerms` string.
+    """
+    terms_hash = to_bytes32(multisig.call().contractTermsHash())
+
+    if terms_hash == EMPTY_TERMS_HASH:
+        return force_bytes(multisig.call().contractTerms()) == force_bytes(document)
+    else:
+        return terms_hash == hash_contract_terms(document)
@@ -0,0 +1,61 @@
+"""
+Helpers for building `trapdoorBatch` calls.
+
+    calls = [
+        (party_a, ether_balance, b''),
+        (token_address, 0, encode_token_transfer(party_b, token_balance)),
+    ]
+    multisig.transact({'from': trapdoor_a}).trapdoorBatch(*encode_batch(calls))
+"""
+from ethereum.utils import (
+    decode_hex,
+    encode_int32,
+    sha3,
+)
+
+
+TOKEN_TRANSFER_SELECTOR = decode_hex('a9059cbb')
+
+BATCH_HASH_DOMAIN = b'MultiSignature.trapdoorBatch'
+
+
+def address_to_bytes(address):
+    if address.startswith('0x'):
+        address = address[2:]
+    return decode_hex(address)
+
+
+def encode_token_transfer(to, amount):
+    """
+    The call data for `transfer(to, amount)` on a token.
+    """
+    return TOKEN_TRANSFER_SELECTOR + b'\x00' * 12 + address_to_bytes(to) + encode_int32(amount)
+
+
+def encode_batch(calls):
+    """
+    The `(targets, values, data, dataLengths)` arguments to `trapdoorBatch`
+    for a list of `(target, value, call_data)` tuples.
+    """
+    return (
+        [target for target, _, _ in calls],
+        [value for _, value, _ in calls],
+        b''.join(call_data for _, _, call_data in calls),
+        [len(call_data) for _, _, call_data in calls],
+    )
+
+
+def trapdoor_batch_hash(calls):
+    """
+    The hash that `trapdoorBatch` approves for a list of `(target, value,
+    call_data)` tuples.  Matches `trapdoorBatchHash` on the contract.
+    """
+    batch_hash = sha3(BATCH_HASH_DOMAIN)
+    for target, value, call_data in calls:
+        batch_hash = sha3(
+            batch_hash +
+            address_to_bytes(target) +
+            encode_int32(value) +
+            encode_int32(len(call_data))
+        )
+    return sha3(batch_hash + b''.join(call_data for _, _, call_data in calls))
@@ -0,0 +1,542 @@
+"""
+Deploys many `MultiSignature` agreements through a `MultiSignatureFactory`
+from a manifest.
+
+The manifest is either a CSV file with a header row or a JSON list of
+objects, with one agreement per row and these fields:
+
+* `id` - unique name of the agreement, defaulting to its position
+* `partyA`, `partyB`, `arbiter`
+* `rescuerA`, `rescuerB`, `rescuerC`
+* `ethDepositMinimum`, `tokenDepositMinimum`, `token`, `unlockAt`
+* `terms` - the terms document
+* `termsURI` - optional.  When given only the hash of `terms` is stored and
+  the URI is published in the `ContractTermsPublished` event.
+
+Transactions are sent in windows of `window_size` with nonces assigned
+locally, so that a whole window is submitted before waiting on any receipt.
+The nonce of each agreement is written to a checkpoint file before its
+transaction is sent, followed by the transaction hash and later the
+receipt.  A run that is interrupted resumes from the checkpoint.  Any
+transaction whose hash was never recorded is first looked for on chain,
+and any which the node dropped is sent again with the same nonce.  With
+explicit nonces this never deploys an agreement twice, since only one
+transaction per nonce can be mined.  Without them an agreement whose
+transaction is neither mined nor known to the node is sent again with a
+new nonce.  If the original transaction is still mined later, that
+agreement is deployed twice.  The address of each deployed agreement is
+written to a JSON registry.
+
+    python -m migrations.deploy --factory 0x... --from 0x... agreements.csv
+"""
+from __future__ import print_function
+
+import argparse
+import collections
+import csv
+import json
+import os
+import re
+import sys
+import time
+
+from escrow.terms import hash_contract_terms
+
+
+DEFAULT_WINDOW_SIZE = 50
+
+DEFAULT_TIMEOUT = 600
+
+DEFAULT_POLL_INTERVAL = 1
+
+ADDRESS_FIELDS = (
+    'partyA',
+    'partyB',
+    'arbiter',
+    'rescuerA',
+    'rescuerB',
+    'rescuerC',
+    'token',
+)
+
+INTEGER_FIELDS = (
+    'ethDepositMinimum',
+    'tokenDepositMinimum',
+    'unlockAt',
+)
+
+ADDRESS_REGEX = re.compile('^0x[0-9a-fA-F]{40}$')
+
+
+Agreement = collections.namedtuple('Agreement', (
+    'id',
+    'participants',
+    'rescuers',
+    'ethDepositMinimum',
+    'tokenDepositMinimum',
+    'token',
+    'unlockAt',
+    'terms',
+    'termsURI',
+))
+
+
+class ManifestError(ValueError):
+    pass
+
+
+class DeploymentTimeout(Exception):
+    pass
+
+
+#
+# Manifest
+#
+def parse_agreement(position, row):
+    agreement_id = str(row.get('id') or position)
+
+    missing = [
+        field
+        for field in ADDRESS_FIELDS + INTEGER_FIELDS + ('terms',)
+        if row.get(field) in (None, '')
+    ]
+    if missing:
+        raise ManifestError("Agreement {0} is missing {1}".format(
+            agreement_id,
+            ', '.join(missing),
+        ))
+
+    for field in ADDRESS_FIELDS:
+        if not ADDRESS_REGEX.match(row[field]):
+            raise ManifestError("Agreement {0} has an invalid {1}: {2}".format(
+                agreement_id,
+                field,
+                row[field],
+            ))
+
+    try:
+        values = {field: int(row[field]) for field in INTEGER_FIELDS}
+    except ValueError as err:
+        raise ManifestError("Agreement {0} has an invalid value: {1}".format(
+            agreement_id,
+            err,
+        ))
+
+    return Agreement(
+        id=agreement_id,
+        participants=[row['partyA'], row['partyB'], row['arbiter']],
+        rescuers=[row['rescuerA'], row['rescuerB'], row['rescuerC']],
+        ethDepositMinimum=values['ethDepositMinimum'],
+        tokenDepositMinimum=values['tokenDepositMinimum'],
+        token=row['token'],
+        unlockAt=values['unlockAt'],
+        terms=row['terms'],
+        termsURI=row.get('termsURI') or None,
+    )
+
+
+def parse_manifest(rows):
+    """
+    The `Agreement` for each row of a manifest, in order.
+    """
+    agreements = [
+        parse_agreement(position, row)
+        for position, row in enumerate(rows)
+    ]
+    seen = set()
+    for agreement in agreements:
+        if agreement.id in seen:
+            raise ManifestError("Duplicate agreement id: {0}".format(agreement.id))
+        seen.add(agreement.id)
+    return agreements
+
+
+def load_manifest(path):
+    """
+    Read the agreements from a `.csv` or `.json` manifest.
+    """
+    with open(path) as manifest_file:
+        if path.endswith('.json'):
+            rows = json.load(manifest_file)
+        elif path.endswith('.csv'):
+            rows = list(csv.DictReader(manifest_file))
+        else:
+            raise ManifestError("Manifest must be a .csv or .json file: {0}".format(path))
+    return parse_manifest(rows)
+
+
+def create_call(agreement):
+    """
+    The name of the factory function which creates `agreement` and the
+    arguments to call it with.
+    """
+    args = [
+        agreement.participants,
+        agreement.rescuers,
+        agreement.ethDepositMinimum,
+        agreement.tokenDepositMinimum,
+        agreement.token,
+        agreement.unlockAt,
+    ]
+    if agreement.termsURI is None:
+        return 'createMultiSignature', args + [agreement.terms]
+    else:
+        return 'createMultiSignatureWithTermsHash', args + [
+            hash_contract_terms(agreement.terms),
+            agreement.termsURI,
+        ]
+
+
+#
+# Checkpoint and registry
+#
+def write_json(path, value):
+    """
+    Write `value` to `path` such that an interruption leaves either the old
+    or the new contents in place.
+    """
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'w') as json_file:
+        json.dump(value, json_file, indent=2, sort_keys=True)
+        json_file.write('\n')
+    os.rename(temporary_path, path)
+
+
+class Checkpoint(object):
+    """
+    The nonce and transaction of each agreement, and the address it created
+    once its receipt has been seen.  The transaction hash is `None` between
+    choosing a nonce and the node accepting the transaction.
+    """
+    def __init__(self, path, sender):
+        self.path = path
+        if os.path.exists(path):
+            with open(path) as checkpoint_file:
+                contents = json.load(checkpoint_file)
+            if contents['from'].lower() != sender.lower():
+                raise ValueError(
+                    "Checkpoint {0} was written by {1}".format(path, contents['from'])
+                )
+            self.entries = contents['agreements']
+        else:
+            self.entries = {}
+        self.sender = sender
+
+    def save(self):
+        write_json(self.path, {
+            'from': self.sender,
+            'agreements': self.entries,
+        })
+
+    def record_intent(self, agreement_id, nonce, sent_after_block):
+        self.entries[agreement_id] = {
+            'nonce': nonce,
+            'transactionHash': None,
+            'address': None,
+            'blockNumber': None,
+            # The transaction can only be mined after this block, which
+            # bounds the search for it after an interruption.
+            'sentAfterBlock': sent_after_block,
+        }
+        self.save()
+
+    def record_submission(self, agreement_id, txn_hash):
+        self.entries[agreement_id]['transactionHash'] = txn_hash
+        self.save()
+
+    def record_receipt(self, agreement_id, address, block_number):
+        self.entries[agreement_id]['address'] = address
+        self.entries[agreement_id]['blockNumber'] = block_number
+
+    def discard(self, agreement_id):
+        del self.entries[agreement_id]
+
+    @property
+    def unconfirmed(self):
+        return {
+            agreement_id: entry['transactionHash']
+            for agreement_id, entry in self.entries.items()
+            if entry['blockNumber'] is None
+        }
+
+    @property
+    def unsent(self):
+        return {
+            agreement_id: entry
+            for agreement_id, entry in self.entries.items()
+            if entry['transactionHash'] is None
+        }
+
+    @property
+    def deployed(self):
+        return {
+            agreement_id: entry
+            for agreement_id, entry in self.entries.items()
+            if entry['address'] is not None
+        }
+
+
+def get_created_address(txn_receipt, factory_address):
+    """
+    The `instance` argument of the `MultiSignatureCreated` event logged by
+    the factory, or `None` if the transaction failed.
+    """
+    created_logs = [
+        log_entry
+        for log_entry in txn_receipt['logs']
+        if log_entry['address'].lower() == factory_address.lower()
+    ]
+    if not created_logs:
+        return None
+    return '0x' + created_logs[-1]['topics'][1][-40:]
+
+
+#
+# Deployment
+#
+class Deployer(object):
+    def __init__(self,
+                 web3,
+                 factory,
+                 sender,
+                 checkpoint_path,
+                 registry_path,
+                 window_size=DEFAULT_WINDOW_SIZE,
+                 gas=None,
+                 explicit_nonces=True,
+                 timeout=DEFAULT_TIMEOUT,
+                 poll_interval=DEFAULT_POLL_INTERVAL):
+        self.web3 = web3
+        self.factory = factory
+        self.sender = sender
+        self.checkpoint = Checkpoint(checkpoint_path, sender)
+        self.registry_path = registry_path
+        self.window_size = window_size
+        self.gas = gas
+        # Nonces are always allocated here.  Sending them with each
+        # transaction is what lets a node accept a whole window before the
+        # first of it is mined, but not every node accepts a `nonce`.
+        self.explicit_nonces = explicit_nonces
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        # The agreements being deployed, keyed by id.
+        self.agreements = {}
+
+    def deploy(self, agreements):
+        """
+        Deploy every agreement which the checkpoint does not already record
+        as deployed and write the registry.  Returns the registry.
+        """
+        self.agreements = {agreement.id: agreement for agreement in agreements}
+        self.confirm_submitted()
+
+        remaining = [
+            agreement
+            for agreement in agreements
+            if agreement.id not in self.checkpoint.entries
+        ]
+        nonce = self.web3.eth.getTransactionCount(self.sender, 'pending')
+
+        for start in range(0, len(remaining), self.window_size):
+            window = remaining[start:start + self.window_size]
+            for agreement in window:
+                self.send(agreement, nonce)
+                nonce += 1
+            self.confirm_submitted()
+
+        return self.write_registry(agreements)
+
+    def send(self, agreement, nonce):
+        """
+        Record `nonce` for `agreement` in the checkpoint, then send its
+        transaction and record the hash.
+        """
+        self.checkpoint.record_intent(agreement.id, nonce, self.web3.eth.blockNumber)
+        txn_hash = self.submit(agreement, nonce)
+        self.checkpoint.record_submission(agreement.id, txn_hash)
+        return txn_hash
+
+    def submit(self, agreement, nonce):
+        transaction = {'from': self.sender}
+        if self.explicit_nonces:
+            transaction['nonce'] = nonce
+        if self.gas is not None:
+            transaction['gas'] = self.gas
+
+        function_name, args = create_call(agreement)
+        return getattr(self.factory.transact(transaction), function_name)(*args)
+
+    def confirm_submitted(self):
+        """
+        Wait for the receipt of every submitted transaction which does not
+        have one yet.  A transaction the node no longer knows about is
+        handled by `resend_dropped`.  One which failed is forgotten so that
+        its agreement is deployed again.
+        """
+        self.reconcile_unsent()
+
+        mined_count = self.web3.eth.getTransactionCount(self.sender)
+        unconfirmed = self.checkpoint.unconfirmed
+        for agreement_id, txn_hash in list(unconfirmed.items()):
+            if self.web3.eth.getTransaction(txn_hash) is None:
+                txn_hash = self.resend_dropped(agreement_id, mined_count)
+                if txn_hash is None:
+                    del unconfirmed[agreement_id]
+                else:
+                    unconfirmed[agreement_id] = txn_hash
+
+        receipts = self.wait_for_receipts(list(unconfirmed.values()))
+        for agreement_id, txn_hash in unconfirmed.items():
+            txn_receipt = receipts[txn_hash]
+            address = get_created_address(txn_receipt, self.factory.address)
+            if address is None:
+                self.checkpoint.discard(agreement_id)
+            else:
+                self.checkpoint.record_receipt(
+                    agreement_id,
+                    address,
+                    txn_receipt['blockNumber'],
+                )
+        self.checkpoint.save()
+
+    def reconcile_unsent(self):
+        """
+        Look on chain for the transaction of every agreement whose hash was
+        never recorded, because the run stopped while it was being sent.
+        One which is found is recorded as submitted.  The rest are treated
+        as dropped.
+        """
+        mined_count = self.web3.eth.getTransactionCount(self.sender)
+        for agreement_id, entry in self.checkpoint.unsent.items():
+            txn_hash = self.find_transaction(agreement_id, entry)
+            if txn_hash is not None:
+                self.checkpoint.record_submission(agreement_id, txn_hash)
+            else:
+                self.resend_dropped(agreement_id, mined_count)
+
+    def resend_dropped(self, agreement_id, mined_count):
+        """
+        Deal with an agreement whose transaction the node does not know
+        about.  With explicit nonces, an agreement whose nonce is not yet
+        mined is sent again with that nonce.  This fills the gap which would
+        otherwise hold up every later transaction.  Any other agreement is
+        forgotten so that it is deployed again with a new nonce.  Returns
+        the hash of the new transaction, if one was sent.
+        """
+        entry = self.checkpoint.entries[agreement_id]
+        agreement = self.agreements.get(agreement_id)
+        if self.explicit_nonces and agreement is not None and entry['nonce'] >= mined_count:
+            return self.send(agreement, entry['nonce'])
+        self.checkpoint.discard(agreement_id)
+        return None
+
+    def find_transaction(self, agreement_id, entry):
+        """
+        The hash of the transaction sent for the checkpoint `entry` of
+        `agreement_id`, searched for among the transactions from the sender
+        to the factory with its call data since `sentAfterBlock`.  With
+        explicit nonces the nonce must match as well.  Returns `None` if
+        there is none.
+        """
+        agreement = self.agreements.get(agreement_id)
+        if agreement is None:
+            return None
+        function_name, args = create_call(agreement)
+        call_data = self.factory.encodeABI(function_name, args).lower()
+
+        for block_number in range(entry['sentAfterBlock'], self.web3.eth.blockNumber + 1):
+            block = self.web3.eth.getBlock(block_number, True)
+            for transaction in block['transactions']:
+                if transaction['from'].lower() != self.sender.lower():
+                    continue
+                if (transaction['to'] or '').lower() != self.factory.address.lower():
+                    continue
+                if transaction['input'].lower() != call_data:
+                    continue
+                if self.explicit_nonces and transaction['nonce'] != entry['nonce']:
+                    continue
+                return transaction['hash']
+        return None
+
+    def wait_for_receipts(self, txn_hashes):
+        """
+        Poll for the receipts of all of `txn_hashes` together, returning
+        them keyed by transaction hash.
+        """
+        receipts = {}
+        started_at = time.time()
+        while True:
+            for txn_hash in txn_hashes:
+                if txn_hash not in receipts:
+                    txn_receipt = self.web3.eth.getTransactionReceipt(txn_hash)
+                    if txn_receipt is not None:
+                        receipts[txn_hash] = txn_receipt
+            if len(receipts) == len(txn_hashes):
+                return receipts
+            if time.time() - started_at > self.timeout:
+                raise DeploymentTimeout(
+                    "{0} transactions were not mined within {1} seconds".format(
+                        len(txn_hashes) - len(receipts),
+                        self.timeout,
+                    )
+                )
+            time.sleep(self.poll_interval)
+
+    def write_registry(self, agreements):
+        deployed = self.checkpoint.deployed
+        registry = {
+            'factory': self.factory.address,
+            'agreements': {
+                agreement.id: {
+                    'address': deployed[agreement.id]['address'],
+                    'transactionHash': deployed[agreement.id]['transactionHash'],
+                    'blockNumber': deployed[agreement.id]['blockNumber'],
+                    'unlockAt': agreement.unlockAt,
+                }
+                for agreement in agreements
+                if agreement.id in deployed
+            },
+        }
+        write_json(self.registry_path, registry)
+        return registry
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('manifest', help='path to a .csv or .json manifest')
+    parser.add_argument('--factory', required=True, help='MultiSignatureFactory address')
+    parser.add_argument('--from', dest='sender', required=True, help='sending account')
+    parser.add_argument('--chain', default='mainnet', help='populus chain name')
+    parser.add_argument('--checkpoint', help='defaults to MANIFEST.checkpoint.json')
+    parser.add_argument('--registry', default='registry.json')
+    parser.add_argument('--window-size', type=int, default=DEFAULT_WINDOW_SIZE)
+    parser.add_argument('--gas', type=int)
+    args = parser.parse_args(argv)
+
+    from populus import Project
+
+    agreements = load_manifest(args.manifest)
+
+    with Project().get_chain(args.chain) as chain:
+        MultiSignatureFactory = chain.contract_factories.MultiSignatureFactory
+        deployer = Deployer(
+            chain.web3,
+            MultiSignatureFactory(address=args.factory),
+            args.sender,
+            args.checkpoint or args.manifest + '.checkpoint.json',
+            args.registry,
+            window_size=args.window_size,
+            gas=args.gas,
+        )
+        registry = deployer.deploy(agreements)
+
+    print("Deployed {0} of {1} agreements to {2}".format(
+        len(registry['agreements']),
+        len(agreements),
+        args.registry,
+    ))
+    return 0 if len(registry['agreements']) == len(agreements) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,20 @@
+import {MintableToken} from "tests/StandardToken.sol";
+
+
+/*
+ *  Token whose `transfer` throws while `broken` is set.
+ */
+contract BrokenToken is MintableToken {
+    bool public broken;
+
+    function setBroken(bool _broken) public {
+        broken = _broken;
+    }
+
+    function transfer(address _to, uint256 _value) returns (bool success) {
+        if (broken) {
+            throw;
+        }
+        return super.transfer(_to, _value);
+    }
+}
@@ -0,0 +1,20 @@
+import {MintableToken} from "tests/StandardToken.sol";
+
+
+/*
+ *  Token which records how many times `balanceOf` is called from within a
+ *  transaction.  Calls made via `eth_call` are not persisted so only lookups
+ *  made by other contracts are counted.
+ */
+contract CountingToken is MintableToken {
+    uint public balanceOfCalls;
+
+    function balanceOf(address _owner) constant returns (uint256 balance) {
+        balanceOfCalls += 1;
+        return balances[_owner];
+    }
+
+    function resetBalanceOfCalls() public {
+        balanceOfCalls = 0;
+    }
+}
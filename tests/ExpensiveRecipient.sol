@@ -0,0 +1,22 @@
+import {MultiSignature} from "contracts/MultiSig.sol";
+
+
+/*
+ *  Contract party whose fallback function writes to storage, which costs
+ *  more than the stipend that comes with a `send`.
+ */
+contract ExpensiveRecipient {
+    uint public numPayments;
+
+    function depositEther(address multisig) public returns (bool) {
+        return MultiSignature(multisig).depositEther.value(msg.value)();
+    }
+
+    function withdraw(address multisig) public returns (bool) {
+        return MultiSignature(multisig).withdraw();
+    }
+
+    function() {
+        numPayments += 1;
+    }
+}
@@ -0,0 +1,64 @@
+/*
+ *  The trapdoor as it was before `Trapdoor`, with one mapping entry per
+ *  signer, kept to benchmark `Trapdoor` against.
+ */
+contract MappingTrapdoor {
+    address public trapdoorA;
+    address public trapdoorB;
+    address public trapdoorC;
+
+    mapping (address => bytes32) public trapdoorData;
+
+    event TrapdoorInitiated(address _from, bytes32 _hash);
+    event TrapdoorExecuted(bytes32 _hash);
+
+    function MappingTrapdoor(address[3] rescuers) {
+        trapdoorA = rescuers[0];
+        trapdoorB = rescuers[1];
+        trapdoorC = rescuers[2];
+    }
+
+    modifier onlyTrapdoorMultiSig {
+        if (msg.sender == trapdoorA || msg.sender == trapdoorB || msg.sender == trapdoorC) {
+            _
+            // _;  // if solc 0.4.x
+        } else {
+            throw;
+        }
+    }
+
+    function trapdoor(address to,
+                      uint callValue,
+                      bytes callData) public
+                                      onlyTrapdoorMultiSig
+                                      returns (bool)
+    {
+        bytes32 executionHash = sha3(to, callValue, callData);
+        trapdoorData[msg.sender] = executionHash;
+
+        TrapdoorInitiated(msg.sender, executionHash);
+
+        uint numSigs;
+
+        if (trapdoorData[trapdoorA] == executionHash) {
+            numSigs += 1;
+        }
+
+        if (trapdoorData[trapdoorB] == executionHash) {
+            numSigs += 1;
+        }
+
+        if (trapdoorData[trapdoorC] == executionHash) {
+            numSigs += 1;
+        }
+
+        if (numSigs >= 2) {
+            trapdoorData[trapdoorA] = 0x0;
+            trapdoorData[trapdoorB] = 0x0;
+            trapdoorData[trapdoorC] = 0x0;
+
+            bool result = to.call.value(callValue)(callData);
+            TrapdoorExecuted(executionHash);
+        }
+    }
+}
@@ -0,0 +1,11 @@
+import {Trapdoor} from "contracts/Trapdoor.sol";
+
+
+/*
+ *  `Trapdoor` on its own, benchmarked against `MappingTrapdoor`.
+ */
+contract TrapdoorHarness is Trapdoor {
+    function TrapdoorHarness(address[3] rescuers) {
+        setTrapdoorSigners(rescuers);
+    }
+}
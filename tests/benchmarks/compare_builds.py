@@ -0,0 +1,221 @@
+"""
+Differential harness comparing builds of the contracts across `solc`
+versions and optimizer settings.
+
+Each build is given as `SOLC_BINARY[:OPTIMIZE_RUNS]`, leaving out the run
+count to compile without the optimizer:
+
+    python tests/benchmarks/compare_builds.py \\
+        --build solc-0.3.5 --build solc-0.3.6 --build solc-0.3.6:200
+
+The contracts use pre-0.4 syntax, such as a bare `_` in modifiers, so only
+`solc` 0.3.x binaries can build them.
+
+For every build the full test suite is run in a subprocess against the
+artifacts of that build, and the runtime bytecode size of each contract and
+the gas used by each benchmark scenario are reported side by side.  Any
+arguments after `--` are passed through to `py.test`.
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Builds are compared on behaviour, so gas regressions against the recorded
+# baseline must not fail the suite.
+NO_REGRESSION_THRESHOLD = '1000000'
+
+SIZED_CONTRACTS = (
+    'MultiSignature',
+    'MultiSignatureFactory',
+    'MultiSignatureProxy',
+    'MultiSignatureReader',
+    'BatchedMultiSignature',
+    'MultiTokenMultiSignature',
+)
+
+
+class Build(object):
+    def __init__(self, solc_binary, optimize_runs=None):
+        self.solc_binary = solc_binary
+        self.optimize_runs = optimize_runs
+
+    @property
+    def label(self):
+        if self.optimize_runs is None:
+            return os.path.basename(self.solc_binary)
+        return '{0}:{1}'.format(os.path.basename(self.solc_binary), self.optimize_runs)
+
+    @property
+    def compiler_settings(self):
+        if self.optimize_runs is None:
+            return {}
+        return {
+            'optimize': True,
+            'optimize_runs': self.optimize_runs,
+        }
+
+    def environ(self, report_path):
+        """
+        The environment the test suite for this build is run with.  See
+        `get_compiler_settings` in `tests/conftest.py`.
+        """
+        environ = dict(os.environ)
+        environ['SOLC_BINARY'] = self.solc_binary
+        environ.pop('MULTISIG_SOLC_OPTIMIZE_RUNS', None)
+        if self.optimize_runs is not None:
+            environ['MULTISIG_SOLC_OPTIMIZE_RUNS'] = str(self.optimize_runs)
+        environ['GAS_REPORT_PATH'] = report_path
+        environ['GAS_REGRESSION_THRESHOLD'] = NO_REGRESSION_THRESHOLD
+        environ.pop('GAS_UPDATE_BASELINE', None)
+        return environ
+
+
+def parse_build(spec):
+    """
+    Parse a `SOLC_BINARY[:OPTIMIZE_RUNS]` build specification.
+    """
+    solc_binary, _, optimize_runs = spec.rpartition(':')
+    if not solc_binary or not optimize_runs.isdigit():
+        return Build(spec)
+    return Build(solc_binary, int(optimize_runs))
+
+
+def bytecode_sizes(build):
+    """
+    The runtime bytecode size in bytes of each contract in `SIZED_CONTRACTS`
+    as compiled by `build`.
+    """
+    from solc import compile_files
+
+    source_files = sorted(
+        os.path.join('contracts', filename)
+        for filename in os.listdir(os.path.join(ROOT_DIR, 'contracts'))
+        if filename.endswith('.sol')
+    )
+    compiled_contracts = compile_files(
+        source_files,
+        solc_binary=build.solc_binary,
+        **build.compiler_settings
+    )
+    return {
+        name: len(compiled_contracts[name]['code_runtime'].replace('0x', '', 1)) // 2
+        for name in SIZED_CONTRACTS
+        if name in compiled_contracts
+    }
+
+
+def run_suite(build, pytest_args):
+    """
+    Run the test suite against `build`, returning whether it passed and the
+    gas used by each benchmark scenario.
+    """
+    report_dir = tempfile.mkdtemp()
+    report_path = os.path.join(report_dir, 'gas_report.json')
+    try:
+        returncode = subprocess.call(
+            [sys.executable, '-m', 'pytest', '-q'] + list(pytest_args or ['tests']),
+            cwd=ROOT_DIR,
+            env=build.environ(report_path),
+        )
+        try:
+            with open(report_path) as report_file:
+                scenarios = json.load(report_file)['scenarios']
+        except (IOError, ValueError):
+            scenarios = {}
+    finally:
+        shutil.rmtree(report_dir)
+
+    gas_used = {
+        scenario: measurement['gasUsed']
+        for scenario, measurement in scenarios.items()
+    }
+    return returncode == 0, gas_used
+
+
+def format_comparison(results):
+    """
+    Format the results of each build as a table with one column per build.
+    """
+    header = ['', ] + [result['build'] for result in results]
+    rows = [
+        ['tests'] + ['passed' if result['passed'] else 'FAILED' for result in results],
+    ]
+
+    contract_names = sorted(set().union(*(result['bytecodeSize'] for result in results)))
+    for name in contract_names:
+        rows.append(['size {0}'.format(name)] + [
+            str(result['bytecodeSize'].get(name, '-')) for result in results
+        ])
+
+    scenarios = sorted(set().union(*(result['gasUsed'] for result in results)))
+    for scenario in scenarios:
+        rows.append(['gas {0}'.format(scenario)] + [
+            str(result['gasUsed'].get(scenario, '-')) for result in results
+        ])
+
+    widths = [
+        max(len(row[column]) for row in [header] + rows)
+        for column in range(len(header))
+    ]
+    return '\n'.join(
+        '  '.join(
+            cell.ljust(width) if column == 0 else cell.rjust(width)
+            for column, (cell, width) in enumerate(zip(row, widths))
+        ).rstrip()
+        for row in [header] + rows
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        '--build',
+        action='append',
+        dest='builds',
+        required=True,
+        type=parse_build,
+        help='SOLC_BINARY[:OPTIMIZE_RUNS], may be given several times',
+    )
+    parser.add_argument(
+        '--output',
+        help='also write the results as JSON to this path',
+    )
+    parser.add_argument('pytest_args', nargs='*')
+    args = parser.parse_args(argv)
+
+    # The contracts import each other by paths relative to the project root.
+    os.chdir(ROOT_DIR)
+
+    results = []
+    for build in args.builds:
+        passed, gas_used = run_suite(build, args.pytest_args)
+        results.append({
+            'build': build.label,
+            'solcBinary': build.solc_binary,
+            'optimizeRuns': build.optimize_runs,
+            'passed': passed,
+            'bytecodeSize': bytecode_sizes(build),
+            'gasUsed': gas_used,
+        })
+
+    print(format_comparison(results))
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2, sort_keys=True)
+            output_file.write('\n')
+
+    return 0 if all(result['passed'] for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
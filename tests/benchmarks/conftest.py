@@ -0,0 +1,143 @@
+import json
+import os
+import warnings
+
+import pytest
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'gas_baseline.json')
+
+# Fraction by which a measurement may exceed its baseline before failing.
+DEFAULT_REGRESSION_THRESHOLD = 0.02
+
+
+class MissingGasBaseline(UserWarning):
+    pass
+
+
+class GasReport(object):
+    """
+    Collects the `gasUsed` of each benchmarked scenario and compares it to
+    the recorded baseline.  A scenario without a baseline entry fails,
+    or only warns if `allow_missing_baseline` is set.
+    """
+    def __init__(self, baseline, threshold, allow_missing_baseline=False):
+        self.baseline = baseline
+        self.threshold = threshold
+        self.allow_missing_baseline = allow_missing_baseline
+        self.measurements = {}
+
+    def limit_for(self, scenario):
+        if scenario not in self.baseline:
+            return None
+        return int(self.baseline[scenario] * (1 + self.threshold))
+
+    def record(self, scenario, gas_used):
+        if scenario in self.measurements:
+            raise ValueError("Scenario {0} was measured twice".format(scenario))
+        self.measurements[scenario] = gas_used
+
+        limit = self.limit_for(scenario)
+        if limit is None:
+            message = "No gas baseline for {0}, used {1}".format(scenario, gas_used)
+            if not self.allow_missing_baseline:
+                pytest.fail(message)
+            warnings.warn(message, MissingGasBaseline)
+        elif gas_used > limit:
+            pytest.fail(
+                "Gas regression in {0}: used {1}, baseline {2}, limit {3}".format(
+                    scenario,
+                    gas_used,
+                    self.baseline[scenario],
+                    limit,
+                )
+            )
+
+    def as_dict(self):
+        return {
+            'threshold': self.threshold,
+            'scenarios': {
+                scenario: {
+                    'gasUsed': gas_used,
+                    'baseline': self.baseline.get(scenario),
+                    'limit': self.limit_for(scenario),
+                }
+                for scenario, gas_used in self.measurements.items()
+            },
+        }
+
+
+def load_baseline():
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH) as baseline_file:
+        return json.load(baseline_file)
+
+
+def write_json(path, value):
+    with open(path, 'w') as output_file:
+        json.dump(value, output_file, indent=2, sort_keys=True)
+        output_file.write('\n')
+
+
+@pytest.yield_fixture(scope='session')
+def gas_report(xdist_worker_id):
+    """
+    The session's gas measurements.  Configured through the environment:
+
+    - GAS_REGRESSION_THRESHOLD: allowed fractional increase over the
+      baseline (default 0.02).
+    - GAS_REPORT_PATH: where the JSON report is written (default
+      `gas_report.json`).
+    - GAS_UPDATE_BASELINE: when set, the measurements replace the baseline
+      in `tests/benchmarks/gas_baseline.json`.
+    - GAS_ALLOW_MISSING_BASELINE: when set, scenarios without a baseline
+      entry only warn instead of failing.  Always the case while updating
+      the baseline.
+
+    Under pytest-xdist each worker writes its measurements next to the
+    report, suffixed with its worker id, and `merge_worker_gas_reports` in
+    `tests/conftest.py` combines them once all workers are done.
+    """
+    threshold = float(os.environ.get(
+        'GAS_REGRESSION_THRESHOLD',
+        DEFAULT_REGRESSION_THRESHOLD,
+    ))
+    update_baseline = bool(os.environ.get('GAS_UPDATE_BASELINE'))
+    allow_missing_baseline = update_baseline or bool(os.environ.get('GAS_ALLOW_MISSING_BASELINE'))
+    report = GasReport(load_baseline(), threshold, allow_missing_baseline)
+
+    yield report
+
+    report_path = os.environ.get('GAS_REPORT_PATH', 'gas_report.json')
+
+    if xdist_worker_id is not None:
+        write_json('{0}.{1}'.format(report_path, xdist_worker_id), report.as_dict())
+        return
+
+    write_json(report_path, report.as_dict())
+
+    if update_baseline:
+        baseline = dict(report.baseline)
+        baseline.update(report.measurements)
+        write_json(BASELINE_PATH, baseline)
+
+
+@pytest.fixture()
+def record_gas(request, web3, gas_report):
+    """
+    Record the gas used by a transaction.  Scenarios run against a
+    `MultiSignatureFactory` clone are reported under a `clone.` prefix.
+    """
+    if 'multisig_variant' in request.fixturenames:
+        variant = request.getfixturevalue('multisig_variant')
+    else:
+        variant = 'contract'
+
+    def _record_gas(scenario, txn_hash):
+        if variant != 'contract':
+            scenario = '{0}.{1}'.format(variant, scenario)
+        txn_receipt = web3.eth.getTransactionReceipt(txn_hash)
+        gas_report.record(scenario, txn_receipt['gasUsed'])
+        return txn_receipt['gasUsed']
+    return _record_gas
@@ -0,0 +1,61 @@
+import pytest
+
+from compare_builds import (
+    format_comparison,
+    parse_build,
+)
+
+
+@pytest.fixture(autouse=True)
+def chain_state():
+    # These tests never touch a chain, so the autouse `chain_state` of
+    # `tests/conftest.py`, which needs one, is replaced with a no-op.
+    pass
+
+
+def test_parse_build():
+    build = parse_build('/usr/local/bin/solc-0.3.6')
+    assert build.solc_binary == '/usr/local/bin/solc-0.3.6'
+    assert build.optimize_runs is None
+    assert build.compiler_settings == {}
+    assert build.label == 'solc-0.3.6'
+
+    build = parse_build('/usr/local/bin/solc-0.3.5:200')
+    assert build.solc_binary == '/usr/local/bin/solc-0.3.5'
+    assert build.optimize_runs == 200
+    assert build.compiler_settings == {'optimize': True, 'optimize_runs': 200}
+    assert build.label == 'solc-0.3.5:200'
+
+
+def test_build_environ():
+    environ = parse_build('solc-0.3.5:200').environ('report.json')
+    assert environ['SOLC_BINARY'] == 'solc-0.3.5'
+    assert environ['MULTISIG_SOLC_OPTIMIZE_RUNS'] == '200'
+    assert environ['GAS_REPORT_PATH'] == 'report.json'
+
+    environ = parse_build('solc-0.3.5').environ('report.json')
+    assert 'MULTISIG_SOLC_OPTIMIZE_RUNS' not in environ
+
+
+def test_format_comparison():
+    table = format_comparison([
+        {
+            'build': 'solc-0.3.6',
+            'passed': True,
+            'bytecodeSize': {'MultiSignature': 5120},
+            'gasUsed': {'lock': 30000, 'withdrawEther': 25000},
+        },
+        {
+            'build': 'solc-0.3.5:200',
+            'passed': False,
+            'bytecodeSize': {'MultiSignature': 4096},
+            'gasUsed': {'lock': 28000},
+        },
+    ])
+    assert table.splitlines() == [
+        '                     solc-0.3.6  solc-0.3.5:200',
+        'tests                    passed          FAILED',
+        'size MultiSignature        5120            4096',
+        'gas lock                  30000           28000',
+        'gas withdrawEther         25000               -',
+    ]
@@ -0,0 +1,337 @@
+import pytest
+
+from escrow.trapdoor import (
+    encode_batch,
+    encode_token_transfer,
+)
+
+
+def test_deployment_gas(MultiSignature,
+                        record_gas,
+                        mintable_token,
+                        party_a,
+                        party_b,
+                        arbiter,
+                        trapdoor_a,
+                        trapdoor_b,
+                        trapdoor_c,
+                        ether_min_deposit,
+                        token_min_deposit,
+                        unlock_at):
+    deploy_txn_hash = MultiSignature.deploy(kwargs={
+        'participants': [party_a, party_b, arbiter],
+        'rescuers': [trapdoor_a, trapdoor_b, trapdoor_c],
+        '_ethDepositMinimum': ether_min_deposit,
+        '_tokenDepositMinimum': token_min_deposit,
+        '_tokenAddress': mintable_token.address,
+        '_unlockAt': unlock_at,
+        '_contractTerms': "Everyone promises to be on their best behavior",
+    })
+
+    record_gas('deploy', deploy_txn_hash)
+
+
+def test_create_multisig_gas(multisig_factory,
+                             record_gas,
+                             mintable_token,
+                             party_a,
+                             party_b,
+                             arbiter,
+                             trapdoor_a,
+                             trapdoor_b,
+                             trapdoor_c,
+                             ether_min_deposit,
+                             token_min_deposit,
+                             unlock_at):
+    txn_hash = multisig_factory.transact().createMultiSignature(
+        [party_a, party_b, arbiter],
+        [trapdoor_a, trapdoor_b, trapdoor_c],
+        ether_min_deposit,
+        token_min_deposit,
+        mintable_token.address,
+        unlock_at,
+        "Everyone promises to be on their best behavior",
+    )
+
+    record_gas('createMultiSignature', txn_hash)
+
+
+def test_deposit_ether_gas(multisig, record_gas, party_a, ether_min_deposit, State):
+    txn_hash = multisig.transact({
+        'from': party_a,
+        'value': ether_min_deposit,
+    }).depositEther()
+
+    record_gas('depositEther', txn_hash)
+    assert multisig.call().currentState() == State.WaitingForTokens
+
+
+def test_deposit_token_via_approval_gas(multisig,
+                                        mintable_token,
+                                        record_gas,
+                                        party_b,
+                                        token_min_deposit,
+                                        State):
+    mintable_token.transact({
+        'from': party_b,
+    }).approve(multisig.address, token_min_deposit)
+
+    txn_hash = multisig.transact({
+        'from': party_b,
+    }).depositToken()
+
+    record_gas('depositToken.approval', txn_hash)
+    assert multisig.call().currentState() == State.WaitingForEther
+
+
+def test_deposit_token_after_direct_transfer_gas(multisig,
+                                                 mintable_token,
+                                                 record_gas,
+                                                 party_b,
+                                                 token_min_deposit,
+                                                 State):
+    mintable_token.transact({
+        'from': party_b,
+    }).transfer(multisig.address, token_min_deposit - 1)
+    mintable_token.transact({
+        'from': party_b,
+    }).approve(multisig.address, 1)
+
+    txn_hash = multisig.transact({
+        'from': party_b,
+    }).depositToken()
+
+    record_gas('depositToken.direct_transfer', txn_hash)
+    assert multisig.call().currentState() == State.WaitingForEther
+
+
+def test_lock_gas(multisig, record_gas, arbiter, with_both_deposits, State):
+    txn_hash = multisig.transact({
+        'from': arbiter,
+    }).lock()
+
+    record_gas('lock', txn_hash)
+    assert multisig.call().currentState() == State.Locked
+
+
+def test_refund_ether_gas(web3, multisig, record_gas, party_a, with_ether_deposit):
+    txn_hash = multisig.transact({
+        'from': party_a,
+    }).refundEther()
+
+    record_gas('refundEther', txn_hash)
+    assert multisig.call().creditA() == web3.eth.getBalance(multisig.address)
+
+    txn_hash = multisig.transact({
+        'from': party_a,
+    }).withdraw()
+
+    record_gas('withdraw.partyA', txn_hash)
+    assert web3.eth.getBalance(multisig.address) == 0
+
+
+def test_refund_tokens_gas(multisig, mintable_token, record_gas, party_b, with_token_deposit):
+    txn_hash = multisig.transact({
+        'from': party_b,
+    }).refundTokens()
+
+    record_gas('refundTokens', txn_hash)
+    assert mintable_token.call().balanceOf(multisig.address) == 0
+
+
+def test_withdraw_ether_gas(web3, multisig, record_gas, party_b, with_both_deposits_and_locked):
+    txn_hash = multisig.transact({
+        'from': party_b,
+    }).withdrawEther()
+
+    record_gas('withdrawEther', txn_hash)
+    assert multisig.call().creditB() == web3.eth.getBalance(multisig.address)
+
+    txn_hash = multisig.transact({
+        'from': party_b,
+    }).withdraw()
+
+    record_gas('withdraw.partyB', txn_hash)
+    assert web3.eth.getBalance(multisig.address) == 0
+
+
+def test_vote_gas(multisig, mintable_token, record_gas, party_a, party_b, arbiter, after_unlock):
+    txn_hash = multisig.transact({
+        'from': party_a,
+    }).submitPartyAVote(party_b)
+    record_gas('submitPartyAVote', txn_hash)
+
+    txn_hash = multisig.transact({
+        'from': party_b,
+    }).submitPartyBVote(party_a)
+    record_gas('submitPartyBVote', txn_hash)
+
+    # The second vote for partyB settles the contract and sends the tokens.
+    txn_hash = multisig.transact({
+        'from': arbiter,
+    }).submitArbiterVote(party_b)
+    record_gas('submitArbiterVote.settle', txn_hash)
+
+    assert multisig.call().arbiterVote() == party_b
+    assert mintable_token.call().balanceOf(multisig.address) == 0
+
+
+def test_withdraw_tokens_gas(multisig,
+                             mintable_token,
+                             record_gas,
+                             party_a,
+                             party_b,
+                             after_unlock):
+    multisig.transact({
+        'from': party_a,
+    }).submitPartyAVote(party_b)
+    multisig.transact({
+        'from': party_b,
+    }).submitPartyBVote(party_b)
+
+    # Only tokens which arrive after the settling vote are left for
+    # `withdrawTokens` to send.
+    mintable_token.transact().mint(multisig.address, 12345)
+
+    txn_hash = multisig.transact({
+        'from': party_a,
+    }).withdrawTokens()
+
+    record_gas('withdrawTokens', txn_hash)
+    assert mintable_token.call().balanceOf(multisig.address) == 0
+
+
+@pytest.mark.parametrize(
+    'first,second',
+    (
+        ('A', 'B'),
+        ('A', 'C'),
+        ('B', 'A'),
+        ('B', 'C'),
+        ('C', 'A'),
+        ('C', 'B'),
+    )
+)
+def test_trapdoor_gas(multisig,
+                      txn_recorder,
+                      record_gas,
+                      trapdoor_a,
+                      trapdoor_b,
+                      trapdoor_c,
+                      with_both_deposits_and_locked,
+                      first,
+                      second):
+    signers = {
+        'A': trapdoor_a,
+        'B': trapdoor_b,
+        'C': trapdoor_c,
+    }
+
+    txn_hash = multisig.transact({
+        'from': signers[first],
+    }).trapdoor(txn_recorder.address, 12345, 'some-data')
+    record_gas('trapdoor.{0}{1}.initiate'.format(first, second), txn_hash)
+
+    txn_hash = multisig.transact({
+        'from': signers[second],
+    }).trapdoor(txn_recorder.address, 12345, 'some-data')
+    record_gas('trapdoor.{0}{1}.execute'.format(first, second), txn_hash)
+
+    assert txn_recorder.call().wasCalled() is True
+
+
+def test_trapdoor_disagreement_gas(multisig,
+                                   txn_recorder,
+                                   record_gas,
+                                   trapdoor_a,
+                                   trapdoor_b,
+                                   trapdoor_c,
+                                   with_both_deposits_and_locked):
+    multisig.transact({
+        'from': trapdoor_a,
+    }).trapdoor(txn_recorder.address, 12345, 'some-data')
+
+    txn_hash = multisig.transact({
+        'from': trapdoor_c,
+    }).trapdoor(txn_recorder.address, 54321, 'some-data')
+    record_gas('trapdoor.disagreement.ignored', txn_hash)
+
+    txn_hash = multisig.transact({
+        'from': trapdoor_b,
+    }).trapdoor(txn_recorder.address, 12345, 'some-data')
+    record_gas('trapdoor.disagreement.execute', txn_hash)
+
+    assert txn_recorder.call().wasCalled() is True
+
+
+@pytest.mark.parametrize(
+    'first,second',
+    (
+        ('A', 'B'),
+        ('A', 'C'),
+        ('B', 'A'),
+        ('B', 'C'),
+        ('C', 'A'),
+        ('C', 'B'),
+    )
+)
+def test_trapdoor_gas_against_mapping_trapdoor(deploy_contract,
+                                               MappingTrapdoor,
+                                               TrapdoorHarness,
+                                               txn_recorder,
+                                               record_gas,
+                                               trapdoor_a,
+                                               trapdoor_b,
+                                               trapdoor_c,
+                                               first,
+                                               second):
+    signers = {
+        'A': trapdoor_a,
+        'B': trapdoor_b,
+        'C': trapdoor_c,
+    }
+    rescuers = [trapdoor_a, trapdoor_b, trapdoor_c]
+
+    for name, ContractFactory in (('mapping', MappingTrapdoor), ('shared', TrapdoorHarness)):
+        contract = deploy_contract(ContractFactory, args=[rescuers])
+        for stage, signer in (('initiate', first), ('execute', second)):
+            txn_hash = contract.transact({
+                'from': signers[signer],
+            }).trapdoor(txn_recorder.address, 0, 'some-data')
+            record_gas(
+                'trapdoor.{0}.{1}{2}.{3}'.format(name, first, second, stage),
+                txn_hash,
+            )
+        assert txn_recorder.call().wasCalled() is True
+        txn_recorder.transact().__reset__()
+
+
+def test_trapdoor_batch_recovery_gas(web3,
+                                     multisig,
+                                     mintable_token,
+                                     record_gas,
+                                     party_a,
+                                     party_b,
+                                     trapdoor_a,
+                                     trapdoor_b,
+                                     with_both_deposits_and_locked):
+    calls = [
+        (party_a, web3.eth.getBalance(multisig.address), b''),
+        (
+            mintable_token.address,
+            0,
+            encode_token_transfer(party_b, mintable_token.call().balanceOf(multisig.address)),
+        ),
+    ]
+
+    txn_hash = multisig.transact({
+        'from': trapdoor_a,
+    }).trapdoorBatch(*encode_batch(calls))
+    record_gas('trapdoorBatch.recovery.initiate', txn_hash)
+
+    txn_hash = multisig.transact({
+        'from': trapdoor_b,
+    }).trapdoorBatch(*encode_batch(calls))
+    record_gas('trapdoorBatch.recovery.execute', txn_hash)
+
+    assert web3.eth.getBalance(multisig.address) == 0
@@ -1,61 +1,158 @@
 import pytest
 
 import os
+import glob
+import json
+import hashlib
 
-import rlp
+from testrpc import testrpc
 
-from ethereum import blocks
 
-from web3.utils.encoding import (
-    decode_hex,
-)
+@pytest.fixture(scope='session')
+def project():
+    from populus import Project
+    return Project()
+
+
+@pytest.yield_fixture(scope='session')
+def chain(project):
+    """
+    A single chain is shared by the whole session.  Tests are isolated from
+    each other by reverting to one of the `ChainSnapshots` below rather than
+    by starting a fresh chain.
+
+    Under pytest-xdist every worker is a separate process running its own
+    in-process testrpc server, so each worker gets its own chain and
+    accounts.
+    """
+    with project.get_chain('testrpc') as chain:
+        yield chain
+
+
+def get_worker_id(config):
+    """
+    The pytest-xdist worker id (`gw0`, `gw1`, ...) of this process, or `None`
+    when not running under pytest-xdist.
+    """
+    worker_input = getattr(config, 'workerinput', getattr(config, 'slaveinput', None))
+    if worker_input is None:
+        return None
+    return worker_input['workerid']
+
+
+def get_tester_evm(web3):
+    """
+    The pyethereum tester state behind the testrpc server of this process.
+    All access to the evm goes through here rather than through the
+    `testrpc` module directly.
+    """
+    evm = testrpc.tester_client.evm
+    assert web3.eth.blockNumber == len(evm.blocks) - 1
+    return evm
+
+
+@pytest.fixture(scope='session')
+def tester_evm(chain):
+    return get_tester_evm(chain.web3)
+
+
+@pytest.fixture(scope='session')
+def xdist_worker_id(request):
+    return get_worker_id(request.config)
+
+
+def merge_worker_gas_reports(report_path, baseline_path, update_baseline):
+    """
+    Combine the gas reports written by each pytest-xdist worker into a single
+    report, and into the baseline if requested.  The per worker reports are
+    removed afterwards.
+    """
+    worker_report_paths = sorted(glob.glob(report_path + '.gw*'))
+    if not worker_report_paths:
+        return
+
+    merged_report = {'scenarios': {}}
+    for worker_report_path in worker_report_paths:
+        with open(worker_report_path) as worker_report_file:
+            worker_report = json.load(worker_report_file)
+        merged_report['threshold'] = worker_report['threshold']
+        merged_report['scenarios'].update(worker_report['scenarios'])
+        os.remove(worker_report_path)
+
+    with open(report_path, 'w') as report_file:
+        json.dump(merged_report, report_file, indent=2, sort_keys=True)
+        report_file.write('\n')
+
+    if update_baseline:
+        if os.path.exists(baseline_path):
+            with open(baseline_path) as baseline_file:
+                baseline = json.load(baseline_file)
+        else:
+            baseline = {}
+        baseline.update({
+            scenario: measurement['gasUsed']
+            for scenario, measurement in merged_report['scenarios'].items()
+        })
+        with open(baseline_path, 'w') as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write('\n')
+
+
+def pytest_sessionfinish(session):
+    # Only the pytest-xdist controller merges, once every worker has
+    # finished.  `tests/benchmarks/conftest.py` is not loaded by the
+    # controller since it never collects any tests, so the merge lives here.
+    if get_worker_id(session.config) is None:
+        merge_worker_gas_reports(
+            os.environ.get('GAS_REPORT_PATH', 'gas_report.json'),
+            os.path.join(os.path.dirname(__file__), 'benchmarks', 'gas_baseline.json'),
+            bool(os.environ.get('GAS_UPDATE_BASELINE')),
+        )
 
-from testrpc import testrpc
 
+@pytest.fixture(scope='session')
+def party_a(chain):
+    return chain.web3.eth.accounts[1]
 
-@pytest.fixture()
-def party_a(web3):
-    return web3.eth.accounts[1]
 
+@pytest.fixture(scope='session')
+def party_b(chain):
+    return chain.web3.eth.accounts[2]
 
-@pytest.fixture()
-def party_b(web3):
-    return web3.eth.accounts[2]
 
+@pytest.fixture(scope='session')
+def arbiter(chain):
+    return chain.web3.eth.accounts[3]
 
-@pytest.fixture()
-def arbiter(web3):
-    return web3.eth.accounts[3]
 
+@pytest.fixture(scope='session')
+def trapdoor_a(chain):
+    return chain.web3.eth.accounts[4]
 
-@pytest.fixture()
-def trapdoor_a(web3):
-    return web3.eth.accounts[4]
 
+@pytest.fixture(scope='session')
+def trapdoor_b(chain):
+    return chain.web3.eth.accounts[5]
 
-@pytest.fixture()
-def trapdoor_b(web3):
-    return web3.eth.accounts[5]
 
+@pytest.fixture(scope='session')
+def trapdoor_c(chain):
+    return chain.web3.eth.accounts[6]
 
-@pytest.fixture()
-def trapdoor_c(web3):
-    return web3.eth.accounts[6]
 
-
-@pytest.fixture()
+@pytest.fixture(scope='session')
 def ether_min_deposit(denoms):
     return 5 * denoms.ether
 
 
-@pytest.fixture()
-def token_min_deposit(denoms):
+@pytest.fixture(scope='session')
+def token_min_deposit():
     return 100
 
 
-@pytest.fixture()
-def unlock_at(web3):
-    latest_block = web3.eth.getBlock('latest')
+@pytest.fixture(scope='session')
+def unlock_at(chain):
+    latest_block = chain.web3.eth.getBlock('latest')
     return latest_block['timestamp'] + 60 * 60
 
 
@@ -64,91 +161,635 @@ def NULL_ADDRESS(web3):
     return '0x0000000000000000000000000000000000000000'
 
 
-@pytest.fixture()
-def multisig(chain,
-             web3,
-             party_a,
-             party_b,
-             arbiter,
-             trapdoor_a,
-             trapdoor_b,
-             trapdoor_c,
-             ether_min_deposit,
-             token_min_deposit,
-             unlock_at,
-             mintable_token):
-    contract = chain.get_contract('MultiSignature', deploy_kwargs={
-        'participants': [party_a, party_b, arbiter],
-        'rescuers': [trapdoor_a, trapdoor_b, trapdoor_c],
-        '_ethDepositMinimum': ether_min_deposit,
-        '_tokenDepositMinimum': token_min_deposit,
-        '_tokenAddress': mintable_token.address,
-        '_unlockAt': unlock_at,
-        '_contractTerms': "Everyone promises to be on their best behavior",
-    })
-
-    chain_code = web3.eth.getCode(contract.address)
-    assert len(chain_code) > 10
-
-    return contract
+COMPILE_CACHE_DIR = 'multisig-compiled-contracts'
 
 
-@pytest.fixture()
-def test_contract_factories(project, web3):
-    from solc import compile_files
+def get_solidity_source_files(contracts_dir):
     from populus.utils.filesystem import recursive_find_files
-    from populus.utils.contracts import (
-        package_contracts,
-        construct_contract_factories,
-    )
 
     base_tests_dir = os.path.dirname(__file__)
 
-    solidity_source_files = [
+    return sorted([
         os.path.relpath(contract_source_path)
         for contract_source_path
         in recursive_find_files(base_tests_dir, '*.sol')
     ] + [
         os.path.relpath(contract_source_path)
         for contract_source_path
-        in recursive_find_files(project.contracts_dir, '*.sol')
-    ]
-    compiled_contracts = compile_files(solidity_source_files)
-    test_contract_factories = construct_contract_factories(web3, compiled_contracts)
+        in recursive_find_files(contracts_dir, '*.sol')
+    ])
+
+
+def get_compiler_settings():
+    """
+    Optimizer settings passed to `solc`.  The optimizer is enabled by setting
+    `MULTISIG_SOLC_OPTIMIZE_RUNS` to the number of runs to optimize for.  The
+    `solc` binary itself is chosen with `SOLC_BINARY`, which `py-solc` reads.
+    """
+    optimize_runs = os.environ.get('MULTISIG_SOLC_OPTIMIZE_RUNS')
+    if not optimize_runs:
+        return {}
+    return {
+        'optimize': True,
+        'optimize_runs': int(optimize_runs),
+    }
+
+
+def get_compile_cache_key(solidity_source_files, compiler_settings):
+    """
+    Key for the compiled artifacts of the given source files.  Any change to
+    the path or contents of a source file, to the `solc` version or to the
+    optimizer settings results in a new key.
+    """
+    from solc import get_solc_version
+
+    source_hash = hashlib.sha256()
+    source_hash.update(str(get_solc_version()).encode('utf8'))
+    source_hash.update(json.dumps(compiler_settings, sort_keys=True).encode('utf8'))
+    for source_path in solidity_source_files:
+        source_hash.update(source_path.encode('utf8'))
+        with open(source_path, 'rb') as source_file:
+            source_hash.update(source_file.read())
+    return source_hash.hexdigest()
+
+
+def read_compile_cache(config, cache_key):
+    cache_path = config.cache.makedir(COMPILE_CACHE_DIR).join(cache_key + '.json')
+    try:
+        with open(str(cache_path)) as cache_file:
+            return json.load(cache_file)
+    except (IOError, ValueError):
+        return None
+
+
+def write_compile_cache(config, cache_key, compiled_contracts):
+    """
+    Write the compiled artifacts to the on disk cache.  Several pytest-xdist
+    workers may compile the same sources at once, so each writes to its own
+    temporary file which is then renamed into place.  Readers therefore
+    never see a partially written entry.
+    """
+    cache_dir = config.cache.makedir(COMPILE_CACHE_DIR)
+    cache_path = str(cache_dir.join(cache_key + '.json'))
+    temporary_path = '{0}.{1}.tmp'.format(cache_path, os.getpid())
+
+    with open(temporary_path, 'w') as temporary_file:
+        json.dump(compiled_contracts, temporary_file)
+    try:
+        os.rename(temporary_path, cache_path)
+    except OSError:
+        # Another worker won the race on a platform where `rename` does not
+        # replace existing files.  Its entry has the same contents.
+        os.remove(temporary_path)
+
+
+@pytest.fixture(scope='session')
+def compiled_contracts_cache():
+    """
+    In memory cache of compiled artifacts shared across the test session.
+    """
+    return {}
+
+
+@pytest.fixture(scope='session')
+def compiled_test_contracts(request, project, compiled_contracts_cache):
+    """
+    The compiled `tests/` and `contracts/` sources.  Compilation only happens
+    when neither the in memory cache nor the on disk pytest cache has an entry
+    for the current source contents, `solc` version and optimizer settings.
+    """
+    from solc import compile_files
+
+    solidity_source_files = get_solidity_source_files(project.contracts_dir)
+    compiler_settings = get_compiler_settings()
+    cache_key = get_compile_cache_key(solidity_source_files, compiler_settings)
+
+    if cache_key not in compiled_contracts_cache:
+        compiled_contracts = read_compile_cache(request.config, cache_key)
+        if compiled_contracts is None:
+            compiled_contracts = compile_files(solidity_source_files, **compiler_settings)
+            write_compile_cache(request.config, cache_key, compiled_contracts)
+        compiled_contracts_cache[cache_key] = compiled_contracts
+
+    return compiled_contracts_cache[cache_key]
+
+
+@pytest.fixture(scope='session')
+def test_contract_factories(chain, compiled_test_contracts):
+    from populus.utils.contracts import (
+        package_contracts,
+        construct_contract_factories,
+    )
+
+    test_contract_factories = construct_contract_factories(chain.web3, compiled_test_contracts)
     return package_contracts(test_contract_factories)
 
 
-@pytest.fixture()
+@pytest.fixture(scope='session')
 def MintableToken(test_contract_factories):
     return test_contract_factories.MintableToken
 
 
+@pytest.fixture(scope='session')
+def TransactionRecorder(test_contract_factories):
+    return test_contract_factories.TransactionRecorder
+
+
+@pytest.fixture(scope='session')
+def MultiSignature(test_contract_factories):
+    return test_contract_factories.MultiSignature
+
+
+@pytest.fixture(scope='session')
+def CountingToken(test_contract_factories):
+    return test_contract_factories.CountingToken
+
+
+@pytest.fixture(scope='session')
+def ExpensiveRecipient(test_contract_factories):
+    return test_contract_factories.ExpensiveRecipient
+
+
+@pytest.fixture(scope='session')
+def BrokenToken(test_contract_factories):
+    return test_contract_factories.BrokenToken
+
+
+@pytest.fixture(scope='session')
+def MappingTrapdoor(test_contract_factories):
+    return test_contract_factories.MappingTrapdoor
+
+
+@pytest.fixture(scope='session')
+def TrapdoorHarness(test_contract_factories):
+    return test_contract_factories.TrapdoorHarness
+
+
+def deploy_fresh_contract(chain, ContractFactory, args=None, kwargs=None, transaction=None):
+    """
+    Deploy a fresh instance of the given contract factory.  Unlike
+    `chain.get_contract` this never returns a previously deployed instance,
+    which matters since deployments are discarded when the chain is
+    reverted between tests.
+    """
+    deploy_txn_hash = ContractFactory.deploy(
+        transaction=transaction,
+        args=args,
+        kwargs=kwargs,
+    )
+    contract_address = chain.wait.for_contract_address(deploy_txn_hash)
+
+    chain_code = chain.web3.eth.getCode(contract_address)
+    assert len(chain_code) > 10
+
+    return ContractFactory(address=contract_address)
+
+
 @pytest.fixture()
-def mintable_token(chain, web3, MintableToken, party_b):
+def deploy_contract(chain):
+    def _deploy_contract(ContractFactory, args=None, kwargs=None, transaction=None):
+        return deploy_fresh_contract(chain, ContractFactory, args, kwargs, transaction)
+    return _deploy_contract
+
+
+def get_created_multisig_address(txn_receipt):
+    """
+    The address of the instance created by
+    `MultiSignatureFactory.createMultiSignature`, read from the indexed
+    `instance` argument of its `MultiSignatureCreated` event.
+    """
+    created_log = txn_receipt['logs'][-1]
+    return '0x' + created_log['topics'][1][-40:]
+
+
+@pytest.fixture(scope='session')
+def BatchedMultiSignature(test_contract_factories):
+    return test_contract_factories.BatchedMultiSignature
+
+
+@pytest.fixture(scope='session')
+def MultiTokenMultiSignature(test_contract_factories):
+    return test_contract_factories.MultiTokenMultiSignature
+
+
+@pytest.fixture(scope='session')
+def MultiSignatureFactory(test_contract_factories):
+    return test_contract_factories.MultiSignatureFactory
+
+
+@pytest.fixture(scope='session')
+def MultiSignatureReader(test_contract_factories):
+    return test_contract_factories.MultiSignatureReader
+
+
+MULTISIG_ARGUMENT_ORDER = (
+    'participants',
+    'rescuers',
+    '_ethDepositMinimum',
+    '_tokenDepositMinimum',
+    '_tokenAddress',
+    '_unlockAt',
+    '_contractTerms',
+)
+
+
+@pytest.fixture(scope='session')
+def genesis_contracts(chain,
+                      party_a,
+                      party_b,
+                      arbiter,
+                      trapdoor_a,
+                      trapdoor_b,
+                      trapdoor_c,
+                      ether_min_deposit,
+                      token_min_deposit,
+                      unlock_at,
+                      MultiSignature,
+                      MultiSignatureFactory,
+                      MintableToken,
+                      TransactionRecorder):
+    """
+    Every contract the tests interact with, deployed once per session.  The
+    chain state immediately after these deployments is the root of each
+    `ChainSnapshots` tree.
+    """
+    web3 = chain.web3
+
     chain.contract_factories['MintableToken'] = MintableToken
-    contract = chain.get_contract('MintableToken')
+    mintable_token = chain.get_contract('MintableToken')
 
-    chain_code = web3.eth.getCode(contract.address)
+    chain_code = web3.eth.getCode(mintable_token.address)
     assert len(chain_code) > 10
 
-    contract.transact().mint(party_b, 1000000)
-    assert contract.call().balanceOf(party_b) == 1000000
+    mintable_token.transact().mint(party_b, 1000000)
+    assert mintable_token.call().balanceOf(party_b) == 1000000
+
+    chain.contract_factories['TransactionRecorder'] = TransactionRecorder
+    txn_recorder = chain.get_contract('TransactionRecorder')
+
+    multisig_kwargs = {
+        'participants': [party_a, party_b, arbiter],
+        'rescuers': [trapdoor_a, trapdoor_b, trapdoor_c],
+        '_ethDepositMinimum': ether_min_deposit,
+        '_tokenDepositMinimum': token_min_deposit,
+        '_tokenAddress': mintable_token.address,
+        '_unlockAt': unlock_at,
+        '_contractTerms': "Everyone promises to be on their best behavior",
+    }
+
+    multisig = deploy_fresh_contract(chain, MultiSignature, kwargs=multisig_kwargs)
+
+    chain_code = web3.eth.getCode(multisig.address)
+    assert len(chain_code) > 10
+
+    implementation = deploy_fresh_contract(chain, MultiSignature, kwargs=multisig_kwargs)
+    multisig_factory = deploy_fresh_contract(
+        chain,
+        MultiSignatureFactory,
+        args=[implementation.address],
+    )
+
+    create_txn_hash = multisig_factory.transact().createMultiSignature(
+        *[multisig_kwargs[key] for key in MULTISIG_ARGUMENT_ORDER]
+    )
+    create_txn_receipt = chain.wait.for_receipt(create_txn_hash)
+    multisig_clone = MultiSignature(
+        address=get_created_multisig_address(create_txn_receipt),
+    )
+
+    chain_code = web3.eth.getCode(multisig_clone.address)
+    assert len(chain_code) > 10
+
+    return type(
+        'genesis_contracts',
+        (object,),
+        {
+            'mintable_token': mintable_token,
+            'txn_recorder': txn_recorder,
+            'multisig_kwargs': multisig_kwargs,
+            'multisig_factory': multisig_factory,
+            'multisigs': {
+                'contract': multisig,
+                'clone': multisig_clone,
+            },
+        },
+    )
+
+
+class EVMClock(object):
+    """
+    Controls the timestamp of the pending block, which is the `now` seen by
+    calls and by the next transaction.  Each jump only rewrites the pending
+    block header rather than sealing a block, so tests may make as many as
+    they like.
+    """
+    def __init__(self, evm):
+        self.evm = evm
+
+    @property
+    def now(self):
+        return self.evm.block.timestamp
+
+    def set(self, timestamp):
+        self.evm.block.header.timestamp = timestamp
+        return timestamp
+
+    def advance(self, seconds):
+        """
+        Move the clock forward by `seconds`.
+        """
+        return self.set(self.now + seconds)
+
+    def advance_to(self, timestamp):
+        """
+        Move the clock forward to `timestamp`, or leave it be if it is
+        already later.
+        """
+        return self.set(max(self.now, timestamp))
+
+    def advance_to_unlock(self, multisig, offset=0):
+        """
+        Move the clock forward to `offset` seconds past the `unlockAt` of
+        `multisig`.
+        """
+        return self.advance_to(multisig.call().unlockAt() + offset)
+
+
+def set_evm_timestamp(evm, timestamp):
+    return EVMClock(evm).set(timestamp)
+
+
+class ChainSnapshots(object):
+    """
+    A tree of named chain states.  Each state is built the first time it is
+    needed by reverting to its parent and running its builder, after which
+    the resulting chain state is snapshotted.  Every later request for that
+    state is a single revert.
+    """
+    def __init__(self, evm):
+        self.evm = evm
+        self.parents = {}
+        self.builders = {}
+        self.snapshots = {}
+
+    def register(self, name, parent, builder, also_includes=()):
+        """
+        Register the state `name` which is reached by running `builder`
+        against the `parent` state.  `also_includes` names any other states
+        which are implied by this one despite not being on its build path.
+        """
+        self.parents[name] = (parent,) + tuple(also_includes)
+        self.builders[name] = (parent, builder)
+
+    def ancestors(self, name):
+        ancestors = set()
+        for parent in self.parents.get(name, ()):
+            if parent is not None:
+                ancestors.add(parent)
+                ancestors.update(self.ancestors(parent))
+        return ancestors
+
+    def deepest(self, names):
+        """
+        The single state which satisfies every one of the requested `names`.
+        """
+        candidates = [
+            name
+            for name in names
+            if set(names).issubset(self.ancestors(name) | {name})
+        ]
+        if not candidates:
+            raise ValueError(
+                "No single chain state satisfies all of: {0}".format(
+                    ', '.join(sorted(names)),
+                )
+            )
+        return candidates[0]
+
+    def snapshot(self, name):
+        self.snapshots[name] = (
+            len(self.evm.blocks),
+            self.evm.block.timestamp,
+            self.evm.snapshot(),
+        )
 
-    return contract
+    def revert_to(self, name):
+        if name in self.snapshots:
+            num_blocks, timestamp, block_snapshot = self.snapshots[name]
+            self.evm.blocks = self.evm.blocks[:num_blocks - 1]
+            self.evm.revert(block_snapshot)
+            self.evm.blocks.append(self.evm.block)
+            # Restore the time explicitly since an `EVMClock` may have moved
+            # it without sealing a block.
+            set_evm_timestamp(self.evm, timestamp)
+        else:
+            parent, builder = self.builders[name]
+            self.revert_to(parent)
+            builder()
+            self.snapshot(name)
+
+
+def build_chain_snapshots(evm,
+                          web3,
+                          multisig,
+                          mintable_token,
+                          party_a,
+                          party_b,
+                          arbiter,
+                          ether_min_deposit,
+                          token_min_deposit,
+                          unlock_at,
+                          State):
+    snapshots = ChainSnapshots(evm)
+    snapshots.snapshot('genesis')
+
+    def deposit_ether():
+        assert multisig.call().currentState() in {State.Genesis, State.WaitingForEther}
+
+        multisig.transact({
+            'from': party_a,
+            'value': ether_min_deposit,
+        }).depositEther()
+
+        assert multisig.call().currentState() in {State.WaitingForTokens, State.WaitingForArbiterLock}
+        assert web3.eth.getBalance(multisig.address) == ether_min_deposit
+
+    def deposit_tokens():
+        assert multisig.call().currentState() in {State.Genesis, State.WaitingForTokens}
+
+        mintable_token.transact({
+            'from': party_b,
+        }).transfer(multisig.address, token_min_deposit)
+        # Direct transfers only count once they are reconciled.
+        multisig.transact().syncTokenBalance()
+
+        assert multisig.call().currentState() in {State.WaitingForEther, State.WaitingForArbiterLock}
+        assert mintable_token.call().balanceOf(multisig.address) == token_min_deposit
+
+    def lock():
+        assert multisig.call().currentState() == State.WaitingForArbiterLock
+
+        multisig.transact({
+            'from': arbiter,
+        }).lock()
+
+        assert multisig.call().currentState() == State.Locked
+
+    def unlock():
+        assert multisig.call().currentState() == State.Locked
+
+        set_evm_timestamp(evm, unlock_at)
+
+        assert multisig.call().currentState() == State.Unlocked
+
+    snapshots.register('with_ether_deposit', 'genesis', deposit_ether)
+    snapshots.register('with_token_deposit', 'genesis', deposit_tokens)
+    snapshots.register(
+        'with_both_deposits',
+        'with_ether_deposit',
+        deposit_tokens,
+        also_includes=('with_token_deposit',),
+    )
+    snapshots.register('with_both_deposits_and_locked', 'with_both_deposits', lock)
+    snapshots.register('after_unlock', 'with_both_deposits_and_locked', unlock)
+
+    return snapshots
+
+
+@pytest.fixture(scope='session')
+def chain_snapshots(chain,
+                    tester_evm,
+                    genesis_contracts,
+                    party_a,
+                    party_b,
+                    arbiter,
+                    ether_min_deposit,
+                    token_min_deposit,
+                    unlock_at,
+                    State):
+    """
+    One `ChainSnapshots` tree for each `multisig_variant`.  Both trees share
+    the same genesis state.
+    """
+    return {
+        variant: build_chain_snapshots(
+            tester_evm,
+            chain.web3,
+            multisig,
+            genesis_contracts.mintable_token,
+            party_a,
+            party_b,
+            arbiter,
+            ether_min_deposit,
+            token_min_deposit,
+            unlock_at,
+            State,
+        )
+        for variant, multisig in genesis_contracts.multisigs.items()
+    }
+
+
+@pytest.fixture(params=['contract', 'clone'])
+def multisig_variant(request):
+    """
+    Every test using the `multisig` fixture is run both against a directly
+    deployed `MultiSignature` and against one created by the
+    `MultiSignatureFactory`.
+    """
+    return request.param
+
+
+@pytest.fixture(autouse=True)
+def chain_state(request, chain_snapshots):
+    """
+    Restore the chain to the deepest snapshotted state requested by the test
+    (or to genesis if none were requested) with a single revert.
+    """
+    if 'multisig_variant' in request.fixturenames:
+        snapshots = chain_snapshots[request.getfixturevalue('multisig_variant')]
+    else:
+        snapshots = chain_snapshots['contract']
+
+    requested_states = [
+        name
+        for name in request.fixturenames
+        if name in snapshots.builders
+    ]
+    if requested_states:
+        snapshots.revert_to(snapshots.deepest(requested_states))
+    else:
+        snapshots.revert_to('genesis')
 
 
 @pytest.fixture()
-def TransactionRecorder(test_contract_factories):
-    return test_contract_factories.TransactionRecorder
+def multisig(chain_state, multisig_variant, genesis_contracts):
+    return genesis_contracts.multisigs[multisig_variant]
 
 
 @pytest.fixture()
-def txn_recorder(chain, TransactionRecorder):
-    chain.contract_factories['TransactionRecorder'] = TransactionRecorder
-    return chain.get_contract('TransactionRecorder')
+def multisig_factory(chain_state, genesis_contracts):
+    return genesis_contracts.multisig_factory
+
+
+@pytest.fixture()
+def create_multisig(chain,
+                    multisig_factory,
+                    MultiSignature,
+                    mintable_token,
+                    party_a,
+                    party_b,
+                    arbiter,
+                    trapdoor_a,
+                    trapdoor_b,
+                    trapdoor_c,
+                    ether_min_deposit,
+                    token_min_deposit,
+                    unlock_at):
+    """
+    Create a `MultiSignature` instance through `multisig_factory`, returning
+    the instance and the transaction receipt.  When `terms_hash` is given
+    the instance is created with `createMultiSignatureWithTermsHash`, with
+    `contract_terms` as the published terms or URI.  `unlock_at` defaults
+    to the `unlock_at` fixture.
+    """
+    default_unlock_at = unlock_at
+
+    def _create_multisig(contract_terms="Everyone promises to be on their best behavior",
+                         terms_hash=None,
+                         unlock_at=None,
+                         transaction=None):
+        transactor = multisig_factory.transact(transaction or {})
+        args = [
+            [party_a, party_b, arbiter],
+            [trapdoor_a, trapdoor_b, trapdoor_c],
+            ether_min_deposit,
+            token_min_deposit,
+            mintable_token.address,
+            default_unlock_at if unlock_at is None else unlock_at,
+        ]
+        if terms_hash is None:
+            txn_hash = transactor.createMultiSignature(*(args + [contract_terms]))
+        else:
+            txn_hash = transactor.createMultiSignatureWithTermsHash(
+                *(args + [terms_hash, contract_terms])
+            )
+        txn_receipt = chain.wait.for_receipt(txn_hash)
+        instance = MultiSignature(address=get_created_multisig_address(txn_receipt))
+        return instance, txn_receipt
+    return _create_multisig
 
 
 @pytest.fixture()
+def mintable_token(chain_state, genesis_contracts):
+    return genesis_contracts.mintable_token
+
+
+@pytest.fixture()
+def txn_recorder(chain_state, genesis_contracts):
+    return genesis_contracts.txn_recorder
+
+
+@pytest.fixture(scope='session')
 def denoms():
     from web3.utils.currency import units
     int_units = {
@@ -160,31 +801,20 @@ def denoms():
 
 @pytest.fixture()
 def evm(web3):
-    tester_client = testrpc.tester_client
-    assert web3.eth.blockNumber == len(tester_client.evm.blocks) - 1
-    return tester_client.evm
+    return get_tester_evm(web3)
 
 
 @pytest.fixture()
-def set_timestamp(web3, evm):
-    def _set_timestamp(timestamp):
-        evm.block.finalize()
-        evm.block.commit_state()
-        evm.db.put(evm.block.hash, rlp.encode(evm.block))
-
-        block = blocks.Block.init_from_parent(
-            evm.block,
-            decode_hex(web3.eth.coinbase),
-            timestamp=timestamp,
-        )
-
-        evm.block = block
-        evm.blocks.append(evm.block)
-        return timestamp
-    return _set_timestamp
+def clock(evm):
+    return EVMClock(evm)
 
 
 @pytest.fixture()
+def set_timestamp(clock):
+    return clock.set
+
+
+@pytest.fixture(scope='session')
 def State():
     return type(
         'State',
@@ -201,67 +831,30 @@ def State():
     )
 
 
+#
+# Chain state fixtures.  These only name the `ChainSnapshots` state the test
+# needs; the `chain_state` fixture restores it before the test runs.
+#
 @pytest.fixture()
-def with_ether_deposit(web3,
-                       multisig,
-                       party_a,
-                       ether_min_deposit,
-                       State):
-    assert multisig.call().currentState() in {State.Genesis, State.WaitingForEther}
-
-    multisig.transact({
-        'from': party_a,
-        'value': ether_min_deposit,
-    }).depositEther()
-
-    assert multisig.call().currentState() in {State.WaitingForTokens, State.WaitingForArbiterLock}
-    assert web3.eth.getBalance(multisig.address) == ether_min_deposit
+def with_ether_deposit(chain_state):
+    pass
 
 
 @pytest.fixture()
-def with_token_deposit(web3,
-                       multisig,
-                       party_b,
-                       token_min_deposit,
-                       mintable_token,
-                       State):
-    assert multisig.call().currentState() in {State.Genesis, State.WaitingForTokens}
-
-    mintable_token.transact({
-        'from': party_b,
-    }).transfer(multisig.address, token_min_deposit)
-
-    assert multisig.call().currentState() in {State.WaitingForEther, State.WaitingForArbiterLock}
-    assert mintable_token.call().balanceOf(multisig.address) == token_min_deposit
+def with_token_deposit(chain_state):
+    pass
 
 
 @pytest.fixture()
-def with_both_deposits(with_ether_deposit, with_token_deposit, multisig, State):
-    assert multisig.call().currentState() == State.WaitingForArbiterLock
+def with_both_deposits(chain_state):
+    pass
 
 
 @pytest.fixture()
-def with_both_deposits_and_locked(with_both_deposits,
-                                  multisig,
-                                  State,
-                                  arbiter):
-    assert multisig.call().currentState() == State.WaitingForArbiterLock
-
-    multisig.transact({
-        'from': arbiter,
-    }).lock()
-
-    assert multisig.call().currentState() == State.Locked
+def with_both_deposits_and_locked(chain_state):
+    pass
 
 
 @pytest.fixture()
-def after_unlock(with_both_deposits_and_locked,
-                 multisig,
-                 set_timestamp,
-                 unlock_at,
-                 State):
-    assert multisig.call().currentState() == State.Locked
-
-    set_timestamp(unlock_at)
-
-    assert multisig.call().currentState() == State.Unlocked
+def after_unlock(chain_state):
+    pass
@@ -0,0 +1,167 @@
+import pytest
+
+
+@pytest.fixture()
+def counting_token(deploy_contract, CountingToken, party_b):
+    contract = deploy_contract(CountingToken)
+
+    contract.transact().mint(party_b, 1000000)
+    assert contract.call().balanceOf(party_b) == 1000000
+
+    return contract
+
+
+@pytest.fixture()
+def counting_multisig(deploy_contract,
+                      MultiSignature,
+                      counting_token,
+                      party_a,
+                      party_b,
+                      arbiter,
+                      trapdoor_a,
+                      trapdoor_b,
+                      trapdoor_c,
+                      ether_min_deposit,
+                      token_min_deposit,
+                      unlock_at):
+    return deploy_contract(MultiSignature, kwargs={
+        'participants': [party_a, party_b, arbiter],
+        'rescuers': [trapdoor_a, trapdoor_b, trapdoor_c],
+        '_ethDepositMinimum': ether_min_deposit,
+        '_tokenDepositMinimum': token_min_deposit,
+        '_tokenAddress': counting_token.address,
+        '_unlockAt': unlock_at,
+        '_contractTerms': "Everyone promises to be on their best behavior",
+    })
+
+
+def test_deposit_token_looks_up_balance_once(counting_multisig,
+                                             counting_token,
+                                             party_b,
+                                             token_min_deposit,
+                                             State):
+    counting_token.transact({
+        'from': party_b,
+    }).approve(counting_multisig.address, token_min_deposit)
+
+    assert counting_token.call().balanceOfCalls() == 0
+
+    counting_multisig.transact({
+        'from': party_b,
+    }).depositToken()
+
+    assert counting_token.call().balanceOfCalls() == 1
+
+    assert counting_multisig.call().currentState() == State.WaitingForEther
+    assert counting_token.call().balanceOf(counting_multisig.address) == token_min_deposit
+
+
+def test_sync_token_balance_counts_direct_transfers(counting_multisig,
+                                                    counting_token,
+                                                    party_b,
+                                                    token_min_deposit,
+                                                    State):
+    counting_token.transact({
+        'from': party_b,
+    }).transfer(counting_multisig.address, token_min_deposit)
+
+    # The direct transfer is not tracked until it is reconciled.
+    assert counting_multisig.call().tokenBalance() == 0
+    assert counting_multisig.call().currentState() == State.Genesis
+
+    counting_multisig.transact().syncTokenBalance()
+
+    assert counting_token.call().balanceOfCalls() == 1
+    assert counting_multisig.call().tokenBalance() == token_min_deposit
+    assert counting_multisig.call().currentState() == State.WaitingForEther
+
+
+def test_refund_tokens_does_not_look_up_balance(counting_multisig,
+                                                counting_token,
+                                                party_b,
+                                                token_min_deposit,
+                                                State):
+    counting_token.transact({
+        'from': party_b,
+    }).transfer(counting_multisig.address, token_min_deposit)
+    counting_multisig.transact().syncTokenBalance()
+    counting_token.transact().resetBalanceOfCalls()
+
+    assert counting_multisig.call().currentState() == State.WaitingForEther
+
+    counting_multisig.transact({
+        'from': party_b,
+    }).refundTokens()
+
+    assert counting_token.call().balanceOfCalls() == 0
+    assert counting_multisig.call().tokenBalance() == 0
+    assert counting_token.call().balanceOf(counting_multisig.address) == 0
+
+
+def test_state_checks_do_not_look_up_balance(counting_multisig,
+                                             counting_token,
+                                             party_a,
+                                             party_b,
+                                             arbiter,
+                                             ether_min_deposit,
+                                             token_min_deposit,
+                                             State):
+    counting_token.transact({
+        'from': party_b,
+    }).approve(counting_multisig.address, token_min_deposit)
+    counting_multisig.transact({
+        'from': party_b,
+    }).depositToken()
+    counting_token.transact().resetBalanceOfCalls()
+
+    counting_multisig.transact({
+        'from': party_a,
+        'value': ether_min_deposit,
+    }).depositEther()
+    counting_multisig.transact({
+        'from': arbiter,
+    }).lock()
+
+    assert counting_multisig.call().currentState() == State.Locked
+    assert counting_token.call().balanceOfCalls() == 0
+
+
+def test_settling_vote_does_not_look_up_balance(counting_multisig,
+                                                counting_token,
+                                                party_a,
+                                                party_b,
+                                                arbiter,
+                                                ether_min_deposit,
+                                                token_min_deposit,
+                                                unlock_at,
+                                                set_timestamp,
+                                                State):
+    counting_multisig.transact({
+        'from': party_a,
+        'value': ether_min_deposit,
+    }).depositEther()
+    counting_token.transact({
+        'from': party_b,
+    }).transfer(counting_multisig.address, token_min_deposit)
+    counting_multisig.transact().syncTokenBalance()
+    counting_multisig.transact({
+        'from': arbiter,
+    }).lock()
+
+    set_timestamp(unlock_at)
+
+    assert counting_multisig.call().currentState() == State.Unlocked
+
+    counting_multisig.transact({
+        'from': party_a,
+    }).submitPartyAVote(party_b)
+
+    counting_token.transact().resetBalanceOfCalls()
+
+    # The vote which settles the contract sends the tracked tokens itself.
+    counting_multisig.transact({
+        'from': party_b,
+    }).submitPartyBVote(party_b)
+
+    assert counting_token.call().balanceOfCalls() == 0
+    assert counting_token.call().balanceOf(counting_multisig.address) == 0
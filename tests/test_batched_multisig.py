@@ -0,0 +1,249 @@
+import pytest
+
+
+@pytest.fixture()
+def batched_multisig(deploy_contract,
+                     BatchedMultiSignature,
+                     mintable_token,
+                     trapdoor_a,
+                     trapdoor_b,
+                     trapdoor_c):
+    return deploy_contract(BatchedMultiSignature, kwargs={
+        'rescuers': [trapdoor_a, trapdoor_b, trapdoor_c],
+        '_tokenAddress': mintable_token.address,
+    })
+
+
+@pytest.fixture()
+def create_agreements(batched_multisig,
+                      party_a,
+                      party_b,
+                      arbiter,
+                      ether_min_deposit,
+                      token_min_deposit,
+                      unlock_at):
+    def _create_agreements(count):
+        first_id = batched_multisig.call().numAgreements()
+        for _ in range(count):
+            batched_multisig.transact().createAgreement(
+                [party_a, party_b, arbiter],
+                ether_min_deposit,
+                token_min_deposit,
+                unlock_at,
+            )
+        return list(range(first_id, first_id + count))
+    return _create_agreements
+
+
+@pytest.fixture()
+def fund_agreements(batched_multisig,
+                    mintable_token,
+                    party_a,
+                    party_b,
+                    ether_min_deposit,
+                    token_min_deposit):
+    def _fund_agreements(ids):
+        mintable_token.transact({
+            'from': party_b,
+        }).approve(batched_multisig.address, token_min_deposit * len(ids))
+
+        for agreement_id in ids:
+            batched_multisig.transact({
+                'from': party_a,
+                'value': ether_min_deposit,
+            }).depositEther(agreement_id)
+            batched_multisig.transact({
+                'from': party_b,
+            }).depositToken(agreement_id)
+    return _fund_agreements
+
+
+def test_create_agreement(batched_multisig,
+                          create_agreements,
+                          party_a,
+                          party_b,
+                          arbiter,
+                          ether_min_deposit,
+                          token_min_deposit,
+                          unlock_at,
+                          State):
+    assert batched_multisig.call().numAgreements() == 0
+
+    ids = create_agreements(2)
+
+    assert ids == [0, 1]
+    assert batched_multisig.call().numAgreements() == 2
+
+    agreement = batched_multisig.call().agreements(1)
+    assert agreement[0] == party_a
+    assert agreement[6] == party_b
+    assert agreement[7] == arbiter
+    assert agreement[8] == 0
+    assert agreement[9] == unlock_at
+    assert agreement[10] == ether_min_deposit
+    assert agreement[11] == token_min_deposit
+
+    assert batched_multisig.call().currentState(0) == State.Genesis
+    assert batched_multisig.call().currentState(1) == State.Genesis
+
+
+def test_deposits_are_tracked_per_agreement(web3,
+                                            batched_multisig,
+                                            mintable_token,
+                                            create_agreements,
+                                            fund_agreements,
+                                            party_a,
+                                            ether_min_deposit,
+                                            token_min_deposit,
+                                            State):
+    ids = create_agreements(3)
+
+    fund_agreements(ids[:1])
+    batched_multisig.transact({
+        'from': party_a,
+        'value': ether_min_deposit,
+    }).depositEther(ids[1])
+
+    assert batched_multisig.call().currentState(ids[0]) == State.WaitingForArbiterLock
+    assert batched_multisig.call().currentState(ids[1]) == State.WaitingForTokens
+    assert batched_multisig.call().currentState(ids[2]) == State.Genesis
+
+    assert web3.eth.getBalance(batched_multisig.address) == 2 * ether_min_deposit
+    assert mintable_token.call().balanceOf(batched_multisig.address) == token_min_deposit
+
+
+def test_lock_many(web3,
+                   batched_multisig,
+                   create_agreements,
+                   fund_agreements,
+                   arbiter,
+                   State):
+    ids = create_agreements(3)
+    fund_agreements(ids[:2])
+
+    with pytest.raises(ValueError):
+        batched_multisig.transact({
+            'from': arbiter,
+        }).lock(ids[2])
+
+    batched_multisig.transact({
+        'from': web3.eth.accounts[0],
+    }).lockMany(ids)
+
+    assert batched_multisig.call().currentState(ids[0]) == State.WaitingForArbiterLock
+    assert batched_multisig.call().currentState(ids[1]) == State.WaitingForArbiterLock
+
+    batched_multisig.transact({
+        'from': arbiter,
+    }).lockMany(ids)
+
+    assert batched_multisig.call().currentState(ids[0]) == State.Locked
+    assert batched_multisig.call().currentState(ids[1]) == State.Locked
+    assert batched_multisig.call().currentState(ids[2]) == State.Genesis
+
+
+def test_vote_and_withdraw_many(web3,
+                                batched_multisig,
+                                mintable_token,
+                                create_agreements,
+                                fund_agreements,
+                                party_a,
+                                party_b,
+                                arbiter,
+                                ether_min_deposit,
+                                token_min_deposit,
+                                unlock_at,
+                                set_timestamp,
+                                NULL_ADDRESS,
+                                State):
+    ids = create_agreements(3)
+    fund_agreements(ids)
+
+    batched_multisig.transact({
+        'from': arbiter,
+    }).lockMany(ids)
+
+    set_timestamp(unlock_at)
+
+    for agreement_id in ids:
+        assert batched_multisig.call().currentState(agreement_id) == State.Unlocked
+
+    batched_multisig.transact({
+        'from': web3.eth.accounts[0],
+    }).withdrawEtherMany(ids)
+
+    # The deposits are credited to partyB rather than sent.
+    for agreement_id in ids:
+        assert batched_multisig.call().agreements(agreement_id)[15] == ether_min_deposit
+    assert web3.eth.getBalance(batched_multisig.address) == 3 * ether_min_deposit
+
+    before_ether_b = web3.eth.getBalance(party_b)
+    batched_multisig.transact({
+        'from': party_b,
+        'gasPrice': 0,
+    }).withdrawMany(ids)
+
+    assert web3.eth.getBalance(party_b) - before_ether_b == 3 * ether_min_deposit
+    assert web3.eth.getBalance(batched_multisig.address) == 0
+
+    batched_multisig.transact({
+        'from': arbiter,
+    }).submitVotes(ids, [party_a, party_b, party_b])
+    batched_multisig.transact({
+        'from': party_b,
+    }).submitVotes(ids, [party_a, party_b, party_a])
+
+    assert batched_multisig.call().votes(ids[0]) == [NULL_ADDRESS, party_a, party_a]
+
+    before_tokens_a = mintable_token.call().balanceOf(party_a)
+    before_tokens_b = mintable_token.call().balanceOf(party_b)
+
+    batched_multisig.transact({
+        'from': web3.eth.accounts[0],
+    }).withdrawTokensMany(ids)
+
+    assert mintable_token.call().balanceOf(party_a) - before_tokens_a == token_min_deposit
+    assert mintable_token.call().balanceOf(party_b) - before_tokens_b == token_min_deposit
+
+    # The last agreement has one vote for each side and is left alone.
+    assert mintable_token.call().balanceOf(batched_multisig.address) == token_min_deposit
+    assert batched_multisig.call().agreements(ids[2])[13] == token_min_deposit
+
+
+def test_refunds_are_per_agreement(web3,
+                                   batched_multisig,
+                                   mintable_token,
+                                   create_agreements,
+                                   fund_agreements,
+                                   party_a,
+                                   party_b,
+                                   ether_min_deposit,
+                                   token_min_deposit,
+                                   State):
+    ids = create_agreements(2)
+    fund_agreements(ids)
+
+    batched_multisig.transact({
+        'from': party_a,
+    }).refundEther(ids[0])
+    batched_multisig.transact({
+        'from': party_b,
+    }).refundTokens(ids[0])
+
+    assert batched_multisig.call().currentState(ids[0]) == State.Genesis
+    assert batched_multisig.call().currentState(ids[1]) == State.WaitingForArbiterLock
+
+    assert batched_multisig.call().agreements(ids[0])[14] == ether_min_deposit
+    assert mintable_token.call().balanceOf(batched_multisig.address) == token_min_deposit
+
+    batched_multisig.transact({
+        'from': party_a,
+    }).withdraw(ids[0])
+
+    assert batched_multisig.call().agreements(ids[0])[14] == 0
+    assert web3.eth.getBalance(batched_multisig.address) == ether_min_deposit
+
+    with pytest.raises(ValueError):
+        batched_multisig.transact({
+            'from': party_b,
+        }).refundEther(ids[1])
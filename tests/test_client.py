@@ -0,0 +1,99 @@
+import pytest
+
+from escrow.client import (
+    MultiSignatureClient,
+    TransactionRefused,
+)
+
+
+@pytest.fixture()
+def client(multisig):
+    return MultiSignatureClient(multisig)
+
+
+def test_snapshot_matches_getters(client,
+                                  multisig,
+                                  mintable_token,
+                                  party_a,
+                                  party_b,
+                                  arbiter,
+                                  web3,
+                                  with_both_deposits_and_locked,
+                                  State):
+    snapshot = client.get_snapshot()
+
+    assert snapshot.partyA == party_a
+    assert snapshot.partyB == party_b
+    assert snapshot.arbiter == arbiter
+    assert snapshot.token == mintable_token.address
+    assert snapshot.partyAVote == multisig.call().partyAVote()
+    assert snapshot.lockedAt == multisig.call().lockedAt()
+    assert snapshot.unlockAt == multisig.call().unlockAt()
+    assert snapshot.state == State.Locked
+    assert snapshot.etherBalance == web3.eth.getBalance(multisig.address)
+    assert snapshot.tokenBalance == mintable_token.call().balanceOf(multisig.address)
+
+
+def test_allowed_transaction_is_sent(client, multisig, arbiter, with_both_deposits, State):
+    assert client.check({'from': arbiter}).lock() == []
+
+    client.transact({'from': arbiter}).lock()
+
+    assert multisig.call().currentState() == State.Locked
+
+
+def test_wrong_sender_is_refused(client, web3, party_b, with_both_deposits):
+    nonce = web3.eth.getTransactionCount(party_b)
+
+    with pytest.raises(TransactionRefused) as excinfo:
+        client.transact({'from': party_b}).lock()
+
+    assert excinfo.value.reasons == ['only arbiter may call lock']
+    assert web3.eth.getTransactionCount(party_b) == nonce
+
+
+def test_wrong_state_is_refused(client, arbiter, with_token_deposit):
+    assert client.check({'from': arbiter}).lock() == [
+        'lock requires the state to be WaitingForArbiterLock but it is WaitingForEther',
+    ]
+
+
+def test_every_failed_modifier_is_reported(client, party_b, after_unlock):
+    reasons = client.check({'from': party_b, 'value': 1}).lock()
+
+    assert len(reasons) == 4
+    assert reasons[0] == 'lock does not accept ether'
+    assert reasons[1].startswith('lock may only be called before unlockAt')
+
+
+def test_trapdoor_signers_are_checked(client, party_a, trapdoor_a):
+    assert client.check({'from': trapdoor_a}).trapdoor() == []
+    assert client.check({'from': party_a}).trapdoor() == [
+        'only a trapdoor signer may call trapdoor',
+    ]
+
+
+@pytest.mark.parametrize(
+    'function_name,sender',
+    (
+        ('refundEther', 'party_a'),
+        ('refundTokens', 'party_b'),
+        ('withdrawEther', 'party_b'),
+        ('withdraw', 'party_b'),
+        ('depositToken', 'party_b'),
+    ),
+)
+def test_refusals_match_contract(client,
+                                 multisig,
+                                 request,
+                                 with_both_deposits_and_locked,
+                                 function_name,
+                                 sender):
+    transaction = {'from': request.getfixturevalue(sender)}
+    reasons = getattr(client.check(transaction), function_name)()
+
+    if reasons:
+        with pytest.raises(ValueError):
+            getattr(multisig.transact(transaction), function_name)()
+    else:
+        getattr(multisig.transact(transaction), function_name)()
@@ -0,0 +1,55 @@
+from escrow.terms import (
+    hash_contract_terms,
+    verify_contract_terms,
+)
+
+
+TERMS_DOCUMENT = (
+    "Party A insures the REP held by Party B.  " * 50
+).strip()
+
+
+def test_verify_stored_contract_terms(multisig):
+    assert verify_contract_terms(multisig, "Everyone promises to be on their best behavior")
+    assert not verify_contract_terms(multisig, "Everyone promises nothing")
+
+
+def test_verify_hashed_contract_terms(create_multisig):
+    instance, _ = create_multisig(
+        "ipfs://QmTermsDocument",
+        terms_hash=hash_contract_terms(TERMS_DOCUMENT),
+    )
+
+    assert instance.call().contractTerms() == ''
+    assert verify_contract_terms(instance, TERMS_DOCUMENT)
+    assert not verify_contract_terms(instance, TERMS_DOCUMENT + " Amended.")
+
+
+def test_terms_are_published_in_event(create_multisig):
+    terms_hash = hash_contract_terms(TERMS_DOCUMENT)
+    instance, txn_receipt = create_multisig(TERMS_DOCUMENT, terms_hash=terms_hash)
+
+    published_logs = [
+        log_entry
+        for log_entry in txn_receipt['logs']
+        if log_entry['address'] == instance.address
+    ]
+    assert len(published_logs) == 1
+    assert published_logs[0]['topics'][1] == '0x' + ''.join(
+        '{0:02x}'.format(byte) for byte in bytearray(terms_hash)
+    )
+
+
+def test_hashed_terms_length_barely_affects_deployment(create_multisig):
+    def stored_terms_gas(terms):
+        _, txn_receipt = create_multisig(terms)
+        return txn_receipt['gasUsed']
+
+    def hashed_terms_gas(terms):
+        _, txn_receipt = create_multisig(terms, terms_hash=hash_contract_terms(terms))
+        return txn_receipt['gasUsed']
+
+    stored_growth = stored_terms_gas(TERMS_DOCUMENT) - stored_terms_gas("short")
+    hashed_growth = hashed_terms_gas(TERMS_DOCUMENT) - hashed_terms_gas("short")
+
+    assert hashed_growth * 4 < stored_growth
@@ -0,0 +1,255 @@
+import csv
+import json
+
+import pytest
+
+from escrow.terms import verify_contract_terms
+
+from migrations.deploy import (
+    Deployer,
+    ManifestError,
+    load_manifest,
+    parse_manifest,
+)
+
+
+MANIFEST_FIELDS = (
+    'id',
+    'partyA',
+    'partyB',
+    'arbiter',
+    'rescuerA',
+    'rescuerB',
+    'rescuerC',
+    'ethDepositMinimum',
+    'tokenDepositMinimum',
+    'token',
+    'unlockAt',
+    'terms',
+    'termsURI',
+)
+
+
+@pytest.fixture()
+def manifest_rows(mintable_token,
+                  party_a,
+                  party_b,
+                  arbiter,
+                  trapdoor_a,
+                  trapdoor_b,
+                  trapdoor_c,
+                  ether_min_deposit,
+                  token_min_deposit,
+                  unlock_at):
+    return [
+        {
+            'id': 'agreement-{0}'.format(index),
+            'partyA': party_a,
+            'partyB': party_b,
+            'arbiter': arbiter,
+            'rescuerA': trapdoor_a,
+            'rescuerB': trapdoor_b,
+            'rescuerC': trapdoor_c,
+            'ethDepositMinimum': str(ether_min_deposit),
+            'tokenDepositMinimum': str(token_min_deposit + index),
+            'token': mintable_token.address,
+            'unlockAt': str(unlock_at + index),
+            'terms': "Agreement number {0}".format(index),
+            'termsURI': 'ipfs://agreement-{0}'.format(index) if index % 2 else '',
+        }
+        for index in range(7)
+    ]
+
+
+@pytest.fixture()
+def manifest_path(tmpdir, manifest_rows):
+    path = str(tmpdir.join('agreements.csv'))
+    with open(path, 'w') as manifest_file:
+        writer = csv.DictWriter(manifest_file, MANIFEST_FIELDS)
+        writer.writeheader()
+        writer.writerows(manifest_rows)
+    return path
+
+
+@pytest.fixture()
+def make_deployer(web3, multisig_factory, tmpdir):
+    def _make_deployer(deployer_class=Deployer):
+        return deployer_class(
+            web3,
+            multisig_factory,
+            web3.eth.coinbase,
+            str(tmpdir.join('checkpoint.json')),
+            str(tmpdir.join('registry.json')),
+            window_size=3,
+            # eth-testrpc rejects a `nonce` and mines every transaction as
+            # it is sent, so they are mined in the order of their nonces
+            # regardless.
+            explicit_nonces=False,
+            poll_interval=0,
+        )
+    return _make_deployer
+
+
+def test_csv_and_json_manifests_agree(tmpdir, manifest_rows, manifest_path):
+    json_path = str(tmpdir.join('agreements.json'))
+    with open(json_path, 'w') as json_file:
+        json.dump(manifest_rows, json_file)
+
+    agreements = load_manifest(manifest_path)
+
+    assert agreements == load_manifest(json_path)
+    assert len(agreements) == 7
+    assert agreements[0].termsURI is None
+    assert agreements[1].termsURI == 'ipfs://agreement-1'
+    assert agreements[2].tokenDepositMinimum == int(manifest_rows[2]['tokenDepositMinimum'])
+
+
+@pytest.mark.parametrize(
+    'changes,message',
+    (
+        ({'partyB': '0x1234'}, 'invalid partyB'),
+        ({'unlockAt': 'tomorrow'}, 'invalid value'),
+        ({'terms': ''}, 'missing terms'),
+        ({'id': 'agreement-0'}, 'Duplicate'),
+    )
+)
+def test_invalid_manifest_rows_are_rejected(manifest_rows, changes, message):
+    manifest_rows[1].update(changes)
+
+    with pytest.raises(ManifestError) as err:
+        parse_manifest(manifest_rows)
+
+    assert message in str(err.value)
+
+
+def test_deploys_every_agreement(web3,
+                                 tmpdir,
+                                 MultiSignature,
+                                 multisig_factory,
+                                 manifest_path,
+                                 make_deployer,
+                                 party_a,
+                                 State):
+    agreements = load_manifest(manifest_path)
+    start_nonce = web3.eth.getTransactionCount(web3.eth.coinbase)
+
+    registry = make_deployer().deploy(agreements)
+
+    with open(str(tmpdir.join('registry.json'))) as registry_file:
+        assert json.load(registry_file) == registry
+
+    assert registry['factory'] == multisig_factory.address
+    assert set(registry['agreements']) == set(agreement.id for agreement in agreements)
+    assert len(set(entry['address'] for entry in registry['agreements'].values())) == 7
+
+    for agreement in agreements:
+        entry = registry['agreements'][agreement.id]
+        instance = MultiSignature(address=entry['address'])
+
+        assert instance.call().initialized() is True
+        assert instance.call().partyA() == party_a
+        assert instance.call().unlockAt() == agreement.unlockAt
+        assert instance.call().tokenDepositMinimum() == agreement.tokenDepositMinimum
+        assert instance.call().currentState() == State.Genesis
+        assert verify_contract_terms(instance, agreement.terms)
+
+    # One transaction per agreement, sent with consecutive nonces.
+    with open(str(tmpdir.join('checkpoint.json'))) as checkpoint_file:
+        checkpoint = json.load(checkpoint_file)['agreements']
+    assert sorted(entry['nonce'] for entry in checkpoint.values()) == list(range(
+        start_nonce,
+        start_nonce + 7,
+    ))
+    for entry in checkpoint.values():
+        assert web3.eth.getTransaction(entry['transactionHash'])['nonce'] == entry['nonce']
+    assert web3.eth.getTransactionCount(web3.eth.coinbase) == start_nonce + 7
+
+
+class Interrupted(Exception):
+    pass
+
+
+def test_resumes_after_interrupted_submission(web3, manifest_path, make_deployer):
+    agreements = load_manifest(manifest_path)
+    start_nonce = web3.eth.getTransactionCount(web3.eth.coinbase)
+
+    class InterruptedDeployer(Deployer):
+        def submit(self, agreement, nonce):
+            if agreement.id == 'agreement-4':
+                raise Interrupted()
+            return super(InterruptedDeployer, self).submit(agreement, nonce)
+
+    with pytest.raises(Interrupted):
+        make_deployer(InterruptedDeployer).deploy(agreements)
+
+    # The first window was confirmed and the first agreement of the second
+    # one submitted before the interruption.  The nonce of the next one was
+    # recorded but its transaction never sent.
+    first_run = make_deployer().checkpoint.entries
+    assert sorted(first_run) == [
+        'agreement-0',
+        'agreement-1',
+        'agreement-2',
+        'agreement-3',
+        'agreement-4',
+    ]
+    assert first_run['agreement-3']['address'] is None
+    assert first_run['agreement-4']['transactionHash'] is None
+
+    registry = make_deployer().deploy(agreements)
+
+    assert len(registry['agreements']) == 7
+    assert registry['agreements']['agreement-0']['address'] == first_run['agreement-0']['address']
+    assert web3.eth.getTransactionCount(web3.eth.coinbase) == start_nonce + 7
+
+
+def test_resumes_after_interruption_before_recording_the_hash(web3,
+                                                               manifest_path,
+                                                               make_deployer):
+    agreements = load_manifest(manifest_path)
+    start_nonce = web3.eth.getTransactionCount(web3.eth.coinbase)
+
+    class InterruptedDeployer(Deployer):
+        def submit(self, agreement, nonce):
+            txn_hash = super(InterruptedDeployer, self).submit(agreement, nonce)
+            if agreement.id == 'agreement-4':
+                raise Interrupted()
+            return txn_hash
+
+    with pytest.raises(Interrupted):
+        make_deployer(InterruptedDeployer).deploy(agreements)
+
+    assert make_deployer().checkpoint.entries['agreement-4']['transactionHash'] is None
+
+    registry = make_deployer().deploy(agreements)
+
+    # The transaction sent before the interruption is found on chain rather
+    # than sent again.
+    assert len(registry['agreements']) == 7
+    assert web3.eth.getTransactionCount(web3.eth.coinbase) == start_nonce + 7
+
+
+def test_resumes_after_interrupted_confirmation(web3, manifest_path, make_deployer):
+    agreements = load_manifest(manifest_path)
+    start_nonce = web3.eth.getTransactionCount(web3.eth.coinbase)
+
+    class InterruptedDeployer(Deployer):
+        def wait_for_receipts(self, txn_hashes):
+            if txn_hashes:
+                raise Interrupted()
+            return {}
+
+    with pytest.raises(Interrupted):
+        make_deployer(InterruptedDeployer).deploy(agreements)
+
+    # The whole first window was sent, but none of it was confirmed.
+    assert len(make_deployer().checkpoint.unconfirmed) == 3
+
+    registry = make_deployer().deploy(agreements)
+
+    assert len(registry['agreements']) == 7
+    assert web3.eth.getTransactionCount(web3.eth.coinbase) == start_nonce + 7
+
+    # Running again once everything is deployed sends nothing.
+    assert make_deployer().deploy(agreements) == registry
+    assert web3.eth.getTransactionCount(web3.eth.coinbase) == start_nonce + 7
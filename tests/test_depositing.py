@@ -49,10 +49,36 @@ def test_token_deposit_via_direct_transfer(web3,
         'from': party_b,
     }).transfer(multisig.address, token_min_deposit)
 
+    # The transfer only counts once the tracked balance is reconciled.
+    assert multisig.call().currentState() == State.Genesis
+    assert multisig.call().tokenBalance() == 0
+
+    multisig.transact().syncTokenBalance()
+
     assert multisig.call().currentState() == State.WaitingForEther
+    assert multisig.call().tokenBalance() == token_min_deposit
     assert mintable_token.call().balanceOf(multisig.address) == token_min_deposit
 
 
+def test_sync_token_balance_clamps_oversized_balances(multisig,
+                                                      party_b,
+                                                      mintable_token,
+                                                      State):
+    # More tokens than `tokenBalance` can hold, sent by someone else.
+    mintable_token.transact().mint(multisig.address, 2 ** 128 + 5)
+
+    multisig.transact().syncTokenBalance()
+
+    assert multisig.call().tokenBalance() == 2 ** 128 - 1
+    assert multisig.call().currentState() == State.WaitingForEther
+
+    # Depositing still works rather than throwing on the oversized balance.
+    assert multisig.call({'from': party_b}).depositToken() is True
+    multisig.transact({'from': party_b}).depositToken()
+
+    assert multisig.call().tokenBalance() == 2 ** 128 - 1
+
+
 def test_insufficient_ether_deposit(web3,
                                     multisig,
                                     party_a,
@@ -65,8 +91,43 @@ def test_insufficient_ether_deposit(web3,
         'value': ether_min_deposit - 1,
     }).depositEther()
 
+    # The underpayment is credited back to partyA rather than deposited.
     assert multisig.call().currentState() == State.Genesis
+    assert web3.eth.getBalance(multisig.address) == ether_min_deposit - 1
+    assert multisig.call().creditA() == ether_min_deposit - 1
+
+    multisig.transact({
+        'from': party_a,
+    }).withdraw()
+
     assert web3.eth.getBalance(multisig.address) == 0
+    assert multisig.call().creditA() == 0
+
+
+def test_underpayment_does_not_count_towards_deposit(web3,
+                                                     multisig,
+                                                     party_a,
+                                                     ether_min_deposit,
+                                                     State):
+    multisig.transact({
+        'from': party_a,
+        'value': ether_min_deposit - 1,
+    }).depositEther()
+    multisig.transact({
+        'from': party_a,
+        'value': ether_min_deposit - 1,
+    }).depositEther()
+
+    assert web3.eth.getBalance(multisig.address) == 2 * (ether_min_deposit - 1)
+    assert multisig.call().currentState() == State.Genesis
+    assert multisig.call().creditA() == 2 * (ether_min_deposit - 1)
+
+    multisig.transact({
+        'from': party_a,
+        'value': ether_min_deposit,
+    }).depositEther()
+
+    assert multisig.call().currentState() == State.WaitingForTokens
 
 
 def test_insufficient_token_deposit(web3,
@@ -191,7 +252,16 @@ def test_ether_refund(web3, multisig, party_a, ether_min_deposit, State):
         'from': party_a,
     }).refundEther()
 
+    # The refund is credited, and paid out by `withdraw`.
+    assert web3.eth.getBalance(multisig.address) == ether_min_deposit
+    assert multisig.call().creditA() == ether_min_deposit
+
+    multisig.transact({
+        'from': party_a,
+    }).withdraw()
+
     assert web3.eth.getBalance(multisig.address) == 0
+    assert multisig.call().creditA() == 0
     assert multisig.call().currentState() == State.Genesis
 
 
@@ -227,6 +297,7 @@ def test_token_refund(web3,
     mintable_token.transact({
         'from': party_b,
     }).transfer(multisig.address, token_min_deposit)
+    multisig.transact().syncTokenBalance()
 
     assert multisig.call().currentState() == State.WaitingForEther
     assert mintable_token.call().balanceOf(multisig.address) == token_min_deposit
@@ -251,6 +322,7 @@ def test_only_party_b_can_token_refund(web3,
     mintable_token.transact({
         'from': party_b,
     }).transfer(multisig.address, token_min_deposit)
+    multisig.transact().syncTokenBalance()
 
     assert multisig.call().currentState() == State.WaitingForEther
     assert mintable_token.call().balanceOf(multisig.address) == token_min_deposit
@@ -278,6 +350,7 @@ def test_both_refund_token_first(web3,
     mintable_token.transact({
         'from': party_b,
     }).transfer(multisig.address, token_min_deposit)
+    multisig.transact().syncTokenBalance()
 
     multisig.transact({
         'from': party_a,
@@ -299,7 +372,16 @@ def test_both_refund_token_first(web3,
         'from': party_a,
     }).refundEther()
 
+    # The refund is credited, and paid out by `withdraw`.
+    assert web3.eth.getBalance(multisig.address) == ether_min_deposit
+    assert multisig.call().creditA() == ether_min_deposit
+
+    multisig.transact({
+        'from': party_a,
+    }).withdraw()
+
     assert web3.eth.getBalance(multisig.address) == 0
+    assert multisig.call().creditA() == 0
     assert multisig.call().currentState() == State.Genesis
 
 
@@ -317,6 +399,7 @@ def test_both_refund_ether_first(web3,
     mintable_token.transact({
         'from': party_b,
     }).transfer(multisig.address, token_min_deposit)
+    multisig.transact().syncTokenBalance()
 
     multisig.transact({
         'from': party_a,
@@ -331,7 +414,16 @@ def test_both_refund_ether_first(web3,
         'from': party_a,
     }).refundEther()
 
+    # The refund is credited, and paid out by `withdraw`.
+    assert web3.eth.getBalance(multisig.address) == ether_min_deposit
+    assert multisig.call().creditA() == ether_min_deposit
+
+    multisig.transact({
+        'from': party_a,
+    }).withdraw()
+
     assert web3.eth.getBalance(multisig.address) == 0
+    assert multisig.call().creditA() == 0
     assert multisig.call().currentState() == State.WaitingForEther
 
     multisig.transact({
@@ -358,6 +450,7 @@ def test_both_refund_if_never_locked(web3,
     mintable_token.transact({
         'from': party_b,
     }).transfer(multisig.address, token_min_deposit)
+    multisig.transact().syncTokenBalance()
 
     multisig.transact({
         'from': party_a,
@@ -383,5 +476,14 @@ def test_both_refund_if_never_locked(web3,
         'from': party_a,
     }).refundEther()
 
+    # The refund is credited, and paid out by `withdraw`.
+    assert web3.eth.getBalance(multisig.address) == ether_min_deposit
+    assert multisig.call().creditA() == ether_min_deposit
+
+    multisig.transact({
+        'from': party_a,
+    }).withdraw()
+
     assert web3.eth.getBalance(multisig.address) == 0
+    assert multisig.call().creditA() == 0
     assert multisig.call().currentState() == State.NeverLocked
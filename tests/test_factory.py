@@ -0,0 +1,175 @@
+import pytest
+
+
+# `MultiSignatureProxy` returns a fixed 4096 bytes, of which an ABI encoded
+# string spends 64 on its offset and length.
+MAX_CONTRACT_TERMS_LENGTH = 4096 - 64
+
+
+def code_size(web3, address):
+    return (len(web3.eth.getCode(address)) - 2) // 2
+
+
+def test_factory_emits_created_event(web3,
+                                     multisig_factory,
+                                     create_multisig,
+                                     MultiSignature,
+                                     party_a,
+                                     party_b,
+                                     arbiter,
+                                     unlock_at,
+                                     State):
+    _, txn_receipt = create_multisig(transaction={'from': party_a})
+
+    created_logs = [
+        log_entry
+        for log_entry in txn_receipt['logs']
+        if log_entry['address'] == multisig_factory.address
+    ]
+    assert len(created_logs) == 1
+
+    instance_topic, creator_topic = created_logs[0]['topics'][1:]
+    instance = MultiSignature(address='0x' + instance_topic[-40:])
+
+    assert '0x' + creator_topic[-40:] == party_a
+
+    assert len(web3.eth.getCode(instance.address)) > 10
+    assert instance.call().initialized() is True
+    assert instance.call().partyA() == party_a
+    assert instance.call().partyB() == party_b
+    assert instance.call().arbiter() == arbiter
+    assert instance.call().unlockAt() == unlock_at
+    assert instance.call().currentState() == State.Genesis
+
+
+def test_instances_are_independent(web3,
+                                   create_multisig,
+                                   party_a,
+                                   ether_min_deposit,
+                                   State):
+    first, _ = create_multisig()
+    second, _ = create_multisig()
+
+    assert first.address != second.address
+
+    first.transact({
+        'from': party_a,
+        'value': ether_min_deposit,
+    }).depositEther()
+
+    assert first.call().currentState() == State.WaitingForTokens
+    assert second.call().currentState() == State.Genesis
+    assert web3.eth.getBalance(second.address) == 0
+
+
+def test_multisig_cannot_be_initialized_twice(multisig,
+                                              mintable_token,
+                                              web3,
+                                              party_a,
+                                              party_b,
+                                              arbiter,
+                                              unlock_at):
+    attacker = web3.eth.accounts[0]
+
+    assert multisig.call().initialized() is True
+
+    with pytest.raises(ValueError):
+        multisig.transact({
+            'from': attacker,
+        }).initialize(
+            [attacker, attacker, attacker],
+            [attacker, attacker, attacker],
+            0,
+            0,
+            mintable_token.address,
+            unlock_at,
+            "",
+        )
+
+    assert multisig.call().partyA() == party_a
+    assert multisig.call().partyB() == party_b
+    assert multisig.call().arbiter() == arbiter
+
+
+def test_implementation_cannot_be_initialized(web3,
+                                              multisig_factory,
+                                              MultiSignature,
+                                              mintable_token,
+                                              unlock_at):
+    implementation = MultiSignature(address=multisig_factory.call().implementation())
+    attacker = web3.eth.accounts[0]
+
+    assert implementation.call().initialized() is True
+
+    with pytest.raises(ValueError):
+        implementation.transact({
+            'from': attacker,
+        }).initialize(
+            [attacker, attacker, attacker],
+            [attacker, attacker, attacker],
+            0,
+            0,
+            mintable_token.address,
+            unlock_at,
+            "",
+        )
+
+
+def test_clone_deployment_is_cheaper(web3,
+                                     multisig_factory,
+                                     MultiSignature,
+                                     create_multisig,
+                                     mintable_token,
+                                     party_a,
+                                     party_b,
+                                     arbiter,
+                                     trapdoor_a,
+                                     trapdoor_b,
+                                     trapdoor_c,
+                                     ether_min_deposit,
+                                     token_min_deposit,
+                                     unlock_at):
+    deploy_txn_hash = MultiSignature.deploy(kwargs={
+        'participants': [party_a, party_b, arbiter],
+        'rescuers': [trapdoor_a, trapdoor_b, trapdoor_c],
+        '_ethDepositMinimum': ether_min_deposit,
+        '_tokenDepositMinimum': token_min_deposit,
+        '_tokenAddress': mintable_token.address,
+        '_unlockAt': unlock_at,
+        '_contractTerms': "Everyone promises to be on their best behavior",
+    })
+    deploy_gas = web3.eth.getTransactionReceipt(deploy_txn_hash)['gasUsed']
+
+    instance, create_txn_receipt = create_multisig()
+    create_gas = create_txn_receipt['gasUsed']
+
+    # A clone stores the same state as a direct deployment plus the proxy's
+    # implementation address.  It deposits only the proxy's code, at 200 gas
+    # per byte, and its transaction does not carry the `MultiSignature` init
+    # code.  The calldata saved far outweighs the extra slot and call, so
+    # the clone saves at least the deposit of the difference in code size.
+    implementation_size = code_size(web3, multisig_factory.call().implementation())
+    proxy_size = code_size(web3, instance.address)
+    minimum_saving = 200 * (implementation_size - proxy_size)
+
+    assert deploy_gas - create_gas >= minimum_saving, (
+        "Clone deployment used {0} gas, {1:.3f} of the {2} used by a direct "
+        "deployment".format(create_gas, create_gas / float(deploy_gas), deploy_gas)
+    )
+
+
+def test_longest_terms_are_returned_in_full(create_multisig):
+    # Zero bytes keep the storage writes cheap enough for the test chain's
+    # block gas limit.  The last byte is not zero so truncation would show.
+    contract_terms = "\x00" * (MAX_CONTRACT_TERMS_LENGTH - 1) + "."
+    instance, _ = create_multisig(contract_terms=contract_terms)
+
+    returned_terms = instance.call().contractTerms()
+
+    assert len(returned_terms) == MAX_CONTRACT_TERMS_LENGTH
+    assert returned_terms[-1:] == "."
+
+
+def test_terms_too_long_for_the_proxy_are_rejected(create_multisig):
+    with pytest.raises(ValueError):
+        create_multisig(contract_terms="." * (MAX_CONTRACT_TERMS_LENGTH + 1))
@@ -0,0 +1,529 @@
+"""
+Stateful fuzzing of `MultiSignature`.
+
+Random sequences of deposits, refunds, locks, time jumps, votes,
+withdrawals and trapdoor calls are sent from random senders, starting from
+one of the snapshotted chain states.  After every step the invariants below
+are checked.  A failing sequence is shrunk to a minimal reproduction before
+being reported.
+
+Configured through the environment:
+
+- MULTISIG_FUZZ_RUNS: sequences per `multisig_variant` (default 20).
+- MULTISIG_FUZZ_STEPS: actions per sequence (default 25).
+- MULTISIG_FUZZ_SEED: seed for the random generator (default
+  DEFAULT_FUZZ_SEED, so that every run fuzzes the same sequences).
+- MULTISIG_FUZZ_REPORT: when set, the number of transactions per second is
+  printed at the end.
+"""
+import os
+import random
+import time
+
+import pytest
+
+from escrow.client import (
+    MultiSignatureClient,
+    PRECONDITIONS,
+)
+from escrow.indexer import event_abis_by_topic
+from escrow.state import State
+from escrow.trapdoor import encode_batch
+
+
+START_STATES = (
+    'genesis',
+    'with_ether_deposit',
+    'with_token_deposit',
+    'with_both_deposits',
+    'with_both_deposits_and_locked',
+    'after_unlock',
+)
+
+ACTORS = (
+    'party_a',
+    'party_b',
+    'arbiter',
+    'trapdoor_a',
+    'trapdoor_b',
+    'trapdoor_c',
+)
+
+REFUND_STATES = {
+    State.WaitingForEther,
+    State.WaitingForTokens,
+    State.WaitingForArbiterLock,
+    State.NeverLocked,
+}
+
+VOTE_FUNCTIONS = ('submitPartyAVote', 'submitPartyBVote', 'submitArbiterVote')
+
+TRAPDOOR_CALLS = (
+    (12345, 'some-data'),
+    (54321, 'other-data'),
+    # More than the contract ever holds, so the call fails.
+    (10 ** 24, 'too-much'),
+)
+
+# Batches of calls to the transaction recorder.  They send no ether so that
+# they never fail, since a failing batch throws.
+TRAPDOOR_BATCHES = (
+    ((0, b'batch-a'), (0, b'batch-b')),
+    ((0, b''),),
+)
+
+TIME_JUMPS = (60, 60 * 60, 'unlock')
+
+DEFAULT_FUZZ_SEED = 0
+
+
+class InvariantViolation(Exception):
+    pass
+
+
+def stored_values(snapshot):
+    """
+    The parts of a snapshot which only a successful transaction can change.
+    The state itself also depends on the time, which moves with every mined
+    block.
+    """
+    return (
+        snapshot.lockedAt,
+        snapshot.partyAVote,
+        snapshot.partyBVote,
+        snapshot.arbiterVote,
+        snapshot.etherBalance,
+        snapshot.tokenBalance,
+    )
+
+
+def random_action(rng):
+    """
+    A random action as a `(kind, actor, argument)` tuple.
+    """
+    kind = rng.choice((
+        'depositEther',
+        'depositToken',
+        'approve',
+        'transferTokens',
+        'lock',
+        'refundEther',
+        'refundTokens',
+        'withdrawEther',
+        'withdrawTokens',
+        'withdraw',
+        'syncTokenBalance',
+        'vote',
+        'trapdoor',
+        'trapdoorBatch',
+        'advanceTime',
+    ))
+    actor = rng.choice(ACTORS)
+    # Most calls send no ether, but some do to exercise `noEther`.
+    stray_value = rng.choice((0, 0, 0, 1))
+
+    if kind == 'depositEther':
+        return (kind, actor, rng.choice(('minimum', 'below_minimum', 'above_minimum', 0)))
+    elif kind in ('approve', 'transferTokens'):
+        return (kind, 'party_b', rng.choice((1, 50, 100)))
+    elif kind == 'vote':
+        target = rng.choice(('party_a', 'party_b', 'arbiter'))
+        return (rng.choice(VOTE_FUNCTIONS), actor, (stray_value, target))
+    elif kind == 'trapdoor':
+        return (kind, actor, (stray_value, rng.randrange(len(TRAPDOOR_CALLS))))
+    elif kind == 'trapdoorBatch':
+        return (kind, actor, (stray_value, rng.randrange(len(TRAPDOOR_BATCHES))))
+    elif kind == 'advanceTime':
+        return (kind, None, rng.choice(TIME_JUMPS))
+    else:
+        return (kind, actor, stray_value)
+
+
+class MultiSignatureFuzzer(object):
+    def __init__(self,
+                 web3,
+                 snapshots,
+                 multisig,
+                 mintable_token,
+                 txn_recorder,
+                 clock,
+                 accounts,
+                 ether_min_deposit):
+        self.web3 = web3
+        self.snapshots = snapshots
+        self.multisig = multisig
+        self.client = MultiSignatureClient(multisig)
+        self.mintable_token = mintable_token
+        self.txn_recorder = txn_recorder
+        self.clock = clock
+        self.accounts = accounts
+        self.ether_min_deposit = ether_min_deposit
+        self.event_abis = event_abis_by_topic(multisig.abi)
+        self.token_holders = list(web3.eth.accounts) + [multisig.address, txn_recorder.address]
+        self.num_transactions = 0
+
+    #
+    # Running sequences
+    #
+    def run_sequence(self, start_state, sequence):
+        """
+        Run `sequence` from `start_state`.  Returns `None` if every invariant
+        held, otherwise a description of the first violation.
+        """
+        self.snapshots.revert_to(start_state)
+        self.trapdoor_proposals = {}
+        for index, action in enumerate(sequence):
+            try:
+                self.run_action(action)
+            except InvariantViolation as err:
+                return "step {0} {1!r}: {2}".format(index, action, err)
+        return None
+
+    def shrink(self, start_state, sequence, failure):
+        """
+        Remove chunks of decreasing size from the failing `sequence` for as
+        long as what remains still fails.
+        """
+        chunk_size = len(sequence) // 2
+        while chunk_size >= 1:
+            start = 0
+            while start < len(sequence):
+                candidate = sequence[:start] + sequence[start + chunk_size:]
+                candidate_failure = self.run_sequence(start_state, candidate)
+                if candidate_failure is not None:
+                    sequence, failure = candidate, candidate_failure
+                else:
+                    start += chunk_size
+            chunk_size //= 2
+        return sequence, failure
+
+    #
+    # Actions
+    #
+    def run_action(self, action):
+        kind, actor, argument = action
+
+        if kind == 'advanceTime':
+            if argument == 'unlock':
+                self.clock.advance_to_unlock(self.multisig)
+            else:
+                self.clock.advance(argument)
+            return
+        elif kind == 'approve':
+            token = self.mintable_token.transact({'from': self.accounts[actor]})
+            self.send(token.approve, self.multisig.address, argument)
+            return
+        elif kind == 'transferTokens':
+            token = self.mintable_token.transact({'from': self.accounts[actor]})
+            self.send(token.transfer, self.multisig.address, argument)
+            self.check_token_conservation()
+            return
+
+        sender = self.accounts[actor]
+        if kind == 'depositEther':
+            value = {
+                'minimum': self.ether_min_deposit,
+                'below_minimum': self.ether_min_deposit - 1,
+                'above_minimum': self.ether_min_deposit + 1,
+                0: 0,
+            }[argument]
+            args = ()
+        elif kind in VOTE_FUNCTIONS:
+            value, target = argument
+            args = (self.accounts[target],)
+        elif kind == 'trapdoor':
+            value, call_index = argument
+            call_value, call_data = TRAPDOOR_CALLS[call_index]
+            args = (self.txn_recorder.address, call_value, call_data)
+        elif kind == 'trapdoorBatch':
+            value, batch_index = argument
+            args = encode_batch([
+                (self.txn_recorder.address, call_value, call_data)
+                for call_value, call_data in TRAPDOOR_BATCHES[batch_index]
+            ])
+        else:
+            value = argument
+            args = ()
+
+        transaction = {'from': sender, 'value': value}
+        before = self.client.get_snapshot()
+        balance_before = self.web3.eth.getBalance(self.multisig.address)
+        credits_before = self.get_credits()
+        recorder_balance_before = self.web3.eth.getBalance(self.txn_recorder.address)
+        predicted_reasons = self.client.refusal_reasons(kind, transaction, before)
+
+        txn_hash = self.send(getattr(self.multisig.transact(transaction), kind), *args)
+        after = self.client.get_snapshot()
+        balance_after = self.web3.eth.getBalance(self.multisig.address)
+        credits_after = self.get_credits()
+
+        if txn_hash is None:
+            if not predicted_reasons:
+                raise InvariantViolation("threw although every modifier should pass")
+            if stored_values(after) != stored_values(before) or credits_after != credits_before:
+                raise InvariantViolation("a transaction which threw changed the contract")
+            return
+        if predicted_reasons:
+            raise InvariantViolation(
+                "succeeded although it should throw: {0}".format('; '.join(predicted_reasons))
+            )
+
+        events = self.decode_events(txn_hash)
+        recorder_delta = self.web3.eth.getBalance(self.txn_recorder.address) - recorder_balance_before
+
+        self.check_ether_conservation(value, balance_before, balance_after, events, recorder_delta)
+        self.check_escrow(after, balance_after, credits_after)
+        self.check_token_conservation()
+        self.check_credits(kind, before, credits_before, credits_after, events)
+        self.check_withdrawals(before, after, events)
+        self.check_lock(before, after)
+        if kind in ('trapdoor', 'trapdoorBatch'):
+            self.check_trapdoor(sender, (kind, argument[1]), events)
+
+    def send(self, transact_fn, *args):
+        """
+        Send a transaction, returning its hash or `None` if it threw.
+        """
+        self.num_transactions += 1
+        try:
+            return transact_fn(*args)
+        except ValueError:
+            return None
+
+    def get_credits(self):
+        return (self.multisig.call().creditA(), self.multisig.call().creditB())
+
+    def decode_events(self, txn_hash):
+        receipt = self.web3.eth.getTransactionReceipt(txn_hash)
+        return [
+            (self.event_abis[log_entry['topics'][0]]['name'], log_entry)
+            for log_entry in receipt['logs']
+            if log_entry['address'].lower() == self.multisig.address.lower()
+        ]
+
+    def event_amount(self, log_entry):
+        return int(log_entry['data'][-64:], 16)
+
+    def event_who(self, log_entry):
+        return '0x' + log_entry['topics'][1][-40:]
+
+    #
+    # Invariants
+    #
+    def check_ether_conservation(self, value, balance_before, balance_after, events, recorder_delta):
+        """
+        Every wei that enters or leaves the contract is accounted for by the
+        value sent, the withdrawal events and the trapdoor's call.
+        """
+        paid = recorder_delta + sum(
+            self.event_amount(log_entry)
+            for name, log_entry in events
+            if name == 'EtherWithdrawal'
+        )
+        if balance_after - balance_before != value - paid:
+            raise InvariantViolation(
+                "ether balance went from {0} to {1} but {2} was received and {3} paid".format(
+                    balance_before,
+                    balance_after,
+                    value,
+                    paid,
+                )
+            )
+
+    def check_escrow(self, after, balance, credits):
+        """
+        The escrowed ether reported by the snapshot is the balance less the
+        credits, or nothing once the trapdoor has spent credited ether.
+        """
+        expected = max(balance - sum(credits), 0)
+        if after.etherBalance != expected:
+            raise InvariantViolation(
+                "{0} ether escrowed with a balance of {1} and credits of {2}".format(
+                    after.etherBalance,
+                    balance,
+                    credits,
+                )
+            )
+
+    def check_token_conservation(self):
+        total_supply = self.mintable_token.call().totalSupply()
+        held = sum(self.mintable_token.call().balanceOf(holder) for holder in self.token_holders)
+        if held != total_supply:
+            raise InvariantViolation(
+                "{0} tokens are held but the total supply is {1}".format(held, total_supply)
+            )
+
+    def check_credits(self, kind, before, credits_before, credits_after, events):
+        """
+        Ether is credited to partyA for an underpayment or as a refund before
+        locking, and to partyB once locked.  It is only paid out by
+        `withdraw`, in full, to the party it was credited to.
+        """
+        credit_a_before, credit_b_before = credits_before
+        credit_a_after, credit_b_after = credits_after
+
+        if credit_a_after > credit_a_before:
+            if kind != 'depositEther' and before.state not in REFUND_STATES:
+                raise InvariantViolation("partyA credited in state {0}".format(before.state))
+        if credit_b_after > credit_b_before:
+            if before.state not in (State.Locked, State.Unlocked):
+                raise InvariantViolation("partyB credited in state {0}".format(before.state))
+
+        owed = {
+            before.partyA.lower(): (credit_a_before, credit_a_after),
+            before.partyB.lower(): (credit_b_before, credit_b_after),
+        }
+        for name, log_entry in events:
+            if name != 'EtherWithdrawal':
+                continue
+            who = self.event_who(log_entry)
+            if kind != 'withdraw' or who not in owed:
+                raise InvariantViolation("EtherWithdrawal to {0} by {1}".format(who, kind))
+            credit_before, credit_after = owed[who]
+            if self.event_amount(log_entry) != credit_before or credit_after != 0:
+                raise InvariantViolation(
+                    "{0} was paid {1} of a {2} credit".format(
+                        who,
+                        self.event_amount(log_entry),
+                        credit_before,
+                    )
+                )
+
+    def check_withdrawals(self, before, after, events):
+        """
+        Tokens only leave the contract as refunds before locking, or to the
+        winner of the vote once unlocked.
+        """
+        votes = tuple(
+            vote.lower() for vote in (after.partyAVote, after.partyBVote, after.arbiterVote)
+        )
+        for name, log_entry in events:
+            if name != 'TokenWithdrawal':
+                continue
+            who = self.event_who(log_entry).lower()
+            won_vote = before.state == State.Unlocked and votes.count(who) >= 2
+            allowed = won_vote or (
+                who == before.partyB.lower() and before.state in REFUND_STATES
+            )
+            if not allowed:
+                raise InvariantViolation(
+                    "{0} to {1} in state {2}".format(name, who, before.state)
+                )
+
+    def check_lock(self, before, after):
+        if before.lockedAt != 0 and after.lockedAt != before.lockedAt:
+            raise InvariantViolation("lockedAt changed once set")
+
+    def check_trapdoor(self, sender, proposal, events):
+        """
+        A trapdoor call only executes once two distinct signers have most
+        recently proposed it.
+        """
+        self.trapdoor_proposals[sender] = proposal
+        executed = any(name == 'TrapdoorExecuted' for name, _ in events)
+        if executed:
+            approvals = [
+                signer
+                for signer, signer_proposal in self.trapdoor_proposals.items()
+                if signer_proposal == proposal
+            ]
+            if len(approvals) < 2:
+                raise InvariantViolation(
+                    "trapdoor executed with approvals from only {0}".format(approvals)
+                )
+            self.trapdoor_proposals = {}
+
+
+@pytest.fixture()
+def fuzzer(web3,
+           multisig,
+           multisig_variant,
+           chain_snapshots,
+           mintable_token,
+           txn_recorder,
+           clock,
+           party_a,
+           party_b,
+           arbiter,
+           trapdoor_a,
+           trapdoor_b,
+           trapdoor_c,
+           ether_min_deposit):
+    accounts = {
+        'party_a': party_a,
+        'party_b': party_b,
+        'arbiter': arbiter,
+        'trapdoor_a': trapdoor_a,
+        'trapdoor_b': trapdoor_b,
+        'trapdoor_c': trapdoor_c,
+    }
+    return MultiSignatureFuzzer(
+        web3,
+        chain_snapshots[multisig_variant],
+        multisig,
+        mintable_token,
+        txn_recorder,
+        clock,
+        accounts,
+        ether_min_deposit,
+    )
+
+
+def test_fuzz_state_machine(fuzzer, capsys):
+    num_runs = int(os.environ.get('MULTISIG_FUZZ_RUNS', 20))
+    num_steps = int(os.environ.get('MULTISIG_FUZZ_STEPS', 25))
+    seed = int(os.environ.get('MULTISIG_FUZZ_SEED', DEFAULT_FUZZ_SEED))
+    rng = random.Random(seed)
+
+    started_at = time.time()
+    for _ in range(num_runs):
+        start_state = rng.choice(START_STATES)
+        sequence = [random_action(rng) for _ in range(num_steps)]
+
+        failure = fuzzer.run_sequence(start_state, sequence)
+        if failure is not None:
+            sequence, failure = fuzzer.shrink(start_state, sequence, failure)
+            pytest.fail(
+                "Invariant violated (MULTISIG_FUZZ_SEED={0}) starting from {1}:\n"
+                "{2}\n\nMinimal sequence:\n{3}".format(
+                    seed,
+                    start_state,
+                    failure,
+                    '\n'.join(repr(action) for action in sequence),
+                )
+            )
+    elapsed = time.time() - started_at
+
+    if os.environ.get('MULTISIG_FUZZ_REPORT'):
+        with capsys.disabled():
+            print(
+                "\nfuzzed {0} sequences, {1} transactions in {2:.1f}s "
+                "({3:.1f} transactions/second, seed {4})".format(
+                    num_runs,
+                    fuzzer.num_transactions,
+                    elapsed,
+                    fuzzer.num_transactions / max(elapsed, 1e-9),
+                    seed,
+                )
+            )
+
+
+# Covered by `test_signatures.py`, since they need the signers' private keys.
+SIGNED_FUNCTIONS = {'submitSignedVotes', 'trapdoorWithSignatures'}
+
+
+def test_every_function_is_fuzzed():
+    fuzzed_functions = {
+        'depositEther',
+        'depositToken',
+        'lock',
+        'refundEther',
+        'refundTokens',
+        'withdrawEther',
+        'withdrawTokens',
+        'withdraw',
+        'syncTokenBalance',
+        'trapdoor',
+        'trapdoorBatch',
+    } | set(VOTE_FUNCTIONS)
+    assert fuzzed_functions | SIGNED_FUNCTIONS == set(PRECONDITIONS)
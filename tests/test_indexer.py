@@ -0,0 +1,104 @@
+import pytest
+
+from escrow.indexer import EventIndexer
+
+
+@pytest.fixture()
+def indexer(web3, multisig, tmpdir):
+    indexer = EventIndexer(
+        web3,
+        multisig.abi,
+        str(tmpdir.join('events.sqlite3')),
+        batch_size=3,
+    )
+    indexer.track(multisig.address)
+    yield indexer
+    indexer.close()
+
+
+def test_indexing_deposits(indexer,
+                           web3,
+                           multisig,
+                           party_a,
+                           party_b,
+                           ether_min_deposit,
+                           with_ether_deposit):
+    assert indexer.update() == 1
+    assert indexer.last_indexed_block(multisig.address) == web3.eth.blockNumber
+
+    deposits = indexer.deposits_for(party_a)
+    assert len(deposits) == 1
+    assert deposits[0]['event'] == 'EtherDeposit'
+    assert deposits[0]['address'] == multisig.address.lower()
+    assert deposits[0]['args'] == {'who': party_a.lower(), 'amount': ether_min_deposit}
+
+    assert indexer.deposits_for(party_b) == []
+
+
+def test_indexing_is_incremental(indexer,
+                                 web3,
+                                 multisig,
+                                 party_a,
+                                 ether_min_deposit,
+                                 with_ether_deposit):
+    assert indexer.update() == 1
+    assert indexer.update() == 0
+
+    multisig.transact({'from': party_a}).refundEther()
+    multisig.transact({'from': party_a}).withdraw()
+
+    assert indexer.update() == 1
+    assert [event['event'] for event in indexer.events(address=multisig.address)] == [
+        'EtherDeposit',
+        'EtherWithdrawal',
+    ]
+    assert indexer.events(event='EtherWithdrawal')[0]['args']['amount'] == ether_min_deposit
+
+
+def test_index_survives_reopening(web3,
+                                  multisig,
+                                  party_a,
+                                  tmpdir,
+                                  with_ether_deposit):
+    database_path = str(tmpdir.join('events.sqlite3'))
+
+    first_indexer = EventIndexer(web3, multisig.abi, database_path)
+    first_indexer.track(multisig.address)
+    first_indexer.update()
+    first_indexer.close()
+
+    second_indexer = EventIndexer(web3, multisig.abi, database_path)
+    assert second_indexer.tracked_addresses == [multisig.address.lower()]
+    assert second_indexer.update() == 0
+    assert len(second_indexer.deposits_for(party_a)) == 1
+    second_indexer.close()
+
+
+def test_pending_trapdoor_hashes(indexer,
+                                 multisig,
+                                 txn_recorder,
+                                 trapdoor_a,
+                                 trapdoor_b,
+                                 trapdoor_c,
+                                 with_both_deposits_and_locked):
+    multisig.transact({
+        'from': trapdoor_a,
+    }).trapdoor(txn_recorder.address, 12345, 'some-data')
+    multisig.transact({
+        'from': trapdoor_c,
+    }).trapdoor(txn_recorder.address, 54321, 'other-data')
+    indexer.update()
+
+    pending = indexer.pending_trapdoor_hashes(multisig.address)
+    assert set(pending) == {trapdoor_a.lower(), trapdoor_c.lower()}
+    assert pending[trapdoor_a.lower()] != pending[trapdoor_c.lower()]
+
+    multisig.transact({
+        'from': trapdoor_b,
+    }).trapdoor(txn_recorder.address, 12345, 'some-data')
+    indexer.update()
+
+    assert indexer.pending_trapdoor_hashes(multisig.address) == {}
+    executed = indexer.events(event='TrapdoorExecuted', address=multisig.address)
+    assert len(executed) == 1
+    assert executed[0]['args']['_hash'] == pending[trapdoor_a.lower()]
@@ -107,16 +107,19 @@ def test_party_b_can_withdraw_in_locked_state(web3,
     before_balance = web3.eth.getBalance(party_b)
     assert web3.eth.getBalance(multisig.address) == ether_min_deposit
 
-    txn_hash = multisig.transact({
-        'from': party_b,
-    }).withdrawEther()
-    txn = web3.eth.getTransaction(txn_hash)
-    txn_receipt = web3.eth.getTransactionReceipt(txn_hash)
+    gas_cost = 0
+    for function_name in ('withdrawEther', 'withdraw'):
+        txn_hash = getattr(multisig.transact({
+            'from': party_b,
+        }), function_name)()
+        txn = web3.eth.getTransaction(txn_hash)
+        txn_receipt = web3.eth.getTransactionReceipt(txn_hash)
+        gas_cost += txn['gasPrice'] * txn_receipt['gasUsed']
 
     after_balance = web3.eth.getBalance(party_b)
     assert web3.eth.getBalance(multisig.address) == 0
 
-    assert after_balance - before_balance == ether_min_deposit - txn['gasPrice'] * txn_receipt['gasUsed']
+    assert after_balance - before_balance == ether_min_deposit - gas_cost
 
 
 def test_anyone_can_trigger_party_b_withdraw(web3,
@@ -141,7 +144,8 @@ def test_anyone_can_trigger_party_b_withdraw(web3,
         'from': web3.eth.accounts[0],
     }).withdrawEther()
 
-    after_balance = web3.eth.getBalance(party_b)
-    assert web3.eth.getBalance(multisig.address) == 0
-
-    assert after_balance - before_balance == ether_min_deposit
+    # The ether is credited to partyB, who collects it with `withdraw`.
+    assert web3.eth.getBalance(party_b) == before_balance
+    assert web3.eth.getBalance(multisig.address) == ether_min_deposit
+    assert multisig.call().creditB() == ether_min_deposit
+    assert multisig.call().currentState() == State.Locked
@@ -0,0 +1,190 @@
+import asyncio
+
+import pytest
+
+from escrow.monitor import (
+    NEVER_LOCKED,
+    TOKENS_WITHDRAWN,
+    UNLOCKED,
+    SimulatedClock,
+    UnlockMonitor,
+)
+
+
+@pytest.yield_fixture()
+def loop():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+    asyncio.set_event_loop(None)
+
+
+@pytest.fixture()
+def simulated_clock(clock):
+    return SimulatedClock(clock.now)
+
+
+def let_run(loop):
+    loop.run_until_complete(asyncio.sleep(0.01))
+
+
+def test_notifies_never_locked_at_unlock(loop,
+                                         multisig,
+                                         MultiSignature,
+                                         clock,
+                                         simulated_clock,
+                                         unlock_at,
+                                         with_both_deposits):
+    monitor = UnlockMonitor(MultiSignature, clock=simulated_clock)
+
+    assert monitor.track(multisig.address) == unlock_at
+    assert loop.run_until_complete(monitor.process_due()) == []
+
+    simulated_clock.set(clock.advance_to_unlock(multisig))
+    notifications = loop.run_until_complete(monitor.process_due())
+
+    assert [notification.event for notification in notifications] == [NEVER_LOCKED]
+    assert notifications[0].address == multisig.address.lower()
+    assert notifications[0].snapshot.unlockAt == unlock_at
+    assert monitor.tracked_addresses == []
+
+
+def test_recovers_after_failed_snapshot(loop,
+                                        multisig,
+                                        MultiSignature,
+                                        clock,
+                                        simulated_clock,
+                                        with_both_deposits):
+    failures = [IOError("Node unreachable")]
+
+    class FlakyCaller(object):
+        def __init__(self, caller):
+            self.caller = caller
+
+        def __getattr__(self, name):
+            return getattr(self.caller, name)
+
+        def getSnapshot(self):
+            if failures:
+                raise failures.pop()
+            return self.caller.getSnapshot()
+
+    def FlakyMultiSignature(address):
+        instance = MultiSignature(address=address)
+        call = instance.call
+        instance.call = lambda *args: FlakyCaller(call(*args))
+        return instance
+
+    monitor = UnlockMonitor(FlakyMultiSignature, clock=simulated_clock, retry_interval=60)
+    monitor.track(multisig.address)
+
+    simulated_clock.set(clock.advance_to_unlock(multisig))
+
+    # The failure is logged and the agreement is looked at again later.
+    assert loop.run_until_complete(monitor.process_due()) == []
+    assert failures == []
+    assert monitor.tracked_addresses == [multisig.address.lower()]
+    assert monitor.next_deadline == simulated_clock.now + 60
+
+    simulated_clock.set(clock.advance(60))
+    notifications = loop.run_until_complete(monitor.process_due())
+
+    assert [notification.event for notification in notifications] == [NEVER_LOCKED]
+    assert monitor.tracked_addresses == []
+
+
+@pytest.mark.parametrize('late_tokens', (0, 12345))
+def test_withdraws_tokens_once_settled(web3,
+                                       loop,
+                                       multisig,
+                                       MultiSignature,
+                                       mintable_token,
+                                       clock,
+                                       simulated_clock,
+                                       party_a,
+                                       party_b,
+                                       arbiter,
+                                       late_tokens,
+                                       with_both_deposits_and_locked):
+    monitor = UnlockMonitor(
+        MultiSignature,
+        withdraw_from=web3.eth.coinbase,
+        clock=simulated_clock,
+        settlement_interval=3600,
+    )
+    monitor.track(multisig.address)
+
+    simulated_clock.set(clock.advance_to_unlock(multisig))
+    notifications = loop.run_until_complete(monitor.process_due())
+
+    # Nobody has voted yet, so the agreement is looked at again later.
+    assert [notification.event for notification in notifications] == [UNLOCKED]
+    assert monitor.next_deadline == simulated_clock.now + 3600
+
+    multisig.transact({
+        'from': party_a,
+    }).submitPartyAVote(party_b)
+    multisig.transact({
+        'from': arbiter,
+    }).submitArbiterVote(party_b)
+
+    if late_tokens:
+        mintable_token.transact().mint(multisig.address, late_tokens)
+    before_bal_b = mintable_token.call().balanceOf(party_b)
+    start_nonce = web3.eth.getTransactionCount(web3.eth.coinbase)
+
+    simulated_clock.set(clock.advance(3600))
+    notifications = loop.run_until_complete(monitor.process_due())
+
+    if late_tokens:
+        assert [notification.event for notification in notifications] == [TOKENS_WITHDRAWN]
+        assert notifications[0].transactionHash is not None
+    else:
+        # The settling vote already sent the deposit, so nothing is sent.
+        assert notifications == []
+        assert web3.eth.getTransactionCount(web3.eth.coinbase) == start_nonce
+
+    assert mintable_token.call().balanceOf(party_b) - before_bal_b == late_tokens
+    assert mintable_token.call().balanceOf(multisig.address) == 0
+    assert monitor.tracked_addresses == []
+
+
+def test_run_sleeps_until_earliest_deadline(loop,
+                                            multisig,
+                                            MultiSignature,
+                                            clock,
+                                            simulated_clock,
+                                            unlock_at):
+    received = asyncio.Queue()
+
+    async def on_notification(notification):
+        await received.put(notification)
+
+    monitor = UnlockMonitor(
+        MultiSignature,
+        on_notification=on_notification,
+        clock=simulated_clock,
+    )
+    monitor.track(multisig.address, unlock_at=unlock_at + 1000000)
+
+    task = loop.create_task(monitor.run())
+    let_run(loop)
+
+    assert simulated_clock.next_wake_at == unlock_at + 1000000
+
+    # Tracking an earlier deadline wakes the sleeping service.
+    monitor.track(multisig.address)
+    let_run(loop)
+
+    assert simulated_clock.next_wake_at == unlock_at
+    assert received.empty()
+
+    simulated_clock.set(clock.advance_to_unlock(multisig))
+    notification = loop.run_until_complete(asyncio.wait_for(received.get(), 5))
+
+    assert notification.event == NEVER_LOCKED
+    assert simulated_clock.next_wake_at is None
+
+    monitor.stop()
+    loop.run_until_complete(task)
@@ -0,0 +1,362 @@
+import pytest
+
+from escrow.multitoken import (
+    evaluate_snapshot,
+    read_multi_token_snapshot,
+    token_shortfalls,
+)
+
+
+@pytest.fixture()
+def second_token(deploy_contract, BrokenToken, mintable_token, party_b):
+    # Behaves as a `MintableToken` until `setBroken(True)` is called.
+    contract = deploy_contract(BrokenToken)
+    contract.transact().mint(party_b, 1000000)
+    return contract
+
+
+@pytest.fixture()
+def token_minimums(token_min_deposit):
+    return [token_min_deposit, 2 * token_min_deposit]
+
+
+@pytest.fixture()
+def multi_token_multisig(deploy_contract,
+                         MultiTokenMultiSignature,
+                         mintable_token,
+                         second_token,
+                         token_minimums,
+                         party_a,
+                         party_b,
+                         arbiter,
+                         trapdoor_a,
+                         trapdoor_b,
+                         trapdoor_c,
+                         ether_min_deposit,
+                         unlock_at):
+    return deploy_contract(MultiTokenMultiSignature, kwargs={
+        'participants': [party_a, party_b, arbiter],
+        'rescuers': [trapdoor_a, trapdoor_b, trapdoor_c],
+        '_ethDepositMinimum': ether_min_deposit,
+        '_tokens': [mintable_token.address, second_token.address],
+        '_tokenDepositMinimums': token_minimums,
+        '_unlockAt': unlock_at,
+    })
+
+
+@pytest.fixture()
+def tokens(mintable_token, second_token):
+    return [mintable_token, second_token]
+
+
+@pytest.fixture()
+def deposit_everything(multi_token_multisig,
+                       tokens,
+                       token_minimums,
+                       party_a,
+                       party_b,
+                       ether_min_deposit):
+    def _deposit_everything():
+        multi_token_multisig.transact({
+            'from': party_a,
+            'value': ether_min_deposit,
+        }).depositEther()
+        for token, minimum in zip(tokens, token_minimums):
+            token.transact({
+                'from': party_b,
+            }).approve(multi_token_multisig.address, minimum)
+        multi_token_multisig.transact({
+            'from': party_b,
+        }).depositTokens()
+    return _deposit_everything
+
+
+def test_every_token_minimum_must_be_met(multi_token_multisig,
+                                         tokens,
+                                         token_minimums,
+                                         party_a,
+                                         party_b,
+                                         ether_min_deposit,
+                                         State):
+    assert multi_token_multisig.call().numTokens() == 2
+    assert multi_token_multisig.call().currentState() == State.Genesis
+
+    multi_token_multisig.transact({
+        'from': party_a,
+        'value': ether_min_deposit,
+    }).depositEther()
+
+    # Only the first token is approved, so the second is still missing.
+    tokens[0].transact({
+        'from': party_b,
+    }).approve(multi_token_multisig.address, token_minimums[0])
+    multi_token_multisig.transact({
+        'from': party_b,
+    }).depositTokens()
+
+    assert tokens[0].call().balanceOf(multi_token_multisig.address) == token_minimums[0]
+    assert multi_token_multisig.call().tokenDepositsMet() is False
+    assert multi_token_multisig.call().currentState() == State.WaitingForTokens
+
+    # A direct transfer counts towards the minimum once it is synced.
+    tokens[1].transact({
+        'from': party_b,
+    }).transfer(multi_token_multisig.address, token_minimums[1])
+
+    assert multi_token_multisig.call().tokenDepositsMet() is False
+
+    multi_token_multisig.transact().syncTokenBalance(1)
+
+    assert multi_token_multisig.call().tokenBalances(1) == token_minimums[1]
+    assert multi_token_multisig.call().tokenDepositsMet() is True
+    assert multi_token_multisig.call().currentState() == State.WaitingForArbiterLock
+
+
+def test_constructor_requires_a_minimum_per_token(deploy_contract,
+                                                  MultiTokenMultiSignature,
+                                                  mintable_token,
+                                                  second_token,
+                                                  party_a,
+                                                  party_b,
+                                                  arbiter,
+                                                  trapdoor_a,
+                                                  trapdoor_b,
+                                                  trapdoor_c,
+                                                  unlock_at):
+    with pytest.raises(ValueError):
+        deploy_contract(MultiTokenMultiSignature, kwargs={
+            'participants': [party_a, party_b, arbiter],
+            'rescuers': [trapdoor_a, trapdoor_b, trapdoor_c],
+            '_ethDepositMinimum': 100,
+            '_tokens': [mintable_token.address, second_token.address],
+            '_tokenDepositMinimums': [100],
+            '_unlockAt': unlock_at,
+        })
+
+
+def test_constructor_rejects_duplicate_tokens(deploy_contract,
+                                             MultiTokenMultiSignature,
+                                             mintable_token,
+                                             second_token,
+                                             party_a,
+                                             party_b,
+                                             arbiter,
+                                             trapdoor_a,
+                                             trapdoor_b,
+                                             trapdoor_c,
+                                             unlock_at):
+    with pytest.raises(ValueError):
+        deploy_contract(MultiTokenMultiSignature, kwargs={
+            'participants': [party_a, party_b, arbiter],
+            'rescuers': [trapdoor_a, trapdoor_b, trapdoor_c],
+            '_ethDepositMinimum': 100,
+            '_tokens': [mintable_token.address, second_token.address, mintable_token.address],
+            '_tokenDepositMinimums': [100, 100, 100],
+            '_unlockAt': unlock_at,
+        })
+
+
+def test_refund_tokens_returns_every_token(multi_token_multisig,
+                                           deposit_everything,
+                                           tokens,
+                                           party_a,
+                                           party_b,
+                                           set_timestamp,
+                                           unlock_at,
+                                           State):
+    deposit_everything()
+    before_balances = [token.call().balanceOf(party_b) for token in tokens]
+
+    set_timestamp(unlock_at)
+    assert multi_token_multisig.call().currentState() == State.NeverLocked
+
+    multi_token_multisig.transact({
+        'from': party_b,
+    }).refundTokens()
+
+    for token, before_balance in zip(tokens, before_balances):
+        assert token.call().balanceOf(multi_token_multisig.address) == 0
+        assert token.call().balanceOf(party_b) > before_balance
+
+
+def test_settling_every_asset(web3,
+                              multi_token_multisig,
+                              deposit_everything,
+                              tokens,
+                              token_minimums,
+                              party_a,
+                              party_b,
+                              arbiter,
+                              ether_min_deposit,
+                              set_timestamp,
+                              unlock_at,
+                              State):
+    deposit_everything()
+    multi_token_multisig.transact({
+        'from': arbiter,
+    }).lock()
+    set_timestamp(unlock_at)
+
+    assert multi_token_multisig.call().currentState() == State.Unlocked
+
+    before_balances = [token.call().balanceOf(party_a) for token in tokens]
+
+    multi_token_multisig.transact({
+        'from': party_a,
+    }).submitPartyAVote(party_a)
+    multi_token_multisig.transact({
+        'from': arbiter,
+    }).submitArbiterVote(party_a)
+
+    # The vote which reached quorum sent every token.
+    for token, minimum, before_balance in zip(tokens, token_minimums, before_balances):
+        assert token.call().balanceOf(multi_token_multisig.address) == 0
+        assert token.call().balanceOf(party_a) - before_balance == minimum
+
+    multi_token_multisig.transact({
+        'from': party_b,
+    }).settle()
+
+    assert multi_token_multisig.call().creditB() == ether_min_deposit
+
+    multi_token_multisig.transact({
+        'from': party_b,
+    }).withdraw()
+
+    assert web3.eth.getBalance(multi_token_multisig.address) == 0
+
+
+def test_withdraw_token_sends_tokens_arriving_after_the_vote(multi_token_multisig,
+                                                             deposit_everything,
+                                                             tokens,
+                                                             party_a,
+                                                             party_b,
+                                                             arbiter,
+                                                             set_timestamp,
+                                                             unlock_at):
+    deposit_everything()
+    multi_token_multisig.transact({
+        'from': arbiter,
+    }).lock()
+    set_timestamp(unlock_at)
+
+    multi_token_multisig.transact({
+        'from': party_b,
+    }).submitPartyBVote(party_b)
+    multi_token_multisig.transact({
+        'from': arbiter,
+    }).submitArbiterVote(party_b)
+
+    tokens[1].transact().mint(multi_token_multisig.address, 12345)
+    before_balance = tokens[1].call().balanceOf(party_b)
+
+    multi_token_multisig.transact({
+        'from': party_a,
+    }).withdrawToken(1)
+
+    assert tokens[1].call().balanceOf(multi_token_multisig.address) == 0
+    assert tokens[1].call().balanceOf(party_b) - before_balance == 12345
+
+
+def test_refund_is_not_blocked_by_a_throwing_token(multi_token_multisig,
+                                                   deposit_everything,
+                                                   tokens,
+                                                   token_minimums,
+                                                   party_b,
+                                                   set_timestamp,
+                                                   unlock_at):
+    deposit_everything()
+    set_timestamp(unlock_at)
+    tokens[1].transact().setBroken(True)
+    before_balances = [token.call().balanceOf(party_b) for token in tokens]
+
+    multi_token_multisig.transact({
+        'from': party_b,
+    }).refundTokens()
+
+    assert tokens[0].call().balanceOf(party_b) - before_balances[0] == token_minimums[0]
+    assert tokens[1].call().balanceOf(party_b) == before_balances[1]
+    assert multi_token_multisig.call().tokenBalances(0) == 0
+    assert multi_token_multisig.call().tokenBalances(1) == token_minimums[1]
+
+    tokens[1].transact().setBroken(False)
+    multi_token_multisig.transact({
+        'from': party_b,
+    }).refundToken(1)
+
+    assert tokens[1].call().balanceOf(party_b) - before_balances[1] == token_minimums[1]
+    assert multi_token_multisig.call().tokenBalances(1) == 0
+
+
+def test_quorum_vote_is_not_blocked_by_a_throwing_token(multi_token_multisig,
+                                                        deposit_everything,
+                                                        tokens,
+                                                        token_minimums,
+                                                        party_a,
+                                                        arbiter,
+                                                        set_timestamp,
+                                                        unlock_at):
+    deposit_everything()
+    multi_token_multisig.transact({
+        'from': arbiter,
+    }).lock()
+    set_timestamp(unlock_at)
+    tokens[1].transact().setBroken(True)
+    before_balances = [token.call().balanceOf(party_a) for token in tokens]
+
+    multi_token_multisig.transact({
+        'from': party_a,
+    }).submitPartyAVote(party_a)
+    multi_token_multisig.transact({
+        'from': arbiter,
+    }).submitArbiterVote(party_a)
+
+    assert multi_token_multisig.call().arbiterVote() == party_a
+    assert tokens[0].call().balanceOf(party_a) - before_balances[0] == token_minimums[0]
+    assert multi_token_multisig.call().tokenBalances(1) == token_minimums[1]
+
+    tokens[1].transact().setBroken(False)
+    multi_token_multisig.transact({
+        'from': party_a,
+    }).withdrawToken(1)
+
+    assert tokens[1].call().balanceOf(party_a) - before_balances[1] == token_minimums[1]
+
+
+def test_snapshot_helpers_match_contract(multi_token_multisig,
+                                         deposit_everything,
+                                         tokens,
+                                         token_minimums,
+                                         party_a,
+                                         party_b,
+                                         arbiter,
+                                         ether_min_deposit,
+                                         set_timestamp,
+                                         unlock_at,
+                                         State):
+    snapshot = read_multi_token_snapshot(multi_token_multisig)
+
+    assert snapshot.partyA == party_a
+    assert snapshot.tokens == tuple(token.address for token in tokens)
+    assert snapshot.tokenDepositMinimums == tuple(token_minimums)
+    assert snapshot.tokenBalances == (0, 0)
+    assert snapshot.ethDepositMinimum == ether_min_deposit
+    assert snapshot.state == State.Genesis
+    assert evaluate_snapshot(snapshot) == State.Genesis
+    assert token_shortfalls(snapshot) == {
+        tokens[0].address: token_minimums[0],
+        tokens[1].address: token_minimums[1],
+    }
+
+    deposit_everything()
+    snapshot = read_multi_token_snapshot(multi_token_multisig)
+
+    assert snapshot.state == State.WaitingForArbiterLock
+    assert evaluate_snapshot(snapshot) == State.WaitingForArbiterLock
+    assert token_shortfalls(snapshot) == {}
+
+    # Offline evaluation at a later time matches the contract once it gets
+    # there.
+    assert evaluate_snapshot(snapshot, unlock_at) == State.NeverLocked
+    set_timestamp(unlock_at)
+    assert multi_token_multisig.call().currentState() == State.NeverLocked
@@ -0,0 +1,212 @@
+import pytest
+
+
+# Upper bounds on the gas used by each way ether leaves the escrow.  None of
+# them forward gas to the recipient beyond the `send` stipend, so they hold
+# whatever the recipient is.
+GAS_CEILINGS = {
+    'depositEther.underpayment': 75000,
+    'refundEther': 75000,
+    'withdrawEther': 75000,
+    'withdraw': 50000,
+}
+
+
+@pytest.fixture()
+def expensive_recipient(chain_state, deploy_contract, ExpensiveRecipient):
+    return deploy_contract(ExpensiveRecipient)
+
+
+@pytest.fixture()
+def expensive_multisig(deploy_contract,
+                       MultiSignature,
+                       mintable_token,
+                       expensive_recipient,
+                       party_b,
+                       arbiter,
+                       trapdoor_a,
+                       trapdoor_b,
+                       trapdoor_c,
+                       ether_min_deposit,
+                       token_min_deposit,
+                       unlock_at):
+    """
+    A `MultiSignature` whose partyA is an `ExpensiveRecipient`.
+    """
+    return deploy_contract(MultiSignature, kwargs={
+        'participants': [expensive_recipient.address, party_b, arbiter],
+        'rescuers': [trapdoor_a, trapdoor_b, trapdoor_c],
+        '_ethDepositMinimum': ether_min_deposit,
+        '_tokenDepositMinimum': token_min_deposit,
+        '_tokenAddress': mintable_token.address,
+        '_unlockAt': unlock_at,
+        '_contractTerms': "Everyone promises to be on their best behavior",
+    })
+
+
+@pytest.fixture()
+def gas_used(web3):
+    def _gas_used(txn_hash):
+        return web3.eth.getTransactionReceipt(txn_hash)['gasUsed']
+    return _gas_used
+
+
+def test_withdraw_pays_out_credit(web3,
+                                  multisig,
+                                  chain,
+                                  party_a,
+                                  ether_min_deposit,
+                                  with_ether_deposit):
+    multisig.transact({
+        'from': party_a,
+    }).refundEther()
+
+    assert multisig.call().creditA() == ether_min_deposit
+    assert multisig.call({'from': party_a}).withdraw() is True
+
+    before_balance = web3.eth.getBalance(party_a)
+
+    txn_hash = multisig.transact({
+        'from': party_a,
+        'gasPrice': 0,
+    }).withdraw()
+    txn_receipt = chain.wait.for_receipt(txn_hash)
+
+    assert web3.eth.getBalance(party_a) - before_balance == ether_min_deposit
+    assert web3.eth.getBalance(multisig.address) == 0
+    assert multisig.call().creditA() == 0
+
+    # The `EtherWithdrawal` event is logged when the ether is paid out.
+    assert len(txn_receipt['logs']) == 1
+    assert txn_receipt['logs'][0]['topics'][1][-40:] == party_a[-40:]
+    assert int(txn_receipt['logs'][0]['data'], 16) == ether_min_deposit
+
+    # Nothing is left to withdraw.
+    assert multisig.call({'from': party_a}).withdraw() is False
+
+
+def test_withdraw_pays_each_party_their_own_credit(web3,
+                                                   multisig,
+                                                   party_a,
+                                                   party_b,
+                                                   arbiter,
+                                                   ether_min_deposit,
+                                                   with_both_deposits_and_locked):
+    multisig.transact({
+        'from': party_b,
+    }).withdrawEther()
+
+    assert multisig.call().creditA() == 0
+    assert multisig.call().creditB() == ether_min_deposit
+
+    assert multisig.call({'from': party_a}).withdraw() is False
+    assert multisig.call({'from': arbiter}).withdraw() is False
+
+    multisig.transact({
+        'from': party_b,
+    }).withdraw()
+
+    assert multisig.call().creditB() == 0
+    assert web3.eth.getBalance(multisig.address) == 0
+
+
+def test_withdraw_does_not_accept_ether(multisig, party_a, with_ether_deposit):
+    multisig.transact({
+        'from': party_a,
+    }).refundEther()
+
+    with pytest.raises(ValueError):
+        multisig.transact({
+            'from': party_a,
+            'value': 1,
+        }).withdraw()
+
+
+def test_credited_ether_is_not_escrowed(multisig,
+                                        party_a,
+                                        ether_min_deposit,
+                                        State,
+                                        with_both_deposits):
+    assert multisig.call().currentState() == State.WaitingForArbiterLock
+
+    multisig.transact({
+        'from': party_a,
+    }).refundEther()
+
+    # The ether is still held, but as a credit it no longer meets the
+    # deposit minimum.
+    assert multisig.call().currentState() == State.WaitingForEther
+    assert multisig.call().ethDepositMet() is False
+    assert multisig.call().getSnapshot()[2][3] == 0
+
+    # Refunding again does not credit the same ether twice.
+    assert multisig.call({'from': party_a}).refundEther() is False
+
+
+def test_failed_send_keeps_credit(web3,
+                                  expensive_multisig,
+                                  expensive_recipient,
+                                  ether_min_deposit,
+                                  gas_used):
+    # Underpaying no longer pushes the ether straight back, which would
+    # have handed the recipient all of the remaining gas.
+    expensive_recipient.transact({
+        'value': ether_min_deposit - 1,
+    }).depositEther(expensive_multisig.address)
+
+    assert expensive_multisig.call().creditA() == ether_min_deposit - 1
+
+    # The recipient's fallback needs more than the `send` stipend, so the
+    # payout fails, and the credit is kept for a later attempt.
+    txn_hash = expensive_recipient.transact().withdraw(expensive_multisig.address)
+
+    assert gas_used(txn_hash) < GAS_CEILINGS['withdraw'] + 25000
+    assert expensive_recipient.call().numPayments() == 0
+    assert expensive_multisig.call().creditA() == ether_min_deposit - 1
+    assert web3.eth.getBalance(expensive_multisig.address) == ether_min_deposit - 1
+
+
+def test_settlement_gas_ceilings(multisig,
+                                 party_a,
+                                 party_b,
+                                 arbiter,
+                                 ether_min_deposit,
+                                 token_min_deposit,
+                                 mintable_token,
+                                 gas_used):
+    measurements = {}
+
+    measurements['depositEther.underpayment'] = gas_used(multisig.transact({
+        'from': party_a,
+        'value': ether_min_deposit - 1,
+    }).depositEther())
+    multisig.transact({
+        'from': party_a,
+        'value': ether_min_deposit,
+    }).depositEther()
+    mintable_token.transact({
+        'from': party_b,
+    }).transfer(multisig.address, token_min_deposit)
+    multisig.transact().syncTokenBalance()
+
+    measurements['refundEther'] = gas_used(multisig.transact({
+        'from': party_a,
+    }).refundEther())
+    measurements['withdraw'] = gas_used(multisig.transact({
+        'from': party_a,
+    }).withdraw())
+
+    multisig.transact({
+        'from': party_a,
+        'value': ether_min_deposit,
+    }).depositEther()
+    multisig.transact({
+        'from': arbiter,
+    }).lock()
+
+    measurements['withdrawEther'] = gas_used(multisig.transact({
+        'from': party_b,
+    }).withdrawEther())
+
+    for scenario, ceiling in GAS_CEILINGS.items():
+        assert measurements[scenario] <= ceiling, scenario
@@ -0,0 +1,53 @@
+import pytest
+
+from escrow.client import parse_snapshot
+from escrow.reader import read_snapshots
+
+
+@pytest.fixture()
+def reader(deploy_contract, MultiSignatureReader):
+    return deploy_contract(MultiSignatureReader)
+
+
+@pytest.fixture()
+def create_multisigs(create_multisig, unlock_at):
+    def _create_multisigs(count):
+        return [
+            create_multisig(unlock_at=unlock_at + i)[0]
+            for i in range(count)
+        ]
+    return _create_multisigs
+
+
+def test_reading_one_snapshot(reader, multisig, with_both_deposits_and_locked, State):
+    snapshots = read_snapshots(reader, [multisig.address])
+
+    assert snapshots == {
+        multisig.address: parse_snapshot(multisig.call().getSnapshot()),
+    }
+    assert snapshots[multisig.address].state == State.Locked
+
+
+def test_reading_many_snapshots(reader,
+                                create_multisigs,
+                                party_a,
+                                ether_min_deposit,
+                                State):
+    multisigs = create_multisigs(5)
+    multisigs[2].transact({
+        'from': party_a,
+        'value': ether_min_deposit,
+    }).depositEther()
+
+    snapshots = read_snapshots(reader, [m.address for m in multisigs], batch_size=2)
+
+    assert len(snapshots) == 5
+    for multisig in multisigs:
+        assert snapshots[multisig.address] == parse_snapshot(multisig.call().getSnapshot())
+    assert snapshots[multisigs[2].address].state == State.WaitingForTokens
+    assert snapshots[multisigs[2].address].etherBalance == ether_min_deposit
+    assert snapshots[multisigs[4].address].unlockAt == snapshots[multisigs[0].address].unlockAt + 4
+
+
+def test_reading_no_snapshots(reader):
+    assert read_snapshots(reader, []) == {}
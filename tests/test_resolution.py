@@ -75,6 +75,9 @@ def test_voting_with_quorum(web3,
         'B': party_b,
     }
 
+    before_bal_a = mintable_token.call().balanceOf(party_a)
+    before_bal_b = mintable_token.call().balanceOf(party_b)
+
     if a_vote != '':
         multisig.transact({
             'from': party_a,
@@ -90,10 +93,8 @@ def test_voting_with_quorum(web3,
             'from': arbiter,
         }).submitArbiterVote(vote_map[c_vote])
 
-    before_bal_a = mintable_token.call().balanceOf(party_a)
-    before_bal_b = mintable_token.call().balanceOf(party_b)
-
-    assert mintable_token.call().balanceOf(multisig.address) == token_min_deposit
+    # The vote which reached quorum already sent the tokens.
+    assert mintable_token.call().balanceOf(multisig.address) == 0
 
     multisig.transact({
         'from': web3.eth.accounts[0],
@@ -229,3 +230,137 @@ def test_cannot_vote_for_any_address(web3,
         }).submitArbiterVote(web3.eth.accounts[0])
 
     assert multisig.call().partyAVote() == NULL_ADDRESS
+
+
+def test_votes_are_tallied(multisig,
+                           party_a,
+                           party_b,
+                           arbiter,
+                           after_unlock,
+                           mintable_token,
+                           token_min_deposit):
+    assert multisig.call().numPartyAVotes() == 0
+    assert multisig.call().numPartyBVotes() == 0
+
+    multisig.transact({
+        'from': party_a,
+    }).submitPartyAVote(party_a)
+
+    assert multisig.call().numPartyAVotes() == 1
+    assert multisig.call().numPartyBVotes() == 0
+    assert mintable_token.call().balanceOf(multisig.address) == token_min_deposit
+
+    multisig.transact({
+        'from': party_b,
+    }).submitPartyBVote(party_b)
+
+    assert multisig.call().numPartyAVotes() == 1
+    assert multisig.call().numPartyBVotes() == 1
+    assert mintable_token.call().balanceOf(multisig.address) == token_min_deposit
+
+    # A repeated vote is ignored and does not count towards the tally.
+    multisig.transact({
+        'from': party_b,
+    }).submitPartyBVote(party_a)
+
+    assert multisig.call().numPartyAVotes() == 1
+    assert multisig.call().numPartyBVotes() == 1
+
+    multisig.transact({
+        'from': arbiter,
+    }).submitArbiterVote(party_b)
+
+    assert multisig.call().numPartyAVotes() == 1
+    assert multisig.call().numPartyBVotes() == 2
+    assert mintable_token.call().balanceOf(multisig.address) == 0
+
+
+def test_withdraw_tokens_sends_tokens_arriving_after_settlement(multisig,
+                                                                party_a,
+                                                                party_b,
+                                                                after_unlock,
+                                                                mintable_token,
+                                                                token_min_deposit):
+    multisig.transact({
+        'from': party_a,
+    }).submitPartyAVote(party_b)
+    multisig.transact({
+        'from': party_b,
+    }).submitPartyBVote(party_b)
+
+    assert mintable_token.call().balanceOf(multisig.address) == 0
+    before_bal_b = mintable_token.call().balanceOf(party_b)
+
+    mintable_token.transact().mint(multisig.address, 12345)
+
+    multisig.transact({
+        'from': party_a,
+    }).withdrawTokens()
+
+    assert mintable_token.call().balanceOf(multisig.address) == 0
+    assert mintable_token.call().balanceOf(party_b) - before_bal_b == 12345
+
+
+def test_quorum_vote_is_recorded_when_the_token_throws(deploy_contract,
+                                                       MultiSignature,
+                                                       BrokenToken,
+                                                       party_a,
+                                                       party_b,
+                                                       arbiter,
+                                                       trapdoor_a,
+                                                       trapdoor_b,
+                                                       trapdoor_c,
+                                                       ether_min_deposit,
+                                                       token_min_deposit,
+                                                       set_timestamp,
+                                                       unlock_at,
+                                                       State):
+    broken_token = deploy_contract(BrokenToken)
+    broken_token.transact().mint(party_b, token_min_deposit)
+    multisig = deploy_contract(MultiSignature, kwargs={
+        'participants': [party_a, party_b, arbiter],
+        'rescuers': [trapdoor_a, trapdoor_b, trapdoor_c],
+        '_ethDepositMinimum': ether_min_deposit,
+        '_tokenDepositMinimum': token_min_deposit,
+        '_tokenAddress': broken_token.address,
+        '_unlockAt': unlock_at,
+        '_contractTerms': "Everyone promises to be on their best behavior",
+    })
+
+    multisig.transact({
+        'from': party_a,
+        'value': ether_min_deposit,
+    }).depositEther()
+    broken_token.transact({
+        'from': party_b,
+    }).transfer(multisig.address, token_min_deposit)
+    multisig.transact({
+        'from': party_b,
+    }).depositToken()
+    multisig.transact({
+        'from': arbiter,
+    }).lock()
+    set_timestamp(unlock_at)
+    assert multisig.call().currentState() == State.Unlocked
+
+    broken_token.transact().setBroken(True)
+
+    multisig.transact({
+        'from': party_a,
+    }).submitPartyAVote(party_b)
+    multisig.transact({
+        'from': arbiter,
+    }).submitArbiterVote(party_b)
+
+    assert multisig.call().arbiterVote() == party_b
+    assert multisig.call().numPartyBVotes() == 2
+    assert multisig.call().tokenBalance() == token_min_deposit
+    assert broken_token.call().balanceOf(party_b) == 0
+
+    broken_token.transact().setBroken(False)
+    multisig.transact({
+        'from': party_a,
+    }).withdrawTokens()
+
+    assert multisig.call().tokenBalance() == 0
+    assert broken_token.call().balanceOf(party_b) == token_min_deposit
@@ -0,0 +1,203 @@
+import pytest
+
+from ethereum import tester
+from ethereum.utils import (
+    encode_hex,
+    privtoaddr,
+)
+
+from escrow.signing import (
+    aggregate_signatures,
+    sign_message,
+    trapdoor_message_hash,
+    vote_message_hash,
+)
+from escrow.terms import to_bytes32
+
+
+@pytest.fixture(scope='session')
+def private_keys():
+    """
+    The private keys of the testrpc accounts, keyed by address.
+    """
+    return {
+        '0x' + encode_hex(privtoaddr(key)): key
+        for key in tester.keys
+    }
+
+
+@pytest.fixture()
+def sign(private_keys):
+    def _sign(message_hash, *signers):
+        return aggregate_signatures([
+            sign_message(message_hash, private_keys[signer.lower()])
+            for signer in signers
+        ])
+    return _sign
+
+
+def test_vote_message_hash_matches_contract(multisig, party_b):
+    assert to_bytes32(multisig.call().voteMessageHash(party_b)) == vote_message_hash(
+        multisig.address,
+        party_b,
+    )
+
+
+def test_relaying_signed_votes(web3,
+                               multisig,
+                               sign,
+                               party_a,
+                               party_b,
+                               arbiter,
+                               NULL_ADDRESS,
+                               after_unlock):
+    message_hash = vote_message_hash(multisig.address, party_b)
+
+    multisig.transact({
+        'from': web3.eth.coinbase,
+    }).submitSignedVotes(party_b, *sign(message_hash, party_b, arbiter))
+
+    assert multisig.call().partyAVote() == NULL_ADDRESS
+    assert multisig.call().partyBVote() == party_b
+    assert multisig.call().arbiterVote() == party_b
+
+
+def test_signed_votes_cannot_be_changed_or_forged(web3,
+                                                  multisig,
+                                                  sign,
+                                                  party_a,
+                                                  party_b,
+                                                  arbiter,
+                                                  trapdoor_a,
+                                                  NULL_ADDRESS,
+                                                  after_unlock):
+    multisig.transact({
+        'from': arbiter,
+    }).submitArbiterVote(party_a)
+
+    signatures = sign(vote_message_hash(multisig.address, party_b), arbiter, trapdoor_a)
+    assert multisig.call().submitSignedVotes(party_b, *signatures) == 0
+
+    # A signature over a different recipient does not count.
+    signatures = sign(vote_message_hash(multisig.address, party_a), party_b)
+    assert multisig.call().submitSignedVotes(party_b, *signatures) == 0
+
+    multisig.transact().submitSignedVotes(party_b, *signatures)
+
+    assert multisig.call().partyBVote() == NULL_ADDRESS
+    assert multisig.call().arbiterVote() == party_a
+
+
+def test_signed_votes_require_unlocked_state(multisig,
+                                             sign,
+                                             party_a,
+                                             arbiter,
+                                             with_both_deposits_and_locked):
+    signatures = sign(vote_message_hash(multisig.address, party_a), party_a, arbiter)
+
+    with pytest.raises(ValueError):
+        multisig.transact().submitSignedVotes(party_a, *signatures)
+
+
+def test_trapdoor_message_hash_matches_contract(multisig, txn_recorder):
+    assert to_bytes32(
+        multisig.call().trapdoorMessageHash(txn_recorder.address, 12345, 'some-data')
+    ) == trapdoor_message_hash(multisig.address, 0, txn_recorder.address, 12345, 'some-data')
+
+
+def test_relaying_signed_trapdoor(web3,
+                                  multisig,
+                                  sign,
+                                  txn_recorder,
+                                  trapdoor_a,
+                                  trapdoor_c,
+                                  with_both_deposits_and_locked):
+    message_hash = trapdoor_message_hash(
+        multisig.address,
+        multisig.call().trapdoorNonce(),
+        txn_recorder.address,
+        12345,
+        'some-data',
+    )
+    signatures = sign(message_hash, trapdoor_a, trapdoor_c)
+
+    multisig.transact({
+        'from': web3.eth.coinbase,
+    }).trapdoorWithSignatures(txn_recorder.address, 12345, 'some-data', *signatures)
+
+    assert txn_recorder.call().lastCallValue() == 12345
+    assert txn_recorder.call().lastCallData().startswith('some-data')
+    assert multisig.call().trapdoorNonce() == 1
+
+    # The same signatures cannot be replayed.
+    with pytest.raises(ValueError):
+        multisig.transact().trapdoorWithSignatures(
+            txn_recorder.address,
+            12345,
+            'some-data',
+            *signatures
+        )
+
+
+def test_signed_trapdoor_clears_onchain_approvals(multisig,
+                                                  sign,
+                                                  txn_recorder,
+                                                  trapdoor_a,
+                                                  trapdoor_b,
+                                                  trapdoor_c,
+                                                  with_both_deposits_and_locked):
+    # trapdoorA approves the call on chain, then trapdoorB and trapdoorC
+    # send it with their signatures.
+    multisig.transact({
+        'from': trapdoor_a,
+    }).trapdoor(txn_recorder.address, 0, 'some-data')
+    pending_hash = multisig.call().trapdoorData(trapdoor_a)
+    assert pending_hash != multisig.call().trapdoorData(trapdoor_b)
+
+    message_hash = trapdoor_message_hash(
+        multisig.address,
+        multisig.call().trapdoorNonce(),
+        txn_recorder.address,
+        0,
+        'some-data',
+    )
+    multisig.transact().trapdoorWithSignatures(
+        txn_recorder.address,
+        0,
+        'some-data',
+        *sign(message_hash, trapdoor_b, trapdoor_c)
+    )
+
+    assert txn_recorder.call().wasCalled() is True
+    assert multisig.call().trapdoorData(trapdoor_a) == multisig.call().trapdoorData(trapdoor_b)
+    txn_recorder.transact().__reset__()
+
+    # The leftover approval of trapdoorA no longer counts, so a single
+    # approval from trapdoorB cannot send the call again.
+    multisig.transact({
+        'from': trapdoor_b,
+    }).trapdoor(txn_recorder.address, 0, 'some-data')
+
+    assert txn_recorder.call().wasCalled() is False
+
+
+@pytest.mark.parametrize(
+    'signers',
+    (
+        ('trapdoor_a',),
+        ('trapdoor_a', 'trapdoor_a'),
+        ('trapdoor_a', 'party_a'),
+    ),
+)
+def test_signed_trapdoor_requires_two_signers(request,
+                                              multisig,
+                                              sign,
+                                              txn_recorder,
+                                              signers):
+    message_hash = trapdoor_message_hash(multisig.address, 0, txn_recorder.address, 0, '')
+    signatures = sign(message_hash, *[request.getfixturevalue(name) for name in signers])
+
+    with pytest.raises(ValueError):
+        multisig.transact().trapdoorWithSignatures(txn_recorder.address, 0, '', *signatures)
+
+    assert txn_recorder.call().wasCalled() is False
@@ -0,0 +1,219 @@
+import pytest
+
+from escrow.state import (
+    CREDITS_SLOT,
+    MINIMUMS_SLOT,
+    TIMESTAMPS_SLOT,
+    TOKEN_BALANCE_SLOT,
+    escrowed_ether,
+    evaluate_state_from_storage,
+    evaluate_state,
+    evaluate_states,
+    unpack_credits,
+    unpack_minimums,
+    unpack_timestamps,
+)
+
+
+FIXTURE_STATES = (
+    'genesis',
+    'with_ether_deposit',
+    'with_token_deposit',
+    'with_both_deposits',
+    'with_both_deposits_and_locked',
+    'after_unlock',
+)
+
+
+@pytest.fixture()
+def read_state_inputs(web3, evm):
+    def _read_state_inputs(multisig):
+        return (
+            evm.block.get_storage_data(multisig.address, TIMESTAMPS_SLOT),
+            evm.block.get_storage_data(multisig.address, MINIMUMS_SLOT),
+            escrowed_ether(
+                web3.eth.getBalance(multisig.address),
+                evm.block.get_storage_data(multisig.address, CREDITS_SLOT),
+            ),
+            evm.block.get_storage_data(multisig.address, TOKEN_BALANCE_SLOT),
+            evm.block.timestamp,
+        )
+    return _read_state_inputs
+
+
+def test_unpacking_storage(multisig,
+                           evm,
+                           ether_min_deposit,
+                           token_min_deposit,
+                           unlock_at,
+                           with_both_deposits_and_locked):
+    assert unpack_timestamps(evm.block.get_storage_data(multisig.address, TIMESTAMPS_SLOT)) == (
+        multisig.call().lockedAt(),
+        unlock_at,
+    )
+    assert unpack_minimums(evm.block.get_storage_data(multisig.address, MINIMUMS_SLOT)) == (
+        ether_min_deposit,
+        token_min_deposit,
+    )
+
+
+def test_unpacking_credits(web3,
+                           multisig,
+                           evm,
+                           party_a,
+                           ether_min_deposit,
+                           read_state_inputs,
+                           State,
+                           with_both_deposits):
+    multisig.transact({
+        'from': party_a,
+    }).refundEther()
+
+    credits_slot = evm.block.get_storage_data(multisig.address, CREDITS_SLOT)
+    assert unpack_credits(credits_slot) == (
+        multisig.call().creditA(),
+        multisig.call().creditB(),
+    )
+    assert unpack_credits(credits_slot) == (ether_min_deposit, 0)
+    assert escrowed_ether(web3.eth.getBalance(multisig.address), credits_slot) == 0
+
+    assert evaluate_state_from_storage(*read_state_inputs(multisig)) == State.WaitingForEther
+    assert multisig.call().currentState() == State.WaitingForEther
+
+
+def test_tracked_token_balance_slot(multisig, evm, token_min_deposit, with_token_deposit):
+    assert evm.block.get_storage_data(multisig.address, TOKEN_BALANCE_SLOT) == token_min_deposit
+    assert multisig.call().tokenBalance() == token_min_deposit
+
+
+@pytest.mark.parametrize('state_name', FIXTURE_STATES)
+def test_slot_constants_match_contract(multisig,
+                                       multisig_variant,
+                                       chain_snapshots,
+                                       evm,
+                                       party_a,
+                                       state_name):
+    snapshots = chain_snapshots[multisig_variant]
+    snapshots.revert_to(state_name)
+
+    if state_name in ('with_ether_deposit', 'with_both_deposits'):
+        # Leave partyA a credit so that the credits slot is not empty.
+        multisig.transact({
+            'from': party_a,
+        }).refundEther()
+
+    def read_slot(slot):
+        return evm.block.get_storage_data(multisig.address, slot)
+
+    assert unpack_timestamps(read_slot(TIMESTAMPS_SLOT)) == (
+        multisig.call().lockedAt(),
+        multisig.call().unlockAt(),
+    )
+    assert unpack_minimums(read_slot(MINIMUMS_SLOT)) == (
+        multisig.call().ethDepositMinimum(),
+        multisig.call().tokenDepositMinimum(),
+    )
+    assert unpack_credits(read_slot(CREDITS_SLOT)) == (
+        multisig.call().creditA(),
+        multisig.call().creditB(),
+    )
+    assert read_slot(TOKEN_BALANCE_SLOT) == multisig.call().tokenBalance()
+
+
+@pytest.mark.parametrize('state_name', FIXTURE_STATES)
+def test_evaluator_matches_contract(multisig,
+                                    multisig_variant,
+                                    chain_snapshots,
+                                    read_state_inputs,
+                                    evm,
+                                    set_timestamp,
+                                    unlock_at,
+                                    state_name):
+    snapshots = chain_snapshots[multisig_variant]
+    snapshots.revert_to(state_name)
+
+    assert evaluate_state_from_storage(*read_state_inputs(multisig)) == multisig.call().currentState()
+
+    # The same state once `unlockAt` has passed, which covers `NeverLocked`.
+    set_timestamp(max(evm.block.timestamp + 1, unlock_at))
+
+    assert evaluate_state_from_storage(*read_state_inputs(multisig)) == multisig.call().currentState()
+
+
+def test_evaluating_many_agreements(multisig,
+                                    multisig_variant,
+                                    chain_snapshots,
+                                    read_state_inputs,
+                                    State):
+    snapshots = chain_snapshots[multisig_variant]
+
+    columns = [[], [], [], [], [], [], []]
+    expected = []
+    for state_name in FIXTURE_STATES:
+        snapshots.revert_to(state_name)
+        timestamps, minimums, ether_balance, token_balance, timestamp = read_state_inputs(multisig)
+        row = unpack_timestamps(timestamps) + unpack_minimums(minimums) + (
+            ether_balance,
+            token_balance,
+            timestamp,
+        )
+        for column, value in zip(columns, row):
+            column.append(value)
+        expected.append(multisig.call().currentState())
+
+    assert evaluate_states(*columns) == expected
+    assert set(expected) == {
+        State.Genesis,
+        State.WaitingForEther,
+        State.WaitingForTokens,
+        State.WaitingForArbiterLock,
+        State.Locked,
+        State.Unlocked,
+    }
+
+    # A single timestamp is shared by every agreement.
+    locked_at, unlock_at = columns[0], columns[1]
+    assert evaluate_states(
+        locked_at,
+        unlock_at,
+        columns[2],
+        columns[3],
+        columns[4],
+        columns[5],
+        max(unlock_at),
+    ) == [
+        State.NeverLocked,
+        State.NeverLocked,
+        State.NeverLocked,
+        State.NeverLocked,
+        State.Unlocked,
+        State.Unlocked,
+    ]
+
+
+def test_evaluating_many_agreements_with_wide_values(State):
+    numpy = pytest.importorskip('numpy')
+
+    # Values either side of the 64 bit halves numpy compares, and an ether
+    # balance beyond the 128 bits of the minimums.
+    wide_values = (0, 1, 2 ** 64 - 1, 2 ** 64, 2 ** 64 + 1, 2 ** 128 - 1)
+    rows = [
+        (0, 100, eth_minimum, token_minimum, ether_balance, token_balance, 50)
+        for eth_minimum in wide_values
+        for token_minimum in wide_values
+        for ether_balance in wide_values + (2 ** 128,)
+        for token_balance in wide_values
+    ]
+    columns = [list(column) for column in zip(*rows)]
+    expected = [evaluate_state(*row) for row in rows]
+
+    assert evaluate_states(*columns) == expected
+    assert evaluate_states(*(
+        numpy.array(column, dtype=object) for column in columns
+    )) == expected
+    assert set(expected) == {
+        State.Genesis,
+        State.WaitingForEther,
+        State.WaitingForTokens,
+        State.WaitingForArbiterLock,
+    }
@@ -0,0 +1,58 @@
+import pytest
+
+
+def test_advancing_does_not_seal_blocks(web3, evm, clock):
+    block_number = web3.eth.blockNumber
+    start = clock.now
+
+    clock.advance(60)
+    clock.advance(60)
+
+    assert clock.now == start + 120
+    assert web3.eth.blockNumber == block_number
+    assert len(evm.blocks) == block_number + 1
+
+
+def test_advance_to_never_moves_backwards(clock):
+    start = clock.now
+
+    assert clock.advance_to(start - 100) == start
+    assert clock.advance_to(start + 100) == start + 100
+
+
+def test_advancing_to_unlock(multisig, clock, unlock_at, with_both_deposits_and_locked, State):
+    assert multisig.call().currentState() == State.Locked
+
+    clock.advance_to_unlock(multisig, offset=-1)
+    assert multisig.call().currentState() == State.Locked
+
+    clock.advance(1)
+    assert clock.now == unlock_at
+    assert multisig.call().currentState() == State.Unlocked
+
+
+def test_transactions_see_the_new_time(multisig,
+                                       clock,
+                                       party_a,
+                                       ether_min_deposit,
+                                       State):
+    clock.advance_to_unlock(multisig)
+
+    assert multisig.call().currentState() == State.NeverLocked
+
+    with pytest.raises(ValueError):
+        multisig.transact({
+            'from': party_a,
+            'value': ether_min_deposit,
+        }).depositEther()
+
+
+def test_reverting_restores_the_time(multisig_variant, chain_snapshots, clock):
+    snapshots = chain_snapshots[multisig_variant]
+    snapshots.revert_to('genesis')
+    start = clock.now
+
+    clock.advance(60 * 60 * 24)
+    snapshots.revert_to('genesis')
+
+    assert clock.now == start
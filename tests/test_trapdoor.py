@@ -116,3 +116,82 @@ def test_trapdoor_cannot_be_called_by_anyone(multisig,
         multisig.transact({
             'from': web3.eth.accounts[0],
         }).trapdoor(web3.eth.accounts[0], 12345, 'some-data')
+
+
+def test_trapdoor_approvals_are_tracked(multisig,
+                                        trapdoor_a,
+                                        trapdoor_b,
+                                        trapdoor_c,
+                                        txn_recorder,
+                                        with_both_deposits_and_locked):
+    multisig.transact({
+        'from': trapdoor_b,
+    }).trapdoor(txn_recorder.address, 12345, 'some-data')
+    multisig.transact({
+        'from': trapdoor_a,
+    }).trapdoor(txn_recorder.address, 54321, 'some-data')
+
+    pending_hash = multisig.call().trapdoorData(trapdoor_b)
+    assert multisig.call().trapdoorData(trapdoor_a) != pending_hash
+    assert multisig.call().trapdoorData(trapdoor_c) != pending_hash
+
+    multisig.transact({
+        'from': trapdoor_c,
+    }).trapdoor(txn_recorder.address, 12345, 'some-data')
+
+    assert txn_recorder.call().lastCallValue() == 12345
+
+    # Executing a call resets the approvals of all three signers.
+    other_hash = multisig.call().trapdoorData(trapdoor_a)
+    assert other_hash == multisig.call().trapdoorData(trapdoor_b)
+    assert other_hash == multisig.call().trapdoorData(trapdoor_c)
+    assert other_hash != pending_hash
+
+
+def test_trapdoor_signer_can_change_their_mind(multisig,
+                                               trapdoor_a,
+                                               trapdoor_b,
+                                               txn_recorder,
+                                               with_both_deposits_and_locked):
+    multisig.transact({
+        'from': trapdoor_a,
+    }).trapdoor(txn_recorder.address, 12345, 'some-data')
+    first_hash = multisig.call().trapdoorData(trapdoor_a)
+
+    multisig.transact({
+        'from': trapdoor_a,
+    }).trapdoor(txn_recorder.address, 54321, 'some-data')
+
+    assert multisig.call().trapdoorData(trapdoor_a) != first_hash
+
+    multisig.transact({
+        'from': trapdoor_b,
+    }).trapdoor(txn_recorder.address, 54321, 'some-data')
+
+    assert txn_recorder.call().lastCallValue() == 54321
+
+
+def test_one_signer_cannot_block_the_other_two(multisig,
+                                               trapdoor_a,
+                                               trapdoor_b,
+                                               trapdoor_c,
+                                               txn_recorder,
+                                               with_both_deposits_and_locked):
+    # trapdoorB and trapdoorC each approve a different call, then trapdoorA
+    # sides with trapdoorC.  The call executes straight away, with no time
+    # having passed, so a single signer can hold nothing up.
+    multisig.transact({
+        'from': trapdoor_b,
+    }).trapdoor(txn_recorder.address, 12345, 'some-data')
+    multisig.transact({
+        'from': trapdoor_c,
+    }).trapdoor(txn_recorder.address, 54321, 'other-data')
+
+    assert txn_recorder.call().wasCalled() is False
+
+    multisig.transact({
+        'from': trapdoor_a,
+    }).trapdoor(txn_recorder.address, 54321, 'other-data')
+
+    assert txn_recorder.call().lastCallValue() == 54321
+    assert txn_recorder.call().lastCallData().startswith('other-data')
@@ -0,0 +1,122 @@
+import pytest
+
+from escrow.terms import to_bytes32
+from escrow.trapdoor import (
+    encode_batch,
+    encode_token_transfer,
+    trapdoor_batch_hash,
+)
+
+
+@pytest.fixture()
+def recovery_calls(web3, multisig, mintable_token, party_a, party_b):
+    return [
+        (party_a, web3.eth.getBalance(multisig.address), b''),
+        (
+            mintable_token.address,
+            0,
+            encode_token_transfer(party_b, mintable_token.call().balanceOf(multisig.address)),
+        ),
+    ]
+
+
+def test_batch_hash_matches_contract(multisig, recovery_calls):
+    assert to_bytes32(
+        multisig.call().trapdoorBatchHash(*encode_batch(recovery_calls))
+    ) == trapdoor_batch_hash(recovery_calls)
+
+
+def test_recovering_everything_in_one_batch(web3,
+                                            multisig,
+                                            mintable_token,
+                                            party_a,
+                                            trapdoor_a,
+                                            trapdoor_c,
+                                            recovery_calls,
+                                            with_both_deposits_and_locked):
+    party_a_balance = web3.eth.getBalance(party_a)
+    ether_balance = web3.eth.getBalance(multisig.address)
+    assert ether_balance > 0
+    assert mintable_token.call().balanceOf(multisig.address) > 0
+
+    multisig.transact({
+        'from': trapdoor_a,
+    }).trapdoorBatch(*encode_batch(recovery_calls))
+
+    assert web3.eth.getBalance(multisig.address) == ether_balance
+
+    multisig.transact({
+        'from': trapdoor_c,
+    }).trapdoorBatch(*encode_batch(recovery_calls))
+
+    assert web3.eth.getBalance(multisig.address) == 0
+    assert web3.eth.getBalance(party_a) == party_a_balance + ether_balance
+    assert mintable_token.call().balanceOf(multisig.address) == 0
+
+    batch_hash = multisig.call().trapdoorBatchHash(*encode_batch(recovery_calls))
+    assert multisig.call().trapdoorData(trapdoor_a) != batch_hash
+    assert multisig.call().trapdoorData(trapdoor_c) != batch_hash
+
+
+def test_batch_is_atomic(web3,
+                         multisig,
+                         mintable_token,
+                         party_a,
+                         party_b,
+                         trapdoor_a,
+                         trapdoor_b,
+                         with_both_deposits_and_locked):
+    ether_balance = web3.eth.getBalance(multisig.address)
+    calls = [
+        (party_a, ether_balance, b''),
+        # Sends more than the contract holds, so this call fails.
+        (party_b, 1, b''),
+    ]
+
+    multisig.transact({
+        'from': trapdoor_a,
+    }).trapdoorBatch(*encode_batch(calls))
+
+    with pytest.raises(ValueError):
+        multisig.transact({
+            'from': trapdoor_b,
+        }).trapdoorBatch(*encode_batch(calls))
+
+    assert web3.eth.getBalance(multisig.address) == ether_balance
+    # The approval of trapdoorA survives the failed execution.
+    batch_hash = multisig.call().trapdoorBatchHash(*encode_batch(calls))
+    assert multisig.call().trapdoorData(trapdoor_a) == batch_hash
+    assert multisig.call().trapdoorData(trapdoor_b) != batch_hash
+
+
+def test_batch_and_single_call_hashes_differ(multisig, txn_recorder, trapdoor_a, trapdoor_b):
+    multisig.transact({
+        'from': trapdoor_a,
+    }).trapdoor(txn_recorder.address, 0, 'some-data')
+    multisig.transact({
+        'from': trapdoor_b,
+    }).trapdoorBatch(*encode_batch([(txn_recorder.address, 0, b'some-data')]))
+
+    assert txn_recorder.call().wasCalled() is False
+
+
+@pytest.mark.parametrize(
+    'data_lengths',
+    (
+        [4],
+        [2, 3],
+        [2],
+    ),
+)
+def test_malformed_batches_are_rejected(multisig, txn_recorder, trapdoor_a, data_lengths):
+    with pytest.raises(ValueError):
+        multisig.transact({
+            'from': trapdoor_a,
+        }).trapdoorBatch([txn_recorder.address], [0], b'abc', data_lengths)
+
+
+def test_only_trapdoor_signers_can_batch(multisig, txn_recorder, party_a):
+    with pytest.raises(ValueError):
+        multisig.transact({
+            'from': party_a,
+        }).trapdoorBatch(*encode_batch([(txn_recorder.address, 0, b'')]))